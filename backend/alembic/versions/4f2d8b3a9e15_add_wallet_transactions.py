@@ -0,0 +1,52 @@
+"""add_wallet_transactions
+
+Revision ID: 4f2d8b3a9e15
+Revises: 7c1e9a4d2b6f
+Create Date: 2026-10-19 14:03:17.228461
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f2d8b3a9e15'
+down_revision = '7c1e9a4d2b6f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('wallet_tx_cursors',
+    sa.Column('wallet_address', sa.String(length=42), nullable=False),
+    sa.Column('chain_id', sa.String(length=10), nullable=False),
+    sa.Column('last_timestamp', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_tx_hash', sa.String(length=66), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('wallet_address', 'chain_id')
+    )
+    op.create_table('wallet_transactions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('wallet_address', sa.String(length=42), nullable=False),
+    sa.Column('chain_id', sa.String(length=10), nullable=False),
+    sa.Column('tx_hash', sa.String(length=66), nullable=False),
+    sa.Column('block_number', sa.Integer(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('from_address', sa.String(length=42), nullable=True),
+    sa.Column('to_address', sa.String(length=42), nullable=True),
+    sa.Column('method', sa.String(length=100), nullable=True),
+    sa.Column('is_aave', sa.Boolean(), nullable=False),
+    sa.Column('raw', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('wallet_address', 'chain_id', 'tx_hash', name='uq_wallet_transactions_wallet_chain_hash')
+    )
+    op.create_index(op.f('ix_wallet_transactions_id'), 'wallet_transactions', ['id'], unique=False)
+    op.create_index(op.f('ix_wallet_transactions_wallet_address'), 'wallet_transactions', ['wallet_address'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_wallet_transactions_wallet_address'), table_name='wallet_transactions')
+    op.drop_index(op.f('ix_wallet_transactions_id'), table_name='wallet_transactions')
+    op.drop_table('wallet_transactions')
+    op.drop_table('wallet_tx_cursors')
@@ -0,0 +1,38 @@
+"""add_monitor_shard_leases
+
+Revision ID: 7c1e9a4d2b6f
+Revises: 2ab4f13f88f4
+Create Date: 2026-10-19 10:12:41.532907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e9a4d2b6f'
+down_revision = '2ab4f13f88f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('monitor_workers',
+    sa.Column('worker_id', sa.String(length=64), nullable=False),
+    sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('worker_id')
+    )
+    op.create_table('monitor_shard_leases',
+    sa.Column('shard_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('owner', sa.String(length=64), nullable=True),
+    sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('shard_id')
+    )
+    op.create_index(op.f('ix_monitor_shard_leases_owner'), 'monitor_shard_leases', ['owner'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_monitor_shard_leases_owner'), table_name='monitor_shard_leases')
+    op.drop_table('monitor_shard_leases')
+    op.drop_table('monitor_workers')
@@ -0,0 +1,79 @@
+"""add_aave_pool_events
+
+Revision ID: 9b3e6f1c7a82
+Revises: 4f2d8b3a9e15
+Create Date: 2026-10-19 16:41:05.913374
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b3e6f1c7a82'
+down_revision = '4f2d8b3a9e15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('aave_pool_events',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('chain_id', sa.String(length=10), nullable=False),
+    sa.Column('block_number', sa.BigInteger(), nullable=False),
+    sa.Column('log_index', sa.Integer(), nullable=False),
+    sa.Column('tx_hash', sa.String(length=66), nullable=False),
+    sa.Column('event', sa.String(length=32), nullable=False),
+    sa.Column('user_address', sa.String(length=42), nullable=True),
+    sa.Column('reserve', sa.String(length=42), nullable=True),
+    sa.Column('args', sa.JSON(), nullable=False),
+    sa.Column('block_timestamp', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('chain_id', 'tx_hash', 'log_index', name='uq_aave_pool_events_chain_tx_log')
+    )
+    op.create_index('ix_aave_pool_events_chain_block', 'aave_pool_events', ['chain_id', 'block_number', 'log_index'], unique=False)
+    op.create_index(op.f('ix_aave_pool_events_user_address'), 'aave_pool_events', ['user_address'], unique=False)
+    op.create_table('aave_indexer_cursors',
+    sa.Column('chain_id', sa.String(length=10), nullable=False),
+    sa.Column('pool_address', sa.String(length=42), nullable=False),
+    sa.Column('synced_block', sa.BigInteger(), nullable=True),
+    sa.Column('applied_block', sa.BigInteger(), nullable=True),
+    sa.Column('applied_log_index', sa.Integer(), nullable=True),
+    sa.Column('pending_cursor', sa.Text(), nullable=True),
+    sa.Column('pending_floor', sa.BigInteger(), nullable=True),
+    sa.Column('pending_top', sa.BigInteger(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('chain_id')
+    )
+    op.create_table('aave_reserve_states',
+    sa.Column('chain_id', sa.String(length=10), nullable=False),
+    sa.Column('reserve', sa.String(length=42), nullable=False),
+    sa.Column('liquidity_index', sa.Numeric(precision=78, scale=0), nullable=False),
+    sa.Column('variable_borrow_index', sa.Numeric(precision=78, scale=0), nullable=False),
+    sa.Column('liquidity_rate', sa.Numeric(precision=78, scale=0), nullable=False),
+    sa.Column('variable_borrow_rate', sa.Numeric(precision=78, scale=0), nullable=False),
+    sa.Column('stable_borrow_rate', sa.Numeric(precision=78, scale=0), nullable=False),
+    sa.Column('block_number', sa.BigInteger(), nullable=False),
+    sa.Column('block_timestamp', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('chain_id', 'reserve')
+    )
+    op.create_table('aave_user_reserves',
+    sa.Column('chain_id', sa.String(length=10), nullable=False),
+    sa.Column('user_address', sa.String(length=42), nullable=False),
+    sa.Column('reserve', sa.String(length=42), nullable=False),
+    sa.Column('scaled_supply', sa.Numeric(precision=78, scale=0), nullable=False),
+    sa.Column('scaled_variable_debt', sa.Numeric(precision=78, scale=0), nullable=False),
+    sa.Column('stable_debt', sa.Numeric(precision=78, scale=0), nullable=False),
+    sa.Column('last_block', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('chain_id', 'user_address', 'reserve')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('aave_user_reserves')
+    op.drop_table('aave_reserve_states')
+    op.drop_table('aave_indexer_cursors')
+    op.drop_index(op.f('ix_aave_pool_events_user_address'), table_name='aave_pool_events')
+    op.drop_index('ix_aave_pool_events_chain_block', table_name='aave_pool_events')
+    op.drop_table('aave_pool_events')
@@ -0,0 +1,26 @@
+"""add_reserve_token_metadata
+
+Revision ID: d5a7c2e94f30
+Revises: 9b3e6f1c7a82
+Create Date: 2026-10-19 18:22:50.107262
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a7c2e94f30'
+down_revision = '9b3e6f1c7a82'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('aave_reserve_states', sa.Column('symbol', sa.String(length=32), nullable=True))
+    op.add_column('aave_reserve_states', sa.Column('decimals', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('aave_reserve_states', 'decimals')
+    op.drop_column('aave_reserve_states', 'symbol')
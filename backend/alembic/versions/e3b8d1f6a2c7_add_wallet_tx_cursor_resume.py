@@ -0,0 +1,30 @@
+"""add_wallet_tx_cursor_resume
+
+Revision ID: e3b8d1f6a2c7
+Revises: d5a7c2e94f30
+Create Date: 2026-10-19 21:04:13.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b8d1f6a2c7'
+down_revision = 'd5a7c2e94f30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('wallet_tx_cursors', sa.Column('page_cursor', sa.Text(), nullable=True))
+    op.add_column('wallet_tx_cursors', sa.Column('page_age_from', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('wallet_tx_cursors', sa.Column('pending_timestamp', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('wallet_tx_cursors', sa.Column('pending_tx_hash', sa.String(length=66), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('wallet_tx_cursors', 'pending_tx_hash')
+    op.drop_column('wallet_tx_cursors', 'pending_timestamp')
+    op.drop_column('wallet_tx_cursors', 'page_age_from')
+    op.drop_column('wallet_tx_cursors', 'page_cursor')
@@ -1,8 +1,10 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, positions, actions
+from app.api.v1.endpoints import auth, positions, actions, stress_test, monitoring
 
 api_router = APIRouter()
 
 api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 api_router.include_router(positions.router, prefix="/positions", tags=["positions"])
 api_router.include_router(actions.router, prefix="/actions", tags=["actions"])
+api_router.include_router(stress_test.router, prefix="/stress-test", tags=["stress-test"])
+api_router.include_router(monitoring.router, prefix="/monitoring", tags=["monitoring"])
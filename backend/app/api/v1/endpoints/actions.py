@@ -10,8 +10,8 @@ from app.models.position import Position
 from app.schemas.position import ActionPlan
 from app.services.position_analysis.multi_chain_monitor import MultiChainPositionMonitor
 from app.services.position_analysis.blockscout_client import BlockscoutMCPClient
+from app.services.position_analysis.price_fetcher import price_fetcher
 from langchain_mcp_adapters.client import MultiServerMCPClient
-import httpx
 
 router = APIRouter()
 
@@ -156,8 +156,6 @@ async def generate_actions(
 
 async def get_current_token_prices(positions: List[Dict], holdings: List[Dict]) -> Dict[str, float]:
     """Get current USD prices for all tokens in positions and holdings"""
-    token_prices = {}
-    
     # Collect all unique tokens
     all_tokens = set()
     
@@ -176,55 +174,12 @@ async def get_current_token_prices(positions: List[Dict], holdings: List[Dict])
     # Remove empty strings
     all_tokens = {token for token in all_tokens if token}
     
-    # Get prices from CoinGecko API
-    try:
-        async with httpx.AsyncClient() as client:
-            # Map token symbols to CoinGecko IDs
-            token_mapping = {
-                'WETH': 'weth',
-                'USDC': 'usd-coin',
-                'USDT': 'tether',
-                'DAI': 'dai',
-                'cbETH': 'coinbase-wrapped-staked-eth',
-                'ETH': 'ethereum',
-                'MATIC': 'matic-network',
-                'ARB': 'arbitrum'
-            }
-            
-            # Get prices for available tokens
-            coin_ids = []
-            for token in all_tokens:
-                if token in token_mapping:
-                    coin_ids.append(token_mapping[token])
-            
-            if coin_ids:
-                ids_param = ','.join(coin_ids)
-                response = await client.get(
-                    f"https://api.coingecko.com/api/v3/simple/price?ids={ids_param}&vs_currencies=usd"
-                )
-                
-                if response.status_code == 200:
-                    prices_data = response.json()
-                    
-                    # Map back to token symbols
-                    for token, coin_id in token_mapping.items():
-                        if coin_id in prices_data:
-                            token_prices[token] = prices_data[coin_id]['usd']
-                
-                print(f"🔍 Token prices fetched: {token_prices}")
-    
-    except Exception as e:
-        print(f"Error fetching token prices: {e}")
-        # Fallback prices
-        token_prices = {
-            'WETH': 2000.0,
-            'USDC': 1.0,
-            'USDT': 1.0,
-            'DAI': 1.0,
-            'cbETH': 2000.0,
-            'ETH': 2000.0,
-            'MATIC': 0.5,
-            'ARB': 1.0
-        }
+    # Price held tokens by contract address first, the rest by symbol through the
+    # shared price oracle, with registry fallbacks
+    by_address = await price_fetcher.get_prices_for_balances(holdings)
+    token_prices = {token: by_address[token] for token in all_tokens if token in by_address}
+    quotes = await price_fetcher.get_quotes(all_tokens - set(token_prices), allow_fallback=True)
+    token_prices.update({token: quote.price for token, quote in quotes.items()})
+    print(f"🔍 Token prices fetched: {token_prices}")
     
     return token_prices
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends
+from typing import Dict, Any
+from app.core.security import get_current_active_user
+from app.models.user import User
+from app.tasks import position_monitoring
+
+router = APIRouter()
+
+@router.get("/status")
+def get_monitoring_status(
+    include_wallets: bool = False,
+    current_user: User = Depends(get_current_active_user)
+) -> Dict[str, Any]:
+    """
+    Background monitoring scheduler status: lag, throughput, backlog, alerting and transaction ingestion
+
+    With include_wallets, wallet_states lists only the current user's wallet
+    """
+    service = position_monitoring.monitor_service
+    if service is None:
+        return {"running": False, "wallets": 0}
+    status = service.get_status(include_wallets)
+    if include_wallets:
+        own_wallet = current_user.wallet_address.lower()
+        status["wallet_states"] = [
+            state for state in status["wallet_states"] if state["address"].lower() == own_wallet
+        ]
+    if position_monitoring.ingestion_loop is not None:
+        status["transaction_ingestion"] = position_monitoring.ingestion_loop.get_status()
+    return status
@@ -0,0 +1,107 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional
+from pydantic import BaseModel, Field
+import asyncio
+from app.core.database import get_db
+from app.core.security import get_current_active_user
+from app.models.user import User
+from app.models.position import Position
+from app.services.position_analysis.health_factor_calculator import HealthFactorCalculator
+from app.services.position_analysis.stress_test import StressTestEngine
+
+router = APIRouter()
+
+# Request size caps, as every call runs on this API's own CPUs
+MAX_MONTE_CARLO_SCENARIOS = 100_000
+MAX_SHOCK_SCENARIOS = 1000
+MAX_PROCESSES = 4
+
+class MonteCarloConfig(BaseModel):
+    count: int = Field(1000, ge=1, le=MAX_MONTE_CARLO_SCENARIOS)
+    horizon_days: float = Field(1.0, gt=0, le=365)
+    volatilities: Optional[Dict[str, float]] = None
+    seed: Optional[int] = None
+
+class StressTestRequest(BaseModel):
+    # Each scenario maps token -> relative price shock, e.g. {"WETH": -0.2}
+    scenarios: List[Dict[str, float]] = Field([], max_length=MAX_SHOCK_SCENARIOS)
+    monte_carlo: Optional[MonteCarloConfig] = None
+    price_overrides: Dict[str, float] = {}
+    processes: int = Field(0, ge=0, le=MAX_PROCESSES)
+
+class StressTestResponse(BaseModel):
+    scenarios: int
+    positions: int
+    bad_debt_usd: Dict[str, float]
+    liquidatable_debt_usd: Dict[str, float]
+    liquidated_positions: Dict[str, float]
+    at_risk: List[Dict[str, Any]]
+
+# Global calculator instance
+hf_calculator = None
+
+def get_hf_calculator():
+    """Get or initialize health factor calculator"""
+    global hf_calculator
+    if hf_calculator is None:
+        hf_calculator = HealthFactorCalculator()
+    return hf_calculator
+
+@router.post("/", response_model=StressTestResponse)
+async def run_stress_test(
+    request: StressTestRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Stress test every stored position against price shock scenarios
+    Explicit scenarios and Monte Carlo draws are mutually exclusive; Monte Carlo wins if both are given
+    Loss distributions cover every stored position; at_risk lists only the current user's positions
+    """
+    if not request.scenarios and not request.monte_carlo:
+        raise HTTPException(status_code=400, detail="Provide scenarios or a monte_carlo configuration")
+
+    rows = db.query(Position, User.wallet_address).join(User, Position.user_id == User.id).all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="No stored positions to stress test")
+
+    positions = [
+        {
+            'chain_id': pos.chain_id,
+            'supplied_assets': pos.supplied_assets or [],
+            'borrowed_assets': pos.borrowed_assets or []
+        }
+        for pos, _ in rows
+    ]
+    position_keys = [f"{wallet}:{pos.chain_id}" for pos, wallet in rows]
+
+    try:
+        calculator = get_hf_calculator()
+        prices = await calculator.get_prices_for_assets(positions)
+
+        engine = StressTestEngine(positions, prices, calculator.knowledge_graph, position_keys,
+                                  request.price_overrides)
+
+        # The evaluation is CPU-bound, keep it off the event loop
+        loop = asyncio.get_event_loop()
+        if request.monte_carlo:
+            mc = request.monte_carlo
+            result = await loop.run_in_executor(
+                None,
+                lambda: engine.run_monte_carlo(mc.count, mc.horizon_days, mc.volatilities, mc.seed, request.processes)
+            )
+        else:
+            result = await loop.run_in_executor(
+                None,
+                lambda: engine.run_shocks(request.scenarios, request.processes)
+            )
+
+        summary = result.summary()
+        own_keys = {key for key, (_, wallet) in zip(position_keys, rows)
+                    if wallet.lower() == current_user.wallet_address.lower()}
+        summary["at_risk"] = [entry for entry in summary["at_risk"] if entry["position"] in own_keys]
+        return StressTestResponse(**summary)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 import os
 
 class Settings(BaseSettings):
@@ -43,6 +43,31 @@ class Settings(BaseSettings):
             }
         ]
     
+    # Aave V3 Pool per chain, indexed by the Aave event indexer
+    @property
+    def AAVE_POOL_ADDRESSES(self) -> Dict[str, str]:
+        return {
+            "1": "0x87870Bca3F3fD6335C3F4ce8392D69350B4fA4E2",
+            "11155111": "0x6Ae43d3271ff6888e7Fc43Fd7321a503ff738951",
+            "42161": "0x794a61358D6845594F94dc1DB02A252b5b4814aD",
+            "137": "0x794a61358D6845594F94dc1DB02A252b5b4814aD",
+            "10": "0x794a61358D6845594F94dc1DB02A252b5b4814aD",
+        }
+    
+    # JSON-RPC endpoint per chain for direct contract reads; RPC_URL_OVERRIDES
+    # ("chain=url,...") points chains elsewhere, e.g. "1=http://127.0.0.1:8545" for an anvil fork
+    RPC_URL_OVERRIDES: str = os.getenv("RPC_URL_OVERRIDES", "")
+    MULTICALL_BATCH_SIZE: int = 100  # Calls per aggregate3 eth_call
+
+    @property
+    def RPC_URLS(self) -> Dict[str, str]:
+        urls = {str(chain["id"]): chain["rpc_url"] for chain in self.SUPPORTED_CHAINS}
+        for entry in self.RPC_URL_OVERRIDES.split(","):
+            if "=" in entry:
+                chain_id, url = entry.split("=", 1)
+                urls[chain_id.strip()] = url.strip()
+        return urls
+    
     # Health Factor Thresholds
     HEALTH_FACTOR_WARNING: float = 1.5
     HEALTH_FACTOR_DANGER: float = 1.25
@@ -51,6 +76,31 @@ class Settings(BaseSettings):
     # Monitoring
     POSITION_UPDATE_INTERVAL_MINUTES: int = 2
     ALERT_CHECK_INTERVAL_MINUTES: int = 1
+    # Off by default: every API worker with it on monitors (and alerts on) every wallet. Enable it on
+    # exactly one process, or run app.tasks.sharded_monitoring workers instead
+    POSITION_MONITORING_ENABLED: bool = os.getenv("POSITION_MONITORING_ENABLED", "False").lower() == "true"
+    POSITION_MONITOR_MAX_CONCURRENCY: int = 4  # Wallet refreshes running at once
+    POSITION_MONITOR_JITTER: float = 0.1  # +/- fraction of the interval
+    POSITION_MONITOR_ONCHAIN_SWEEP_SECONDS: int = 30  # getUserAccountData HF of all wallets, one Multicall per chain
+    MONITOR_SHARDS: int = 64  # Wallet shards distributed over sharded monitoring workers
+    MONITOR_LEASE_TTL_SECONDS: int = 30
+    TX_INGESTION_INTERVAL_SECONDS: int = 60  # Incremental transaction pulls for monitored wallets
+    TX_INGESTION_MAX_CONCURRENCY: int = 4
+    TX_INGESTION_INITIAL_LOOKBACK_HOURS: int = 24  # Window of the first pull for a new (wallet, chain)
+    AAVE_EVENT_INDEXER_ENABLED: bool = os.getenv("AAVE_EVENT_INDEXER_ENABLED", "False").lower() == "true"
+    AAVE_EVENT_INDEXER_CHAINS: str = os.getenv("AAVE_EVENT_INDEXER_CHAINS", "11155111")  # Comma-separated chain ids
+    AAVE_EVENT_INDEXER_INTERVAL_SECONDS: int = 30
+    AAVE_EVENT_INDEXER_MAX_PAGES: int = 20  # Log pages per chain per pass; bootstrap continues over passes
+    AAVE_REORG_DEPTH_BLOCKS: int = 64  # Events this close to the head are not folded into position state yet
+    AAVE_SUPPLY_RECONCILE_MINUTES: int = 60  # Re-read indexed supplies with scaledBalanceOf (aToken transfers)
+    ALERT_WEBHOOK_URL: str = os.getenv("ALERT_WEBHOOK_URL", "")  # Alerts are always logged; also POSTed here if set
+    ALERT_HYSTERESIS: float = 0.05  # HF must recover to threshold × (1 + this) before a position can alert again
+    ALERT_DEDUP_WINDOW_MINUTES: int = 15  # Repeat breaches within this window are held until it passes
+    ALERT_QUEUE_SIZE: int = 1000
+    ALERT_BATCH_SIZE: int = 50
+    ALERT_MAX_RETRIES: int = 3
+    PRICE_STREAM_INTERVAL_SECONDS: int = 30  # Hot-set refresh cadence, keep below the 60s price cache
+    PRICE_STREAM_HOT_WINDOW_MINUTES: int = 10
     
     class Config:
         env_file = ".env"
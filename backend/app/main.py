@@ -7,6 +7,13 @@ from app.core.config import settings
 from app.api.v1.api import api_router
 from app.core.database import engine
 from app.models import Base
+from app.services.position_analysis.price_streamer import price_streamer
+from app.tasks import position_monitoring
+from app.tasks.position_monitoring import start_position_monitoring, stop_position_monitoring
+from app.tasks.aave_event_indexer import (
+    load_reserve_states, load_user_reserves, start_event_indexer, stop_event_indexer
+)
+from app.services.position_analysis.reserve_state import reserve_state_service
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -39,6 +46,37 @@ if not settings.DEBUG:
 # Include API router
 app.include_router(api_router, prefix="/api/v1")
 
+@app.on_event("startup")
+async def start_price_streamer():
+    price_streamer.interval = settings.PRICE_STREAM_INTERVAL_SECONDS
+    price_streamer.hot_window = settings.PRICE_STREAM_HOT_WINDOW_MINUTES * 60
+    price_streamer.start()
+
+@app.on_event("startup")
+async def start_monitoring():
+    if settings.POSITION_MONITORING_ENABLED:
+        await start_position_monitoring()
+
+@app.on_event("startup")
+async def start_aave_indexer():
+    # Exact balances from indexed scaled balances; empty until the indexer has synced a chain
+    reserve_state_service.configure(load_reserve_states, load_user_reserves)
+    if settings.AAVE_EVENT_INDEXER_ENABLED:
+        start_event_indexer(position_monitoring.monitor_service)
+
+@app.on_event("shutdown")
+async def stop_monitoring():
+    await stop_position_monitoring()
+
+@app.on_event("shutdown")
+async def stop_aave_indexer():
+    await stop_event_indexer()
+
+@app.on_event("shutdown")
+async def stop_price_streamer():
+    await price_streamer.stop()
+    await price_streamer.fetcher.aclose()
+
 @app.get("/")
 async def root():
     return {"message": "DeFi Guardian Agent API", "version": "1.0.0"}
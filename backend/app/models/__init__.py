@@ -1,5 +1,9 @@
 from .user import User
 from .position import Position
+from .monitor_shard import MonitorWorker, ShardLease
+from .wallet_transaction import WalletTxCursor, WalletTransaction
+from .aave_event import AavePoolEvent, AaveIndexerCursor, AaveReserveState, AaveUserReserve
 from app.core.database import Base
 
-__all__ = ["User", "Position", "Base"]
+__all__ = ["User", "Position", "MonitorWorker", "ShardLease", "WalletTxCursor", "WalletTransaction",
+           "AavePoolEvent", "AaveIndexerCursor", "AaveReserveState", "AaveUserReserve", "Base"]
@@ -0,0 +1,76 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Numeric, Boolean, DateTime, JSON, Text, UniqueConstraint, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class AavePoolEvent(Base):
+    """Append-only log of Aave Pool events; only rows within the reorg depth of the chain head are ever replaced"""
+    __tablename__ = "aave_pool_events"
+    __table_args__ = (
+        UniqueConstraint("chain_id", "tx_hash", "log_index", name="uq_aave_pool_events_chain_tx_log"),
+        Index("ix_aave_pool_events_chain_block", "chain_id", "block_number", "log_index"),
+    )
+    
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    chain_id = Column(String(10), nullable=False)
+    block_number = Column(BigInteger, nullable=False)
+    log_index = Column(Integer, nullable=False)
+    tx_hash = Column(String(66), nullable=False)
+    event = Column(String(32), nullable=False)  # Supply, Borrow, Repay, Withdraw, LiquidationCall, ReserveDataUpdated
+    user_address = Column(String(42), nullable=True, index=True)  # Position owner, lowercased
+    reserve = Column(String(42), nullable=True)  # Debt asset for liquidations
+    args = Column(JSON, nullable=False)  # Decoded parameters, integers as decimal strings
+    block_timestamp = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<AavePoolEvent(chain={self.chain_id}, block={self.block_number}, event={self.event})>"
+
+class AaveIndexerCursor(Base):
+    __tablename__ = "aave_indexer_cursors"
+    
+    chain_id = Column(String(10), primary_key=True)
+    pool_address = Column(String(42), nullable=False)
+    synced_block = Column(BigInteger, nullable=True)  # Every event up to here is stored; None until bootstrapped
+    applied_block = Column(BigInteger, nullable=True)  # Events up to here are folded into position state
+    applied_log_index = Column(Integer, nullable=True)  # Last applied log of applied_block; None if the whole block is
+    # Walk that did not finish within one pass: resume from pending_cursor down to pending_floor
+    pending_cursor = Column(Text, nullable=True)
+    pending_floor = Column(BigInteger, nullable=True)
+    pending_top = Column(BigInteger, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<AaveIndexerCursor(chain={self.chain_id}, synced={self.synced_block}, applied={self.applied_block})>"
+
+class AaveReserveState(Base):
+    __tablename__ = "aave_reserve_states"
+    
+    chain_id = Column(String(10), primary_key=True)
+    reserve = Column(String(42), primary_key=True)
+    symbol = Column(String(32), nullable=True)  # Underlying token metadata, resolved once through Blockscout
+    decimals = Column(Integer, nullable=True)
+    # Ray (1e27) fixed point, as emitted by ReserveDataUpdated
+    liquidity_index = Column(Numeric(78, 0), nullable=False)
+    variable_borrow_index = Column(Numeric(78, 0), nullable=False)
+    liquidity_rate = Column(Numeric(78, 0), nullable=False)
+    variable_borrow_rate = Column(Numeric(78, 0), nullable=False)
+    stable_borrow_rate = Column(Numeric(78, 0), nullable=False)
+    block_number = Column(BigInteger, nullable=False)
+    block_timestamp = Column(DateTime(timezone=True), nullable=True)
+    
+    def __repr__(self):
+        return f"<AaveReserveState(chain={self.chain_id}, reserve={self.reserve}, block={self.block_number})>"
+
+class AaveUserReserve(Base):
+    __tablename__ = "aave_user_reserves"
+    
+    chain_id = Column(String(10), primary_key=True)
+    user_address = Column(String(42), primary_key=True)
+    reserve = Column(String(42), primary_key=True)
+    scaled_supply = Column(Numeric(78, 0), nullable=False, default=0)  # aToken balance / liquidity index
+    scaled_variable_debt = Column(Numeric(78, 0), nullable=False, default=0)  # Debt / variable borrow index
+    stable_debt = Column(Numeric(78, 0), nullable=False, default=0)
+    last_block = Column(BigInteger, nullable=False)
+    
+    def __repr__(self):
+        return f"<AaveUserReserve(chain={self.chain_id}, user={self.user_address}, reserve={self.reserve})>"
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class MonitorWorker(Base):
+    __tablename__ = "monitor_workers"
+    
+    worker_id = Column(String(64), primary_key=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=False)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<MonitorWorker(id={self.worker_id}, heartbeat={self.heartbeat_at})>"
+
+class ShardLease(Base):
+    __tablename__ = "monitor_shard_leases"
+    
+    shard_id = Column(Integer, primary_key=True, autoincrement=False)
+    owner = Column(String(64), nullable=True, index=True)  # worker_id holding the lease
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    
+    def __repr__(self):
+        return f"<ShardLease(shard={self.shard_id}, owner={self.owner}, expires={self.lease_expires_at})>"
@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, JSON, Text, UniqueConstraint
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class WalletTxCursor(Base):
+    __tablename__ = "wallet_tx_cursors"
+    
+    wallet_address = Column(String(42), primary_key=True)  # Lowercased
+    chain_id = Column(String(10), primary_key=True)
+    last_timestamp = Column(DateTime(timezone=True), nullable=True)  # Newest ingested transaction
+    last_tx_hash = Column(String(66), nullable=True)
+    # Set while a pass hit max_pages: where to resume paging its window, and the newest
+    # transaction seen so far, which becomes last_timestamp once the window is complete
+    page_cursor = Column(Text, nullable=True)
+    page_age_from = Column(DateTime(timezone=True), nullable=True)
+    pending_timestamp = Column(DateTime(timezone=True), nullable=True)
+    pending_tx_hash = Column(String(66), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<WalletTxCursor(wallet={self.wallet_address}, chain={self.chain_id}, at={self.last_timestamp})>"
+
+class WalletTransaction(Base):
+    __tablename__ = "wallet_transactions"
+    __table_args__ = (
+        UniqueConstraint("wallet_address", "chain_id", "tx_hash", name="uq_wallet_transactions_wallet_chain_hash"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    wallet_address = Column(String(42), nullable=False, index=True)  # Lowercased
+    chain_id = Column(String(10), nullable=False)
+    tx_hash = Column(String(66), nullable=False)
+    block_number = Column(Integer, nullable=True)
+    timestamp = Column(DateTime(timezone=True), nullable=False)
+    from_address = Column(String(42), nullable=True)
+    to_address = Column(String(42), nullable=True)
+    method = Column(String(100), nullable=True)
+    is_aave = Column(Boolean, nullable=False, default=False)
+    raw = Column(JSON, nullable=True)  # Item as returned by Blockscout
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<WalletTransaction(wallet={self.wallet_address}, chain={self.chain_id}, hash={self.tx_hash})>"
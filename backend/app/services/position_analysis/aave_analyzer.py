@@ -9,6 +9,8 @@ from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, asdict
 from .defi_knowledge import DeFiKnowledgeGraph
 from .price_fetcher import price_fetcher
+from .reserve_state import reserve_state_service
+from .token_registry import aave_underlying, get_fallback_price
 
 @dataclass
 class AavePosition:
@@ -75,15 +77,26 @@ class AavePositionAnalyzer:
             if "data" in tokens_response:
                 print(f"📊 Found {len(tokens_response['data'])} tokens")
                 
+                # Exact balances from indexed scaled balances, plus debt token balances as fallback
+                indexed = {
+                    (balances["symbol"] or "").upper(): balances
+                    for balances in (await reserve_state_service.get_user_balances(chain_id, user_address)).values()
+                }
+                debt_balances = self._debt_balances(tokens_response["data"])
+                
                 for i, token in enumerate(tokens_response["data"]):
                     symbol = token.get("symbol", "Unknown")
                     name = token.get("name", "Unknown")
                     balance = token.get("balance", 0)
                     print(f"  Token {i+1}: {symbol} ({name}) - Balance: {balance}")
                     
-                    if self._is_aave_token(token):
+                    underlying = aave_underlying(symbol)
+                    if underlying and underlying[1]:
+                        print(f"  ⏭️ Debt token {symbol} counted toward {underlying[0]} debt")
+                    elif self._is_aave_token(token):
                         print(f"  ✅ Token {symbol} identified as Aave token, analyzing...")
-                        position = await self._analyze_token_position(token, user_address, chain_id)
+                        position = await self._analyze_token_position(token, user_address, chain_id,
+                                                                      indexed, debt_balances)
                         if position:
                             print(f"  ✅ Position created for {symbol}: HF={position.health_factor:.2f}")
                             positions.append(position)
@@ -91,6 +104,19 @@ class AavePositionAnalyzer:
                             print(f"  ⚠️ Position creation failed for {symbol}")
                     else:
                         print(f"  ⏭️ Token {symbol} not identified as Aave token")
+                
+                # Debt in reserves the user does not supply, e.g. WETH collateral against a USDC loan
+                supplied_assets = {position.asset for position in positions}
+                debt_assets = set(debt_balances) | {
+                    symbol for symbol, balances in indexed.items() if symbol and balances["borrowed"] > 0
+                }
+                for asset_symbol in sorted(debt_assets - supplied_assets):
+                    position = await self._analyze_debt_position(asset_symbol, chain_id, indexed, debt_balances)
+                    if position:
+                        print(f"  ✅ Debt position created for {asset_symbol}: "
+                              f"borrowed={position.borrowed_amount:.2f}")
+                        positions.append(position)
+                self._apply_account_health_factor(positions)
             else:
                 print(f"⚠️ No 'data' key in tokens response")
                 print(f"📊 Full response: {tokens_response}")
@@ -130,11 +156,31 @@ class AavePositionAnalyzer:
         
         return is_aave
     
-    async def _analyze_token_position(self, token: Dict, user_address: str, chain_id: str) -> Optional[AavePosition]:
+    @staticmethod
+    def _token_amount(token: Dict) -> float:
+        """Token balance in whole tokens"""
+        decimals = token.get("decimals", 18)
+        return float(token.get("balance", 0)) / (10 ** int(decimals if decimals is not None else 18))
+    
+    def _debt_balances(self, tokens: List[Dict]) -> Dict[str, float]:
+        """Underlying symbol -> debt token balance (variable plus stable) in whole tokens"""
+        debts: Dict[str, float] = {}
+        for token in tokens:
+            underlying = aave_underlying(token.get("symbol", ""))
+            if underlying and underlying[1]:
+                symbol = underlying[0].upper()
+                debts[symbol] = debts.get(symbol, 0.0) + self._token_amount(token)
+        return debts
+    
+    async def _analyze_token_position(self, token: Dict, user_address: str, chain_id: str,
+                                      indexed: Optional[Dict[str, Dict]] = None,
+                                      debt_balances: Optional[Dict[str, float]] = None) -> Optional[AavePosition]:
         """Analyze a specific token position"""
         try:
-            asset_symbol = token.get("symbol", "").upper()
-            balance = float(token.get("balance", 0))
+            underlying = aave_underlying(token.get("symbol", ""))
+            asset_symbol = (underlying[0] if underlying else token.get("symbol", "")).upper()
+            reserve = (indexed or {}).get(asset_symbol)
+            balance = reserve["supplied"] if reserve else self._token_amount(token)
             
             print(f"    📊 Analyzing {asset_symbol}: balance={balance}")
             
@@ -142,23 +188,7 @@ class AavePositionAnalyzer:
                 return None
             
             # Get collateral factor and liquidation threshold from knowledge graph
-            collateral_factor = self.knowledge_graph.get_collateral_factor(asset_symbol)
-            liquidation_threshold = self.knowledge_graph.get_liquidation_threshold(asset_symbol)
-            
-            # Convert MeTTa result to float if needed
-            if hasattr(collateral_factor, 'value'):
-                collateral_factor = float(collateral_factor.value)
-            elif isinstance(collateral_factor, str):
-                collateral_factor = float(collateral_factor)
-            else:
-                collateral_factor = float(collateral_factor) if collateral_factor else 0.0
-            
-            if hasattr(liquidation_threshold, 'value'):
-                liquidation_threshold = float(liquidation_threshold.value)
-            elif isinstance(liquidation_threshold, str):
-                liquidation_threshold = float(liquidation_threshold)
-            else:
-                liquidation_threshold = float(liquidation_threshold) if liquidation_threshold else 0.0
+            collateral_factor, liquidation_threshold = self._risk_parameters(asset_symbol, chain_id)
             
             print(f"    📊 CF={collateral_factor}, LT={liquidation_threshold}")
             
@@ -170,8 +200,7 @@ class AavePositionAnalyzer:
             
             print(f"    📊 Price=${token_price:.2f}")
             
-            # Estimate borrowed amount (would need Aave contract query in production)
-            borrowed_amount = self._estimate_borrowed_amount(balance, asset_symbol)
+            borrowed_amount = self._get_borrowed_amount(asset_symbol, reserve, debt_balances)
             
             print(f"    📊 Borrowed={borrowed_amount:.2f}")
             
@@ -189,8 +218,8 @@ class AavePositionAnalyzer:
                 collateral_factor=collateral_factor,
                 liquidation_threshold=liquidation_threshold,
                 health_factor=health_factor,
-                supply_apy=0.0,  # Would need to fetch from Aave
-                borrow_apy=0.0,
+                supply_apy=reserve["supply_apy"] if reserve else 0.0,  # 0.0 until the reserve is indexed
+                borrow_apy=reserve["borrow_apy"] if reserve else 0.0,
                 token_price_usd=token_price
             )
             
@@ -200,32 +229,70 @@ class AavePositionAnalyzer:
             traceback.print_exc()
             return None
     
+    async def _analyze_debt_position(self, asset_symbol: str, chain_id: str, indexed: Dict[str, Dict],
+                                     debt_balances: Dict[str, float]) -> Optional[AavePosition]:
+        """Position for a borrowed asset the user does not supply"""
+        reserve = indexed.get(asset_symbol)
+        borrowed_amount = self._get_borrowed_amount(asset_symbol, reserve, debt_balances)
+        if borrowed_amount == 0:
+            return None
+        token_price = await price_fetcher.get_price(asset_symbol) or self._get_default_price(asset_symbol)
+        collateral_factor, liquidation_threshold = self._risk_parameters(asset_symbol, chain_id)
+        return AavePosition(
+            asset=asset_symbol,
+            supplied_amount=0.0,
+            borrowed_amount=borrowed_amount,
+            collateral_factor=collateral_factor,
+            liquidation_threshold=liquidation_threshold,
+            health_factor=float('inf'),  # Set account-wide by _apply_account_health_factor
+            supply_apy=reserve["supply_apy"] if reserve else 0.0,
+            borrow_apy=reserve["borrow_apy"] if reserve else 0.0,
+            token_price_usd=token_price
+        )
+    
+    def _risk_parameters(self, asset_symbol: str, chain_id: str):
+        """(collateral factor, liquidation threshold) from the knowledge graph, as floats"""
+        values = []
+        for value in (self.knowledge_graph.get_collateral_factor(asset_symbol, chain_id),
+                      self.knowledge_graph.get_liquidation_threshold(asset_symbol, chain_id)):
+            # Convert MeTTa result to float if needed
+            if hasattr(value, 'value'):
+                values.append(float(value.value))
+            elif isinstance(value, str):
+                values.append(float(value))
+            else:
+                values.append(float(value) if value else 0.0)
+        return tuple(values)
+    
+    def _apply_account_health_factor(self, positions: List[AavePosition]):
+        """
+        Replace per-asset health factors with the account's when debt is
+        borrowed against other assets: Aave liquidates the account as a whole,
+        so collateral in one reserve backs debt in every other
+        """
+        if not any(pos.borrowed_amount > 0 and pos.supplied_amount == 0 for pos in positions):
+            return
+        collateral = sum(pos.supplied_amount * pos.token_price_usd * pos.liquidation_threshold for pos in positions)
+        debt = sum(pos.borrowed_amount * pos.token_price_usd for pos in positions)
+        health_factor = collateral / debt if debt > 0 else float('inf')
+        print(f"    📊 Account Health Factor={health_factor:.2f} (debt against other collateral)")
+        for pos in positions:
+            pos.health_factor = health_factor
+    
     def _get_default_price(self, asset: str) -> float:
         """Get default price if API fails"""
-        default_prices = {
-            "ETH": 3000.0,
-            "USDC": 1.0,
-            "USDT": 1.0,
-            "DAI": 1.0,
-            "WBTC": 45000.0,
-            "LINK": 15.0,
-            "UNI": 7.0,
-            "AAVE": 100.0,
-        }
-        return default_prices.get(asset.upper(), 1.0)
+        fallback_price = get_fallback_price(asset)
+        return fallback_price if fallback_price is not None else 1.0
     
-    def _estimate_borrowed_amount(self, supplied: float, asset: str) -> float:
-        """Estimate borrowed amount (simplified - would query Aave contracts in production)"""
-        # Simulate borrowing patterns
-        import random
-        if asset in ["USDC", "USDT", "DAI"]:
-            # Stablecoins typically have lower borrowing
-            borrowed_ratio = random.uniform(0.3, 0.6)
-        else:
-            # Volatile assets
-            borrowed_ratio = random.uniform(0.1, 0.4)
-        
-        return supplied * borrowed_ratio
+    def _get_borrowed_amount(self, asset: str, reserve: Optional[Dict],
+                             debt_balances: Optional[Dict[str, float]]) -> float:
+        """
+        Debt in an asset: exact from the indexed scaled balance projected to
+        now when the reserve is indexed, otherwise the debt token balance
+        """
+        if reserve is not None:
+            return reserve["borrowed"]
+        return (debt_balances or {}).get(asset, 0.0)
     
     def _calculate_health_factor(self, supplied: float, borrowed: float, 
                                 collateral_factor: float, liquidation_threshold: float,
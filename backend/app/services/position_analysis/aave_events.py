@@ -0,0 +1,238 @@
+"""
+Aave V3 Pool Events
+Decoding of Pool event logs and incremental position state built from them
+
+Balances are tracked the way the Pool stores them: as scaled balances, i.e.
+underlying amounts divided by the reserve's liquidity index (aTokens) or
+variable borrow index (variable debt) at the time of the event. Every
+Supply/Borrow/Withdraw/Repay is preceded in the same transaction by a
+ReserveDataUpdated event carrying the indexes it was executed at, so
+replaying a chain's Pool logs in (block, log index) order reproduces each
+user's scaled debt and, multiplied by the current index, the balance
+including accrued interest. Scaled supplies are only exact for users who
+never moved aTokens: transfers are emitted by the aToken, not the Pool, so
+replayed supplies must be reconciled with the aToken's scaledBalanceOf.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+RAY = 10 ** 27
+HALF_RAY = RAY // 2
+
+def ray_mul(a: int, b: int) -> int:
+    """a * b / RAY rounded half up, as WadRayMath.rayMul"""
+    return (a * b + HALF_RAY) // RAY
+
+def ray_div(a: int, b: int) -> int:
+    """a * RAY / b rounded half up, as WadRayMath.rayDiv"""
+    return (a * RAY + b // 2) // b
+
+# topic0 -> (event name, [(parameter, type, indexed)])
+POOL_EVENTS: Dict[str, Tuple[str, List[Tuple[str, str, bool]]]] = {
+    # Supply(address indexed reserve, address user, address indexed onBehalfOf, uint256 amount, uint16 indexed referralCode)
+    "0x2b627736bca15cd5381dcf80b0bf11fd197d01a037c52b927a881a10fb73ba61": ("Supply", [
+        ("reserve", "address", True), ("user", "address", False), ("onBehalfOf", "address", True),
+        ("amount", "uint256", False), ("referralCode", "uint16", True),
+    ]),
+    # Withdraw(address indexed reserve, address indexed user, address indexed to, uint256 amount)
+    "0x3115d1449a7b732c986cba18244e897a450f61e1bb8d589cd2e69e6c8924f9f7": ("Withdraw", [
+        ("reserve", "address", True), ("user", "address", True), ("to", "address", True),
+        ("amount", "uint256", False),
+    ]),
+    # Borrow(address indexed reserve, address user, address indexed onBehalfOf, uint256 amount,
+    #        uint8 interestRateMode, uint256 borrowRate, uint16 indexed referralCode)
+    "0xb3d084820fb1a9decffb176436bd02558d15fac9b0ddfed8c465bc7359d7dce0": ("Borrow", [
+        ("reserve", "address", True), ("user", "address", False), ("onBehalfOf", "address", True),
+        ("amount", "uint256", False), ("interestRateMode", "uint8", False), ("borrowRate", "uint256", False),
+        ("referralCode", "uint16", True),
+    ]),
+    # Repay(address indexed reserve, address indexed user, address indexed repayer, uint256 amount, bool useATokens)
+    "0xa534c8dbe71f871f9f3530e97a74601fea17b426cae02e1c5aee42c96c784051": ("Repay", [
+        ("reserve", "address", True), ("user", "address", True), ("repayer", "address", True),
+        ("amount", "uint256", False), ("useATokens", "bool", False),
+    ]),
+    # LiquidationCall(address indexed collateralAsset, address indexed debtAsset, address indexed user,
+    #                 uint256 debtToCover, uint256 liquidatedCollateralAmount, address liquidator, bool receiveAToken)
+    "0xe413a321e8681d831f4dbccbca790d2952b56f977908e45be37335533e005286": ("LiquidationCall", [
+        ("collateralAsset", "address", True), ("debtAsset", "address", True), ("user", "address", True),
+        ("debtToCover", "uint256", False), ("liquidatedCollateralAmount", "uint256", False),
+        ("liquidator", "address", False), ("receiveAToken", "bool", False),
+    ]),
+    # ReserveDataUpdated(address indexed reserve, uint256 liquidityRate, uint256 stableBorrowRate,
+    #                    uint256 variableBorrowRate, uint256 liquidityIndex, uint256 variableBorrowIndex)
+    "0x804c9b842b2748a22bb64b345453a3de7ca54a6ca45ce00d415894979e22897a": ("ReserveDataUpdated", [
+        ("reserve", "address", True), ("liquidityRate", "uint256", False), ("stableBorrowRate", "uint256", False),
+        ("variableBorrowRate", "uint256", False), ("liquidityIndex", "uint256", False),
+        ("variableBorrowIndex", "uint256", False),
+    ]),
+}
+EVENT_SPECS = {name: params for name, params in POOL_EVENTS.values()}
+INTEREST_RATE_MODE_STABLE = 1
+
+def _convert(value: Any, abi_type: str) -> Any:
+    if abi_type == "address":
+        return str(value).lower()
+    if abi_type == "bool":
+        return value if isinstance(value, bool) else str(value).lower() in ("true", "1")
+    return int(value, 0) if isinstance(value, str) else int(value)
+
+def _decode_word(word: str, abi_type: str) -> Any:
+    if abi_type == "address":
+        return "0x" + word[-40:].lower()
+    if abi_type == "bool":
+        return int(word, 16) != 0
+    return int(word, 16)
+
+def decode_pool_log(item: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Decode a Blockscout log item emitted by an Aave Pool
+
+    Uses Blockscout's decoded parameters when present, otherwise decodes
+    topics and data against POOL_EVENTS.
+
+    Returns:
+        (event name, {parameter: value}), or None for other Pool events
+    """
+    decoded = item.get("decoded")
+    if isinstance(decoded, dict) and decoded.get("method_call"):
+        name = decoded["method_call"].split("(")[0]
+        if name in EVENT_SPECS:
+            values = {p.get("name"): p.get("value") for p in decoded.get("parameters") or []}
+            try:
+                return name, {param: _convert(values[param], abi_type) for param, abi_type, _ in EVENT_SPECS[name]}
+            except (KeyError, ValueError, TypeError):
+                pass  # Unexpected decoding, fall back to the raw log
+
+    topics = [t for t in item.get("topics") or [] if t]
+    if not topics or topics[0].lower() not in POOL_EVENTS:
+        return None
+    name, params = POOL_EVENTS[topics[0].lower()]
+    data = (item.get("data") or "0x")[2:]
+    words = [data[i:i + 64] for i in range(0, len(data), 64)]
+    indexed_topics = iter(topics[1:])
+    data_words = iter(words)
+    try:
+        return name, {
+            param: _decode_word((next(indexed_topics) if indexed else next(data_words))[-64:], abi_type)
+            for param, abi_type, indexed in params
+        }
+    except (StopIteration, ValueError):
+        return None
+
+def event_user(name: str, args: Dict[str, Any]) -> Optional[str]:
+    """The position owner an event changes (None for reserve updates)"""
+    if name in ("Supply", "Borrow"):
+        return args["onBehalfOf"]
+    return args.get("user") if name != "ReserveDataUpdated" else None
+
+def affected_keys(name: str, args: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """(user, reserve) balances an event changes"""
+    if name == "ReserveDataUpdated":
+        return []
+    if name == "LiquidationCall":
+        keys = [(args["user"], args["debtAsset"]), (args["user"], args["collateralAsset"])]
+        if args["receiveAToken"]:
+            keys.append((args["liquidator"], args["collateralAsset"]))
+        return keys
+    return [(event_user(name, args), args["reserve"])]
+
+def encode_args(args: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-safe event arguments: integers as decimal strings so 256-bit values survive"""
+    return {k: str(v) if isinstance(v, int) and not isinstance(v, bool) else v for k, v in args.items()}
+
+def decode_args(name: str, stored: Dict[str, Any]) -> Dict[str, Any]:
+    """Inverse of encode_args"""
+    return {param: _convert(stored[param], abi_type) for param, abi_type, _ in EVENT_SPECS[name]}
+
+@dataclass
+class ReserveIndexes:
+    """Last ReserveDataUpdated values of a reserve (rates and indexes in ray)"""
+    liquidity_index: int = RAY
+    variable_borrow_index: int = RAY
+    liquidity_rate: int = 0
+    variable_borrow_rate: int = 0
+    stable_borrow_rate: int = 0
+    block_number: int = 0
+    timestamp: Optional[datetime] = None
+    known: bool = False  # False until a ReserveDataUpdated was seen; indexes default to 1.0
+
+@dataclass
+class UserReserve:
+    """Scaled balances of one user in one reserve"""
+    scaled_supply: int = 0
+    scaled_variable_debt: int = 0
+    stable_debt: int = 0  # Principal only; stable borrowing is disabled on current markets
+    last_block: int = 0
+
+@dataclass
+class PoolState:
+    """Reserve indexes and user balances of one chain's Pool, advanced one event at a time"""
+    reserves: Dict[str, ReserveIndexes] = field(default_factory=dict)
+    users: Dict[Tuple[str, str], UserReserve] = field(default_factory=dict)  # (user, reserve) -> balances
+    touched: set = field(default_factory=set)  # (user, reserve) keys changed since the last flush
+    touched_reserves: set = field(default_factory=set)
+
+    def reserve(self, reserve: str) -> ReserveIndexes:
+        return self.reserves.setdefault(reserve, ReserveIndexes())
+
+    def _user(self, user: str, reserve: str, block: int) -> UserReserve:
+        key = (user, reserve)
+        self.touched.add(key)
+        balances = self.users.setdefault(key, UserReserve())
+        balances.last_block = block
+        return balances
+
+    def _supply(self, user: str, reserve: str, amount: int, block: int):
+        balances = self._user(user, reserve, block)
+        balances.scaled_supply = max(0, balances.scaled_supply + ray_div(amount, self.reserve(reserve).liquidity_index))
+
+    def _withdraw(self, user: str, reserve: str, amount: int, block: int):
+        balances = self._user(user, reserve, block)
+        balances.scaled_supply = max(0, balances.scaled_supply - ray_div(amount, self.reserve(reserve).liquidity_index))
+
+    def _repay(self, user: str, reserve: str, amount: int, block: int):
+        balances = self._user(user, reserve, block)
+        scaled = ray_div(amount, self.reserve(reserve).variable_borrow_index)
+        if balances.stable_debt and scaled > balances.scaled_variable_debt:
+            # Event does not say which debt was repaid; variable first, the rest stable
+            remaining = amount - ray_mul(balances.scaled_variable_debt, self.reserve(reserve).variable_borrow_index)
+            balances.stable_debt = max(0, balances.stable_debt - remaining)
+        balances.scaled_variable_debt = max(0, balances.scaled_variable_debt - scaled)
+
+    def apply(self, name: str, args: Dict[str, Any], block: int, timestamp: Optional[datetime] = None):
+        """Apply one decoded Pool event"""
+        if name == "ReserveDataUpdated":
+            self.touched_reserves.add(args["reserve"])
+            self.reserves[args["reserve"]] = ReserveIndexes(
+                liquidity_index=args["liquidityIndex"],
+                variable_borrow_index=args["variableBorrowIndex"],
+                liquidity_rate=args["liquidityRate"],
+                variable_borrow_rate=args["variableBorrowRate"],
+                stable_borrow_rate=args["stableBorrowRate"],
+                block_number=block,
+                timestamp=timestamp,
+                known=True
+            )
+        elif name == "Supply":
+            self._supply(args["onBehalfOf"], args["reserve"], args["amount"], block)
+        elif name == "Withdraw":
+            self._withdraw(args["user"], args["reserve"], args["amount"], block)
+        elif name == "Borrow":
+            balances = self._user(args["onBehalfOf"], args["reserve"], block)
+            if args["interestRateMode"] == INTEREST_RATE_MODE_STABLE:
+                balances.stable_debt += args["amount"]
+            else:
+                balances.scaled_variable_debt += ray_div(args["amount"], self.reserve(args["reserve"]).variable_borrow_index)
+        elif name == "Repay":
+            self._repay(args["user"], args["reserve"], args["amount"], block)
+            if args["useATokens"]:
+                self._withdraw(args["user"], args["reserve"], args["amount"], block)
+        elif name == "LiquidationCall":
+            self._repay(args["user"], args["debtAsset"], args["debtToCover"], block)
+            # The protocol fee share of the seized collateral is not in the event;
+            # the next balance-based refresh reconciles that small difference
+            self._withdraw(args["user"], args["collateralAsset"], args["liquidatedCollateralAmount"], block)
+            if args["receiveAToken"]:
+                self._supply(args["liquidator"], args["collateralAsset"], args["liquidatedCollateralAmount"], block)
@@ -0,0 +1,318 @@
+"""
+Alert Engine
+Evaluates health factor updates against per-user thresholds and delivers alerts through pluggable sinks
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, asdict, field
+from typing import Any, Dict, List, Optional, Sequence
+import httpx
+
+@dataclass
+class Alert:
+    """A position crossing its owner's alert threshold, or recovering above it"""
+    position_id: str
+    user: str
+    kind: str  # "breach" or "recovery"
+    threshold: float
+    health_factor: float
+    token: Optional[str]  # Token whose price tick caused it, None for wallet refreshes
+    tick_at: float  # When the price tick (or refresh) that produced the health factor arrived
+    created_at: float = field(default_factory=time.time)
+
+    def to_dict(self):
+        return asdict(self)
+
+@dataclass
+class _PositionAlertState:
+    breached: bool = False
+    notified: bool = False  # Whether the current breach was sent (a recovery is only sent if so)
+    last_breach_sent: float = 0.0
+    onchain_at: float = 0.0  # When the Pool's own HF was last evaluated
+
+class AlertSink:
+    """Delivery target for batches of alerts; send raises on failure so the batch is retried"""
+    name = "sink"
+
+    async def send(self, alerts: List[Alert]):
+        raise NotImplementedError
+
+    async def aclose(self):
+        pass
+
+class LogSink(AlertSink):
+    """Prints alerts to the service log"""
+    name = "log"
+
+    async def send(self, alerts: List[Alert]):
+        for alert in alerts:
+            if alert.kind == "breach":
+                print(f"🚨 {alert.position_id}: health factor {alert.health_factor:.2f} "
+                      f"below alert threshold {alert.threshold}")
+            else:
+                print(f"✅ {alert.position_id}: health factor {alert.health_factor:.2f} "
+                      f"back above alert threshold {alert.threshold}")
+
+class MemorySink(AlertSink):
+    """Local stub sink keeping the most recent deliveries in memory, with optional simulated latency"""
+    name = "memory"
+
+    def __init__(self, max_alerts: int = 1000, latency: float = 0.0):
+        self.alerts = deque(maxlen=max_alerts)
+        self.latency = latency
+        self.batches = 0
+
+    async def send(self, alerts: List[Alert]):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.alerts.extend(alerts)
+        self.batches += 1
+
+class WebhookSink(AlertSink):
+    """POSTs each batch as {"alerts": [...]} to a webhook URL over a pooled HTTP client"""
+    name = "webhook"
+
+    def __init__(self, url: str, request_timeout: float = 10.0, headers: Optional[Dict[str, str]] = None):
+        self.url = url
+        self.request_timeout = request_timeout
+        self.headers = headers or {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared pooled HTTP client, recreated if the event loop changed"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=self.request_timeout,
+                limits=httpx.Limits(max_connections=5, max_keepalive_connections=5)
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def send(self, alerts: List[Alert]):
+        response = await self._get_client().post(
+            self.url, json={"alerts": [alert.to_dict() for alert in alerts]}, headers=self.headers
+        )
+        response.raise_for_status()
+
+    async def aclose(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+def _latency_summary(samples) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"mean_ms": None, "p50_ms": None, "p95_ms": None, "max_ms": None}
+    ordered = sorted(samples)
+    pick = lambda q: 1000 * ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "mean_ms": 1000 * sum(ordered) / len(ordered),
+        "p50_ms": pick(0.5),
+        "p95_ms": pick(0.95),
+        "max_ms": 1000 * ordered[-1],
+    }
+
+class AlertEngine:
+    """
+    Threshold alerting over health factor updates
+
+    A position breaches when its HF drops below its owner's threshold and
+    recovers only once HF is back above threshold × (1 + hysteresis), so a
+    position hovering at the threshold does not flap. A new breach of the
+    same position within dedup_window seconds of the last one sent is held
+    back; if the position is still below threshold at its first update after
+    the window, the breach is sent then. evaluate() is synchronous and
+    cheap, for use from price-tick listeners; alerts go into a bounded queue
+    (new alerts are dropped and counted when it is full) and a background
+    worker delivers them in batches of up to batch_size to every sink
+    concurrently, retrying a failing sink with exponential backoff. Latency
+    is measured from the update's tick_at to the end of delivery. On-chain
+    HFs (the Pool's own getUserAccountData) are authoritative: while a
+    position's last one is younger than onchain_ttl seconds, estimates from
+    refreshes and price ticks are ignored, so two disagreeing sources cannot
+    flap its state.
+    """
+
+    def __init__(self, sinks: Optional[Sequence[AlertSink]] = None, default_threshold: float = 1.2,
+                 hysteresis: float = 0.05, dedup_window: float = 15 * 60, queue_size: int = 1000,
+                 batch_size: int = 50, batch_window: float = 0.05, max_retries: int = 3,
+                 retry_backoff: float = 0.5, onchain_ttl: float = 90.0):
+        self.sinks: List[AlertSink] = list(sinks) if sinks is not None else [LogSink()]
+        self.default_threshold = default_threshold
+        self.hysteresis = hysteresis
+        self.dedup_window = dedup_window
+        self.onchain_ttl = onchain_ttl
+        self.batch_size = batch_size
+        self.batch_window = batch_window  # Seconds to wait for more alerts before sending a partial batch
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.thresholds: Dict[str, float] = {}  # user -> alert threshold
+        self._states: Dict[str, _PositionAlertState] = {}  # position id -> state
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._task: Optional[asyncio.Task] = None
+
+        # Stats
+        self.evaluated = 0
+        self.alerts = 0
+        self.suppressed = 0
+        self.deferred = 0  # Held-back breaches sent once the dedup window passed
+        self.estimates_ignored = 0  # Estimates overridden by a recent on-chain HF
+        self.dropped = 0
+        self.delivered = 0
+        self.batches = 0
+        self.sink_failures: Dict[str, int] = {}
+        self._latencies = deque(maxlen=1000)
+
+    @staticmethod
+    def _user(position_id: str) -> str:
+        return position_id.split(":", 1)[0].lower()
+
+    def set_threshold(self, user: str, threshold: float):
+        self.thresholds[user.lower()] = threshold
+
+    def forget_user(self, user: str):
+        """Drop a user's threshold and the alert state of their positions"""
+        user = user.lower()
+        self.thresholds.pop(user, None)
+        for position_id in [p for p in self._states if self._user(p) == user]:
+            del self._states[position_id]
+
+    def evaluate(self, position_id: str, health_factor: float, tick_at: Optional[float] = None,
+                 token: Optional[str] = None, onchain: bool = False) -> Optional[Alert]:
+        """
+        Check one position's new health factor; queues and returns the alert it raises, if any
+
+        Args:
+            position_id: "<wallet>:<chain_id>", as used by IncrementalHealthFactorEngine
+            health_factor: Current health factor
+            tick_at: When the price tick (or refresh) behind it arrived; defaults to now
+            token: Token whose price moved, if any
+            onchain: Whether health_factor was read from the Pool rather than estimated
+        """
+        self.evaluated += 1
+        position_id = position_id.lower()
+        user = self._user(position_id)
+        threshold = self.thresholds.get(user, self.default_threshold)
+        state = self._states.get(position_id)
+        if state is None:
+            state = self._states[position_id] = _PositionAlertState()
+        now = time.time()
+        if onchain:
+            state.onchain_at = now
+        elif now - state.onchain_at < self.onchain_ttl:
+            self.estimates_ignored += 1
+            return None
+
+        kind = None
+        if not state.breached and health_factor < threshold:
+            state.breached = True
+            if now - state.last_breach_sent < self.dedup_window:
+                state.notified = False
+                self.suppressed += 1
+            else:
+                kind = "breach"
+        elif (state.breached and not state.notified and health_factor < threshold
+              and now - state.last_breach_sent >= self.dedup_window):
+            # Held back by dedup and still breached: the last thing the owner heard may be a recovery
+            self.deferred += 1
+            kind = "breach"
+        elif state.breached and health_factor >= threshold * (1 + self.hysteresis):
+            state.breached = False
+            if state.notified:
+                kind = "recovery"
+            state.notified = False
+        if kind is None:
+            return None
+        if kind == "breach":
+            state.notified = True
+            state.last_breach_sent = now
+
+        alert = Alert(position_id, user, kind, threshold, health_factor, token, tick_at or now, now)
+        try:
+            self._queue.put_nowait(alert)
+            self.alerts += 1
+        except asyncio.QueueFull:
+            self.dropped += 1
+            print(f"⚠️ Alert queue full, dropped {kind} alert for {position_id}")
+        return alert
+
+    def on_health_update(self, update):
+        """IncrementalHealthFactorEngine update listener"""
+        self.evaluate(update.position_id, update.health_factor, update.tick_at, update.token)
+
+    def on_threshold_crossing(self, crossing):
+        """LiquidationPriceIndex listener: only ticks that move a position across a threshold are evaluated"""
+        self.evaluate(crossing.position_id, crossing.health_factor, crossing.tick_at, crossing.token)
+
+    async def _send(self, sink: AlertSink, batch: List[Alert]) -> bool:
+        for attempt in range(self.max_retries + 1):
+            try:
+                await sink.send(batch)
+                return True
+            except Exception as e:
+                self.sink_failures[sink.name] = self.sink_failures.get(sink.name, 0) + 1
+                if attempt == self.max_retries:
+                    print(f"❌ Alert sink {sink.name} failed {attempt + 1} times, giving up on {len(batch)} alert(s): {e}")
+                    return False
+                await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+
+    async def _deliver(self, batch: List[Alert]):
+        results = await asyncio.gather(*(self._send(sink, batch) for sink in self.sinks))
+        finished = time.time()
+        self.batches += 1
+        if any(results):
+            self.delivered += len(batch)
+            self._latencies.extend(finished - alert.tick_at for alert in batch)
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            if self._queue.qsize() < self.batch_size - 1:
+                await asyncio.sleep(self.batch_window)
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._deliver(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def start(self):
+        """Start the delivery worker on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+            print(f"🔔 Alert engine started ({', '.join(sink.name for sink in self.sinks)})")
+
+    async def stop(self, drain_timeout: float = 5.0):
+        """Deliver what is queued (up to drain_timeout seconds), then stop the worker and close sinks"""
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), drain_timeout)
+            except asyncio.TimeoutError:
+                print(f"⚠️ Alert engine stopped with {self._queue.qsize()} undelivered alert(s)")
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for sink in self.sinks:
+            await sink.aclose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "sinks": [sink.name for sink in self.sinks],
+            "evaluated": self.evaluated,
+            "alerts": self.alerts,
+            "suppressed": self.suppressed,
+            "deferred": self.deferred,
+            "estimates_ignored": self.estimates_ignored,
+            "dropped": self.dropped,
+            "delivered": self.delivered,
+            "batches": self.batches,
+            "queue_depth": self._queue.qsize(),
+            "breached_positions": sum(1 for state in self._states.values() if state.breached),
+            "sink_failures": dict(self.sink_failures),
+            "latency": _latency_summary(self._latencies),
+        }
@@ -0,0 +1,131 @@
+"""
+Batch Health Factor Engine
+Computes health factors for many positions in one vectorized NumPy pass
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Tuple
+import numpy as np
+
+@dataclass
+class PositionBatch:
+    """
+    Columnar representation of many positions
+
+    Each row is one supplied or borrowed asset of one position. Assets are
+    (chain_id, token) pairs so that chain-specific liquidation thresholds
+    can be used, while prices are looked up by token.
+    """
+    position_index: np.ndarray  # int64, row -> position
+    asset_index: np.ndarray     # int64, row -> asset
+    amounts: np.ndarray         # float64, row -> token amount
+    is_debt: np.ndarray         # bool, row -> borrowed (True) or supplied (False)
+    asset_prices: np.ndarray    # float64, asset -> USD price
+    asset_lts: np.ndarray       # float64, asset -> liquidation threshold
+    num_positions: int
+    assets: List[Tuple[Optional[str], str]] = field(default_factory=list)
+
+    @classmethod
+    def from_positions(cls, positions: List[Dict], prices: Dict[str, float], knowledge_graph) -> "PositionBatch":
+        """
+        Build a batch from position dicts as produced by the position parser
+
+        Args:
+            positions: [{"chain_id": "84532", "supplied_assets": [...], "borrowed_assets": [...]}]
+            prices: Dict of token prices {"WETH": 3000.0, "USDC": 1.0}
+            knowledge_graph: DeFiKnowledgeGraph used for liquidation thresholds
+        """
+        assets: Dict[Tuple[Optional[str], str], int] = {}
+        position_index, asset_index, amounts, is_debt = [], [], [], []
+
+        for p_idx, position in enumerate(positions):
+            chain_id = position.get("chain_id")
+            for key, debt in (("supplied_assets", False), ("borrowed_assets", True)):
+                for asset in position.get(key, []):
+                    asset_key = (chain_id, asset["token"])
+                    if asset_key not in assets:
+                        assets[asset_key] = len(assets)
+                    position_index.append(p_idx)
+                    asset_index.append(assets[asset_key])
+                    amounts.append(float(asset["amount"]))
+                    is_debt.append(debt)
+
+        asset_list = list(assets)
+        return cls(
+            position_index=np.asarray(position_index, dtype=np.int64),
+            asset_index=np.asarray(asset_index, dtype=np.int64),
+            amounts=np.asarray(amounts, dtype=np.float64),
+            is_debt=np.asarray(is_debt, dtype=bool),
+            asset_prices=np.asarray([prices.get(token, 0.0) for _, token in asset_list], dtype=np.float64),
+            asset_lts=np.asarray(
+                [float(knowledge_graph.get_liquidation_threshold(token, chain_id)) for chain_id, token in asset_list],
+                dtype=np.float64
+            ),
+            num_positions=len(positions),
+            assets=asset_list,
+        )
+
+    def update_prices(self, prices: Dict[str, float]):
+        """Refresh asset prices in place, keeping the current price for tokens not in prices"""
+        for a_idx, (_, token) in enumerate(self.assets):
+            if token in prices:
+                self.asset_prices[a_idx] = prices[token]
+
+@dataclass
+class BatchHealthFactorResult:
+    """Per-position results of a batch computation, aligned with the batch's positions"""
+    health_factors: np.ndarray
+    collateral_usd: np.ndarray
+    weighted_collateral_usd: np.ndarray  # Σ(Si × Pi × LTi), the HF numerator
+    debt_usd: np.ndarray
+
+def calculate_health_factors(
+    position_index: np.ndarray,
+    asset_index: np.ndarray,
+    amounts: np.ndarray,
+    is_debt: np.ndarray,
+    asset_prices: np.ndarray,
+    asset_lts: np.ndarray,
+    num_positions: int,
+) -> BatchHealthFactorResult:
+    """
+    Vectorized Aave health factor over columnar position data
+
+    HF = (Σ(Si × Pi × LTi)) / (Σ(Bj × Pj)), infinite when a position has no debt.
+
+    Per-position sums are accumulated in row order, so results are bit-identical
+    to HealthFactorCalculator.calculate_health_factor when rows keep each
+    position's asset order.
+    """
+    values = amounts * asset_prices[asset_index]
+    supplied = ~is_debt
+
+    collateral = np.bincount(position_index[supplied], weights=values[supplied], minlength=num_positions)
+    weighted = np.bincount(
+        position_index[supplied],
+        weights=values[supplied] * asset_lts[asset_index[supplied]],
+        minlength=num_positions
+    )
+    debt = np.bincount(position_index[is_debt], weights=values[is_debt], minlength=num_positions)
+
+    health_factors = np.full(num_positions, np.inf)
+    np.divide(weighted, debt, out=health_factors, where=debt != 0)
+
+    return BatchHealthFactorResult(
+        health_factors=health_factors,
+        collateral_usd=collateral,
+        weighted_collateral_usd=weighted,
+        debt_usd=debt,
+    )
+
+def calculate_batch(batch: PositionBatch) -> BatchHealthFactorResult:
+    """Calculate health factors for every position in a PositionBatch"""
+    return calculate_health_factors(
+        batch.position_index,
+        batch.asset_index,
+        batch.amounts,
+        batch.is_debt,
+        batch.asset_prices,
+        batch.asset_lts,
+        batch.num_positions,
+    )
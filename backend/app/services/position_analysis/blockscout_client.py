@@ -79,23 +79,45 @@ class BlockscoutMCPClient:
         })
     
     async def get_transactions_by_address(self, address: str, chain_id: str = "1", 
-                                        age_from: Optional[str] = None) -> Dict[str, Any]:
-        """Get transactions for an address"""
+                                        age_from: Optional[str] = None,
+                                        cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Get transactions for an address, newest first; pass the cursor from pagination.next_call for the next page"""
         params = {
             "address": address,
             "chain_id": chain_id
         }
         if age_from:
             params["age_from"] = age_from
+        if cursor:
+            params["cursor"] = cursor
             
         return await self.call_tool("get_transactions_by_address", params)
     
+    async def get_address_logs(self, address: str, chain_id: str = "1",
+                               cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Get event logs emitted by a contract, newest first; pass the cursor from pagination.next_call for the next page"""
+        params = {
+            "address": address,
+            "chain_id": chain_id
+        }
+        if cursor:
+            params["cursor"] = cursor
+            
+        return await self.call_tool("get_address_logs", params)
+    
     async def get_latest_block(self, chain_id: str = "1") -> Dict[str, Any]:
         """Get latest block information"""
         return await self.call_tool("get_latest_block", {
             "chain_id": chain_id
         })
     
+    async def get_block_info(self, block_number: int, chain_id: str = "1") -> Dict[str, Any]:
+        """Get block information, including its timestamp"""
+        return await self.call_tool("get_block_info", {
+            "chain_id": chain_id,
+            "number_or_hash": str(block_number)
+        })
+    
     async def get_chains_list(self) -> Dict[str, Any]:
         """Get list of supported chains"""
         return await self.call_tool("get_chains_list", {})
@@ -0,0 +1,157 @@
+"""
+CoinGecko ID Resolution Cache
+Persists symbol / contract address -> CoinGecko id resolutions so /search runs at most once per token
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+
+# Bundled registry of known ids, loaded before the local cache file
+BUNDLED_REGISTRY_PATH = os.path.join(os.path.dirname(__file__), "data", "coingecko_ids.json")
+
+# Sentinel distinguishing "known to have no id" from "never resolved"
+NOT_FOUND = ""
+
+class CoinGeckoIdCache:
+    """
+    Local store of CoinGecko id resolutions
+
+    Entries are keyed by symbol or by (chain_id, contract address). Positive
+    results are kept indefinitely; negative results (the search found
+    nothing) expire after negative_ttl so new listings are picked up.
+
+    Inside an event loop, stores are batched into one write per save_delay
+    seconds, done in the default executor. Each write merges with the file
+    as other processes left it and replaces it through a uniquely named
+    temporary file, so sharded workers sharing the path don't clobber each
+    other. Call flush() on shutdown to write what is still pending.
+    """
+
+    def __init__(self, path: Optional[str] = None, negative_ttl: float = 24 * 3600,
+                 registry_path: Optional[str] = BUNDLED_REGISTRY_PATH, save_delay: float = 5.0):
+        self.path = path or os.getenv("COINGECKO_ID_CACHE_PATH", os.path.join(".cache", "coingecko_ids.json"))
+        self.negative_ttl = negative_ttl
+        self.save_delay = save_delay
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._save_handle: Optional[asyncio.TimerHandle] = None
+        self._write_lock = threading.Lock()
+
+        if registry_path:
+            self._load_registry(registry_path)
+        self._load()
+
+    @staticmethod
+    def _key(symbol: Optional[str] = None, chain_id: Optional[str] = None, address: Optional[str] = None) -> str:
+        if address:
+            return f"address:{chain_id}:{address.lower()}"
+        return f"symbol:{symbol.strip().upper()}"
+
+    def lookup(self, symbol: Optional[str] = None, chain_id: Optional[str] = None,
+               address: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+        """
+        Look up a cached resolution
+
+        Returns:
+            (hit, coingecko_id): hit is False when the token must be resolved
+            upstream; coingecko_id is None for a cached negative result
+        """
+        entry = self._entries.get(self._key(symbol, chain_id, address))
+        if entry is None:
+            return False, None
+        if entry["id"] == NOT_FOUND:
+            if time.time() - entry["resolved_at"] > self.negative_ttl:
+                return False, None
+            return True, None
+        return True, entry["id"]
+
+    def store(self, coingecko_id: Optional[str], symbol: Optional[str] = None,
+              chain_id: Optional[str] = None, address: Optional[str] = None):
+        """Record a resolution; None records a negative result"""
+        self._entries[self._key(symbol, chain_id, address)] = {
+            "id": coingecko_id or NOT_FOUND,
+            "resolved_at": time.time(),
+        }
+        self._dirty = True
+        self._schedule_save()
+
+    def _load_registry(self, registry_path: str):
+        try:
+            with open(registry_path, encoding="utf-8") as f:
+                registry = json.load(f)
+        except FileNotFoundError:
+            return
+        for symbol, coingecko_id in registry.get("symbols", {}).items():
+            self._entries[self._key(symbol)] = {"id": coingecko_id, "resolved_at": 0.0}
+        for chain_id, addresses in registry.get("addresses", {}).items():
+            for address, coingecko_id in addresses.items():
+                self._entries[self._key(chain_id=chain_id, address=address)] = {"id": coingecko_id, "resolved_at": 0.0}
+
+    @staticmethod
+    def _read(path: str) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _load(self):
+        try:
+            self._entries.update(self._read(self.path))
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable CoinGecko id cache {self.path}: {e}")
+
+    def _schedule_save(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()  # No event loop (scripts): write through
+            return
+        if self._save_handle is None:
+            self._save_handle = loop.call_later(self.save_delay, self._save_in_background, loop)
+
+    def _save_in_background(self, loop: asyncio.AbstractEventLoop):
+        self._save_handle = None
+        if self._dirty:
+            self._dirty = False
+            loop.run_in_executor(None, self._save, dict(self._entries))
+
+    def flush(self):
+        """Write pending resolutions now, on the calling thread"""
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        if self._dirty:
+            self._dirty = False
+            self._save(dict(self._entries))
+
+    def _save(self, entries: Dict[str, Dict[str, Any]]):
+        """Merge entries into the file (newest resolution wins) and replace it atomically"""
+        tmp_path = None
+        with self._write_lock:
+            try:
+                directory = os.path.dirname(self.path) or "."
+                os.makedirs(directory, exist_ok=True)
+                try:
+                    merged = self._read(self.path)
+                except ValueError:
+                    merged = {}  # Unreadable, rewritten from memory
+                for key, entry in entries.items():
+                    current = merged.get(key)
+                    if current is None or entry["resolved_at"] >= current.get("resolved_at", 0.0):
+                        merged[key] = entry
+                with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=directory,
+                                                 prefix=f"{os.path.basename(self.path)}.", suffix=".tmp",
+                                                 delete=False) as f:
+                    tmp_path = f.name
+                    json.dump(merged, f)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"⚠️ Could not persist CoinGecko id cache: {e}")
+                if tmp_path and os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
@@ -3,36 +3,111 @@ DeFi Knowledge Graph for Aave Risk Management
 Based on MeTTa (Meta Type Talk) from SingularityNET
 """
 
-from hyperon import MeTTa, E, S, ValueAtom
-from typing import Dict, List, Any
+import os
+import time
+from typing import Dict, List, Any, Optional, Tuple
+from .reserve_parameters import ReserveParameters, load_reserve_parameters
+from .knowledge_snapshot import load_knowledge_snapshot
+from .token_registry import aave_underlying, normalize_symbol
+
+# chain_id of snapshot rows that apply on every chain without a row of its own
+ANY_CHAIN = "*"
+
+# Built-in mainnet parameters used when no reserve snapshot covers an asset
+DEFAULT_COLLATERAL_FACTORS = {
+    "ETH": 0.825,
+    "USDC": 0.85,
+    "USDT": 0.85,
+    "DAI": 0.75,
+    "WBTC": 0.7,
+    "LINK": 0.65,
+    "UNI": 0.6,
+}
+
+DEFAULT_LIQUIDATION_THRESHOLDS = {
+    "ETH": 0.8,
+    "USDC": 0.82,
+    "USDT": 0.82,
+    "DAI": 0.72,
+    "WBTC": 0.65,
+    "LINK": 0.6,
+    "UNI": 0.55,
+}
 
 class DeFiKnowledgeGraph:
     """DeFi knowledge graph using MeTTa for risk management and action planning"""
     
-    def __init__(self):
-        self.metta = MeTTa()
-        self.initialize_defi_knowledge()
+    def __init__(self, reserve_params_path: Optional[str] = None, reload_check_interval: float = 30.0,
+                 snapshot_path: Optional[str] = None):
+        # Built lazily: importing hyperon and populating the space is the slow part of startup
+        self._metta = None
+        
+        # Fast lookup tables mirroring the MeTTa space
+        self.collateral_factors: Dict[str, float] = {}
+        self.liquidation_thresholds: Dict[str, float] = {}
+        self.reserves: Dict[Tuple[str, str], ReserveParameters] = {}  # (chain_id, base token) -> parameters
+        
+        # Hot reload state for the reserve snapshot
+        self.reserve_params_path = reserve_params_path or os.getenv("RESERVE_PARAMS_PATH")
+        self.reload_check_interval = reload_check_interval
+        self._reserve_atoms: List[Any] = []
+        self._reserve_mtime: Optional[float] = None
+        self._last_reload_check = 0.0
+        
+        # Fast path: restore the lookup tables from a prebuilt knowledge snapshot
+        snapshot_path = snapshot_path or os.getenv("KNOWLEDGE_SNAPSHOT_PATH")
+        state = load_knowledge_snapshot(snapshot_path, self.reserve_params_path) if snapshot_path else None
+        if state is not None:
+            self.restore_state(state)
+            return
+        
+        # Slow path: accessing the property builds the MeTTa space now
+        self.metta
+        if self.reserve_params_path:
+            self.load_reserve_parameters(self.reserve_params_path)
+    
+    @property
+    def metta(self):
+        """MeTTa interpreter, built on first access when the tables came from a snapshot"""
+        if self._metta is None:
+            from hyperon import MeTTa
+            self._metta = MeTTa()
+            self.initialize_defi_knowledge()
+            if self.reserves:
+                self._reserve_atoms = self._build_reserve_atoms(list(self.reserves.values()))
+                for atom in self._reserve_atoms:
+                    self._metta.space().add_atom(atom)
+        return self._metta
+    
+    def export_state(self) -> Dict[str, Any]:
+        """Export the lookup tables for a knowledge snapshot"""
+        return {
+            "collateral_factors": dict(self.collateral_factors),
+            "liquidation_thresholds": dict(self.liquidation_thresholds),
+            "reserves": [reserve.to_dict() for reserve in self.reserves.values()],
+            "reserve_mtime": self._reserve_mtime,
+        }
+    
+    def restore_state(self, state: Dict[str, Any]):
+        """Restore the lookup tables from a knowledge snapshot without building the MeTTa space"""
+        self.collateral_factors = dict(state["collateral_factors"])
+        self.liquidation_thresholds = dict(state["liquidation_thresholds"])
+        self.bulk_insert_reserves([ReserveParameters(**reserve) for reserve in state["reserves"]])
+        self._reserve_mtime = state.get("reserve_mtime")
     
     def initialize_defi_knowledge(self):
         """Initialize the DeFi knowledge graph with Aave-specific data"""
+        from hyperon import E, S, ValueAtom
         
         # Asset → Collateral Factor mappings
-        self.metta.space().add_atom(E(S("collateral_factor"), S("ETH"), ValueAtom("0.825")))
-        self.metta.space().add_atom(E(S("collateral_factor"), S("USDC"), ValueAtom("0.85")))
-        self.metta.space().add_atom(E(S("collateral_factor"), S("USDT"), ValueAtom("0.85")))
-        self.metta.space().add_atom(E(S("collateral_factor"), S("DAI"), ValueAtom("0.75")))
-        self.metta.space().add_atom(E(S("collateral_factor"), S("WBTC"), ValueAtom("0.7")))
-        self.metta.space().add_atom(E(S("collateral_factor"), S("LINK"), ValueAtom("0.65")))
-        self.metta.space().add_atom(E(S("collateral_factor"), S("UNI"), ValueAtom("0.6")))
+        for asset, factor in DEFAULT_COLLATERAL_FACTORS.items():
+            self.metta.space().add_atom(E(S("collateral_factor"), S(asset), ValueAtom(str(factor))))
+            self.collateral_factors[asset] = factor
         
         # Asset → Liquidation Threshold mappings
-        self.metta.space().add_atom(E(S("liquidation_threshold"), S("ETH"), ValueAtom("0.8")))
-        self.metta.space().add_atom(E(S("liquidation_threshold"), S("USDC"), ValueAtom("0.82")))
-        self.metta.space().add_atom(E(S("liquidation_threshold"), S("USDT"), ValueAtom("0.82")))
-        self.metta.space().add_atom(E(S("liquidation_threshold"), S("DAI"), ValueAtom("0.72")))
-        self.metta.space().add_atom(E(S("liquidation_threshold"), S("WBTC"), ValueAtom("0.65")))
-        self.metta.space().add_atom(E(S("liquidation_threshold"), S("LINK"), ValueAtom("0.6")))
-        self.metta.space().add_atom(E(S("liquidation_threshold"), S("UNI"), ValueAtom("0.55")))
+        for asset, threshold in DEFAULT_LIQUIDATION_THRESHOLDS.items():
+            self.metta.space().add_atom(E(S("liquidation_threshold"), S(asset), ValueAtom(str(threshold))))
+            self.liquidation_thresholds[asset] = threshold
         
         # Risk Levels → Action Plans
         self.metta.space().add_atom(E(S("risk_level"), S("low"), ValueAtom("Monitor position, consider adding collateral")))
@@ -59,77 +134,125 @@ class DeFiKnowledgeGraph:
         self.metta.space().add_atom(E(S("health_factor_range"), S("1.1-1.5"), S("high")))
         self.metta.space().add_atom(E(S("health_factor_range"), S("<1.1"), S("critical")))
     
-    def get_collateral_factor(self, asset: str) -> float:
-        """Get collateral factor for an asset"""
-        # Normalize asset symbol (remove 'a' prefix, extract base token)
-        base_token = self._extract_base_token(asset)
+    def load_reserve_parameters(self, path: str) -> int:
+        """
+        Bulk-load per-chain reserve parameters from a JSON/CSV snapshot
         
-        query = f'!(match &self (collateral_factor {base_token} $factor) $factor)'
-        results = self.metta.run(query)
+        Atoms from a previous load of the snapshot are replaced, so this is
+        also the hot-reload path.
+        
+        Returns:
+            Number of reserves loaded
+        """
+        reserves = load_reserve_parameters(path)
+        self.bulk_insert_reserves(reserves)
+        self.reserve_params_path = path
+        self._reserve_mtime = os.path.getmtime(path)
+        print(f"📚 Loaded {len(reserves)} reserve parameters from {path}")
+        return len(reserves)
+    
+    def _build_reserve_atoms(self, reserves: List[ReserveParameters]) -> List[Any]:
+        """Build the MeTTa atoms describing a batch of reserves"""
+        from hyperon import E, S, ValueAtom
+        
+        atoms = []
+        for reserve in reserves:
+            chain, symbol = S(reserve.chain_id), S(reserve.symbol)
+            atoms.append(E(S("reserve_ltv"), chain, symbol, ValueAtom(str(reserve.ltv))))
+            atoms.append(E(S("reserve_liquidation_threshold"), chain, symbol, ValueAtom(str(reserve.liquidation_threshold))))
+            atoms.append(E(S("reserve_liquidation_bonus"), chain, symbol, ValueAtom(str(reserve.liquidation_bonus))))
+            atoms.append(E(S("reserve_emode_category"), chain, symbol, ValueAtom(str(reserve.emode_category))))
+            atoms.append(E(S("reserve_supply_cap"), chain, symbol, ValueAtom(str(reserve.supply_cap))))
+            atoms.append(E(S("reserve_borrow_cap"), chain, symbol, ValueAtom(str(reserve.borrow_cap))))
+        return atoms
+    
+    def bulk_insert_reserves(self, reserves: List[ReserveParameters]):
+        """Replace previously loaded reserves with a new batch in the MeTTa space and lookup tables"""
+        # Build the new table first so lookups never observe a half-loaded snapshot
+        table = {(reserve.chain_id, self._extract_base_token(reserve.symbol)): reserve for reserve in reserves}
+        
+        # Without a built space the atoms are added when the space is first used
+        if self._metta is not None:
+            atoms = self._build_reserve_atoms(reserves)
+            space = self._metta.space()
+            for atom in self._reserve_atoms:
+                space.remove_atom(atom)
+            for atom in atoms:
+                space.add_atom(atom)
+            self._reserve_atoms = atoms
         
-        if results and len(results) > 0 and len(results[0]) > 0:
-            value = results[0][0]
-            # Handle MeTTa atoms
-            if hasattr(value, 'value'):
-                return float(value.value)
-            elif hasattr(value, 'get'):
-                return float(value.get())
-            else:
-                # Remove quotes if present
-                str_value = str(value).strip('"')
-                return float(str_value)
-        return 0.825  # Default collateral factor
+        self.reserves = table
+    
+    def reload_if_changed(self) -> bool:
+        """Reload the reserve snapshot if its file changed on disk"""
+        if not self.reserve_params_path:
+            return False
+        try:
+            mtime = os.path.getmtime(self.reserve_params_path)
+        except OSError:
+            return False
+        if mtime == self._reserve_mtime:
+            return False
+        try:
+            self.load_reserve_parameters(self.reserve_params_path)
+            return True
+        except Exception as e:
+            print(f"⚠️ Failed to reload reserve parameters: {e}")
+            self._reserve_mtime = mtime  # Don't retry a broken file until it changes again
+            return False
+    
+    def _maybe_reload(self):
+        """Check the reserve snapshot for changes at most once per reload_check_interval"""
+        now = time.monotonic()
+        if now - self._last_reload_check >= self.reload_check_interval:
+            self._last_reload_check = now
+            self.reload_if_changed()
+    
+    def get_reserve(self, asset: str, chain_id: Optional[str] = None) -> Optional[ReserveParameters]:
+        """
+        Get loaded reserve parameters for an asset on a chain
+
+        Falls back only to rows loaded with chain_id "*", never to another
+        chain's parameters; None means the built-in defaults apply.
+        """
+        self._maybe_reload()
+        base_token = self._extract_base_token(asset)
+        if chain_id is not None:
+            reserve = self.reserves.get((str(chain_id), base_token))
+            if reserve:
+                return reserve
+        return self.reserves.get((ANY_CHAIN, base_token))
+    
+    def get_collateral_factor(self, asset: str, chain_id: Optional[str] = None) -> float:
+        """Get collateral factor (LTV) for an asset"""
+        reserve = self.get_reserve(asset, chain_id)
+        if reserve:
+            return reserve.ltv
+        
+        # Normalize asset symbol (remove 'a' prefix, extract base token)
+        base_token = self._extract_base_token(asset)
+        return self.collateral_factors.get(base_token, 0.825)  # Default collateral factor
     
     def _extract_base_token(self, token_symbol: str) -> str:
-        """Extract base token from Aave token symbol"""
-        # Examples: aEthWETH -> WETH, variableDebtEthUSDC -> USDC
-        symbol = token_symbol.upper()
-        
-        # Remove Aave prefixes
-        if symbol.startswith("A"):
-            # Remove 'a' prefix
-            symbol = symbol[1:]
-            # Remove chain identifiers
-            if symbol.startswith("ETH"):
-                symbol = symbol[3:]
-            elif symbol.startswith("BASSEP"):
-                symbol = symbol[6:]
-            elif symbol.startswith("POL"):
-                symbol = symbol[3:]
-            elif symbol.startswith("ARB"):
-                symbol = symbol[3:]
-            elif symbol.startswith("OP"):
-                symbol = symbol[2:]
-        
-        # Handle debt tokens
-        if "DEBT" in symbol:
-            # Extract token after debt
-            parts = symbol.split("DEBT")
-            if len(parts) > 1:
-                symbol = parts[-1]
-        
-        return symbol
-    
-    def get_liquidation_threshold(self, asset: str) -> float:
+        """
+        Extract base token from Aave token symbol
+
+        Examples: aEthWETH -> WETH, variableDebtEthUSDC -> USDC; plain
+        symbols (including AAVE, ARB) are only uppercased. Reserve rows are
+        keyed the same way, so lookups and loads always agree.
+        """
+        underlying = aave_underlying(token_symbol)
+        return normalize_symbol(underlying[0] if underlying else token_symbol)
+    
+    def get_liquidation_threshold(self, asset: str, chain_id: Optional[str] = None) -> float:
         """Get liquidation threshold for an asset"""
+        reserve = self.get_reserve(asset, chain_id)
+        if reserve:
+            return reserve.liquidation_threshold
+        
         # Normalize asset symbol (remove 'a' prefix, extract base token)
         base_token = self._extract_base_token(asset)
-        
-        query = f'!(match &self (liquidation_threshold {base_token} $threshold) $threshold)'
-        results = self.metta.run(query)
-        
-        if results and len(results) > 0 and len(results[0]) > 0:
-            value = results[0][0]
-            # Handle MeTTa atoms
-            if hasattr(value, 'value'):
-                return float(value.value)
-            elif hasattr(value, 'get'):
-                return float(value.get())
-            else:
-                # Remove quotes if present
-                str_value = str(value).strip('"')
-                return float(str_value)
-        return 0.80  # Default liquidation threshold
+        return self.liquidation_thresholds.get(base_token, 0.80)  # Default liquidation threshold
     
     def get_risk_level(self, health_factor: float) -> str:
         """Determine risk level based on health factor"""
@@ -14,6 +14,7 @@ from langchain.agents import create_agent
 from uagents_adapter import LangchainRegisterTool, cleanup_uagent
 from uagents_adapter.langchain import AgentManager
 
+from alert_engine import AlertEngine, LogSink
 from blockscout_client import BlockscoutMCPClient
 from multi_chain_monitor import MultiChainPositionMonitor
 from position_monitor import PositionMonitorService
@@ -53,7 +54,10 @@ async def setup_defi_risk_agent():
         
         # Initialize our custom components
         blockscout_client = BlockscoutMCPClient(mcp_client)
-        monitor_service = PositionMonitorService(blockscout_client)
+        # Runs in this agent's process, separate from the API's monitoring service;
+        # alerts go to this agent's log
+        monitor_service = PositionMonitorService(blockscout_client, alert_engine=AlertEngine([LogSink()]))
+        monitor_service.start()
         
         # Create custom tools for DeFi analysis
         from langchain_core.tools import tool
@@ -190,7 +194,7 @@ Address: {address}
 Chains: Sepolia, Base Sepolia, Mumbai, Arbitrum Sepolia, Optimism Sepolia
 Alert Threshold: {alert_threshold}
 
-Monitoring will check positions every 5 minutes and alert you if health factor drops below {alert_threshold}.
+The agent refreshes these positions about every {monitor_service.interval / 60:g} minutes, more often as the health factor falls, and logs an alert on its server when the health factor drops below {alert_threshold}. Alerts are not sent to this chat, so ask again for the current health factor.
 """
             except Exception as e:
                 return f"Error starting monitoring: {str(e)}"
@@ -3,9 +3,10 @@ Health Factor Calculator
 Calculates health factor using the correct Aave formula
 """
 
-from typing import List, Dict
+from typing import List, Dict, Optional
 from .price_fetcher import price_fetcher
 from .defi_knowledge import DeFiKnowledgeGraph
+from .batch_health_factor import PositionBatch, BatchHealthFactorResult, calculate_batch
 
 class HealthFactorCalculator:
     """Calculates health factor using Aave formula"""
@@ -13,7 +14,8 @@ class HealthFactorCalculator:
     def __init__(self):
         self.knowledge_graph = DeFiKnowledgeGraph()
     
-    def calculate_health_factor(self, supplied_assets: List[Dict], borrowed_assets: List[Dict], prices: Dict[str, float]) -> float:
+    def calculate_health_factor(self, supplied_assets: List[Dict], borrowed_assets: List[Dict], prices: Dict[str, float],
+                                chain_id: Optional[str] = None) -> float:
         """
         Calculate health factor using Aave formula:
         
@@ -30,6 +32,7 @@ class HealthFactorCalculator:
             supplied_assets: List of supplied assets [{"token": "WETH", "amount": 50}]
             borrowed_assets: List of borrowed assets [{"token": "USDC", "amount": 110}]
             prices: Dict of token prices {"WETH": 3000.0, "USDC": 1.0}
+            chain_id: Chain of the position, used to pick chain-specific reserve parameters
         
         Returns:
             Health factor (float)
@@ -46,7 +49,7 @@ class HealthFactorCalculator:
             price = prices.get(token, 0.0)
             
             # Get liquidation threshold from knowledge graph
-            lt = self.knowledge_graph.get_liquidation_threshold(token)
+            lt = self.knowledge_graph.get_liquidation_threshold(token, chain_id)
             
             # Handle MeTTa atoms
             if hasattr(lt, 'value'):
@@ -82,8 +85,31 @@ class HealthFactorCalculator:
         
         return health_factor
     
-    async def get_prices_for_assets(self, positions: List[Dict]) -> Dict[str, float]:
-        """Get prices for all unique tokens in positions"""
+    def calculate_health_factors_batch(self, positions: List[Dict], prices: Dict[str, float]) -> BatchHealthFactorResult:
+        """
+        Calculate health factors for many positions in one vectorized pass
+        
+        Produces the same values as calling calculate_health_factor for each
+        position (with its chain_id), without per-asset logging.
+        
+        Args:
+            positions: List of positions with chain_id, supplied_assets and borrowed_assets
+            prices: Dict of token prices {"WETH": 3000.0, "USDC": 1.0}
+        
+        Returns:
+            BatchHealthFactorResult with arrays aligned to positions
+        """
+        batch = PositionBatch.from_positions(positions, prices, self.knowledge_graph)
+        return calculate_batch(batch)
+    
+    async def get_prices_for_assets(self, positions: List[Dict],
+                                    chain_tokens: Optional[List[Dict]] = None) -> Dict[str, float]:
+        """
+        Get prices for all unique tokens in positions
+
+        When the Blockscout balances behind the positions are given, tokens
+        are priced by contract address first and only the rest by symbol.
+        """
         all_tokens = set()
         
         for position in positions:
@@ -92,33 +118,20 @@ class HealthFactorCalculator:
             for asset in position.get("borrowed_assets", []):
                 all_tokens.add(asset["token"])
         
-        # Fetch prices
-        prices = await price_fetcher.get_prices_batch(list(all_tokens))
-        
-        # Use fallback prices for tokens not found
-        fallback_prices = {
-            "ETH": 3000.0,
-            "WETH": 3000.0,
-            "USDC": 1.0,
-            "USDT": 1.0,
-            "DAI": 1.0,
-            "WBTC": 45000.0,
-            "LINK": 15.0,
-            "UNI": 7.0,
-            "AAVE": 100.0,
-            "CBETH": 3000.0,  # Coinbase staked ETH
-            "STETH": 3000.0,  # Lido staked ETH
-            "RETH": 3000.0,   # Rocket Pool ETH
-            "WSTETH": 3000.0  # Wrapped stETH
-        }
+        prices = {}
+        if chain_tokens:
+            by_address = await price_fetcher.get_prices_for_balances(chain_tokens)
+            prices = {token: by_address[token] for token in all_tokens if token in by_address}
+        
+        # Fetch prices through the shared oracle (hedged, as HF feeds liquidation warnings),
+        # falling back to registry prices
+        remaining = all_tokens - set(prices)
+        quotes = await price_fetcher.get_quotes(remaining, allow_fallback=True, critical=True)
+        prices.update({token: quote.price for token, quote in quotes.items()})
         
         for token in all_tokens:
             if token not in prices:
-                if token in fallback_prices:
-                    prices[token] = fallback_prices[token]
-                    print(f"  ⚠️ Using fallback price for {token}: ${fallback_prices[token]:.2f}")
-                else:
-                    prices[token] = 0.0
-                    print(f"  ⚠️ No price found for {token}, using $0.00")
+                prices[token] = 0.0
+                print(f"  ⚠️ No price found for {token}, using $0.00")
         
         return prices
@@ -0,0 +1,245 @@
+"""
+Incremental Health Factor Engine
+Keeps cached positions' health factors current on price ticks with O(affected) delta updates
+"""
+
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Callable, Dict, List, Any, Optional, Set
+from .defi_knowledge import DeFiKnowledgeGraph
+from .liquidation_price_index import LiquidationPriceIndex
+
+@dataclass
+class RiskTransition:
+    """Emitted when a position's risk level changes"""
+    position_id: str
+    previous_risk_level: str
+    risk_level: str
+    previous_health_factor: float
+    health_factor: float
+    token: Optional[str]  # Token whose price update caused the change, None for position updates
+    timestamp: float
+
+    def to_dict(self):
+        return asdict(self)
+
+@dataclass
+class HealthFactorUpdate:
+    """Emitted for every position whose health factor a price tick changed"""
+    position_id: str
+    health_factor: float
+    token: str
+    tick_at: float  # When the price tick arrived, for tick-to-alert latency
+
+@dataclass
+class TrackedPosition:
+    """Per-asset contributions of a cached position"""
+    position_id: str
+    chain_id: Optional[str]
+    collateral_weights: Dict[str, float] = field(default_factory=dict)  # token -> Σ amount × LT
+    collateral_amounts: Dict[str, float] = field(default_factory=dict)  # token -> Σ amount supplied
+    debt_amounts: Dict[str, float] = field(default_factory=dict)        # token -> Σ amount borrowed
+    weighted_collateral_usd: float = 0.0
+    collateral_usd: float = 0.0
+    debt_usd: float = 0.0
+    health_factor: float = float('inf')
+    risk_level: str = "low"
+    updates_since_resync: int = 0
+
+    @property
+    def tokens(self) -> Set[str]:
+        return set(self.collateral_amounts) | set(self.debt_amounts)
+
+class IncrementalHealthFactorEngine:
+    """
+    In-memory health factor engine driven by price ticks
+
+    Maintains an inverted index token -> positions holding it, so a price
+    update only touches the positions exposed to that token. Totals are
+    updated by deltas and periodically recomputed from scratch to bound
+    floating-point drift. Wire it to live prices with
+    price_fetcher.subscribe(engine.on_price_update).
+    """
+
+    def __init__(self, knowledge_graph: Optional[DeFiKnowledgeGraph] = None, resync_every: int = 1000,
+                 liquidation_index: Optional[LiquidationPriceIndex] = None):
+        self.knowledge_graph = knowledge_graph or DeFiKnowledgeGraph()
+        self.resync_every = resync_every
+        self.liquidation_index = liquidation_index
+        self.positions: Dict[str, TrackedPosition] = {}
+        self.token_index: Dict[str, Set[str]] = {}
+        self.prices: Dict[str, float] = {}
+        self._listeners: List[Callable[[RiskTransition], None]] = []
+        self._update_listeners: List[Callable[[HealthFactorUpdate], None]] = []
+
+    def subscribe(self, listener: Callable[[RiskTransition], None]):
+        """Register a callback for risk level transitions"""
+        self._listeners.append(listener)
+
+    def subscribe_updates(self, listener: Callable[[HealthFactorUpdate], None]):
+        """Register a callback for every price-driven health factor change, e.g. AlertEngine.on_health_update"""
+        self._update_listeners.append(listener)
+
+    def upsert_position(self, position_id: str, position: Dict, prices: Optional[Dict[str, float]] = None) -> TrackedPosition:
+        """
+        Add or replace a cached position
+
+        Args:
+            position_id: Stable identifier, e.g. "<wallet>:<chain_id>"
+            position: Position dict with chain_id, supplied_assets and borrowed_assets
+            prices: Optional prices to seed the engine with
+        """
+        if prices:
+            self.prices.update(prices)
+
+        previous = self.positions.get(position_id)
+        if previous:
+            self._unindex(previous)
+
+        tracked = TrackedPosition(position_id=position_id, chain_id=position.get("chain_id"))
+        for asset in position.get("supplied_assets", []):
+            token = asset["token"]
+            amount = float(asset["amount"])
+            lt = float(self.knowledge_graph.get_liquidation_threshold(token, tracked.chain_id))
+            tracked.collateral_amounts[token] = tracked.collateral_amounts.get(token, 0.0) + amount
+            tracked.collateral_weights[token] = tracked.collateral_weights.get(token, 0.0) + amount * lt
+        for asset in position.get("borrowed_assets", []):
+            token = asset["token"]
+            tracked.debt_amounts[token] = tracked.debt_amounts.get(token, 0.0) + float(asset["amount"])
+
+        self._recompute(tracked)
+        self.positions[position_id] = tracked
+        for token in tracked.tokens:
+            self.token_index.setdefault(token, set()).add(position_id)
+        if self.liquidation_index:
+            self.liquidation_index.update_position(tracked)
+
+        if previous and previous.risk_level != tracked.risk_level:
+            self._emit(RiskTransition(
+                position_id=position_id,
+                previous_risk_level=previous.risk_level,
+                risk_level=tracked.risk_level,
+                previous_health_factor=previous.health_factor,
+                health_factor=tracked.health_factor,
+                token=None,
+                timestamp=time.time(),
+            ))
+        return tracked
+
+    def upsert_from_analysis(self, analysis: Dict[str, Any]):
+        """Cache every position of a MultiChainPositionMonitor analysis result"""
+        user_address = analysis["user_address"]
+        for position in analysis.get("positions", []):
+            self.upsert_position(f"{user_address}:{position['chain_id']}", position, analysis.get("prices"))
+
+    def remove_position(self, position_id: str):
+        """Stop tracking a position"""
+        tracked = self.positions.pop(position_id, None)
+        if tracked:
+            self._unindex(tracked)
+            if self.liquidation_index:
+                self.liquidation_index.remove_position(position_id)
+
+    def on_price_update(self, token: str, price: float, tick_at: Optional[float] = None) -> List[RiskTransition]:
+        """
+        Apply a new price to every position holding the token
+
+        Args:
+            tick_at: When the price arrived, passed on to update listeners; defaults to now
+
+        Returns:
+            Risk level transitions caused by the update
+        """
+        old_price = self.prices.get(token, 0.0)
+        self.prices[token] = price
+        delta = price - old_price
+        if delta == 0:
+            return []
+
+        # Threshold crossings come straight from a range query on the sorted trigger prices,
+        # made before the totals it solves from are repriced; the index notifies its listeners
+        if self.liquidation_index:
+            self.liquidation_index.find_crossings(token, old_price, price, tick_at or time.time())
+
+        transitions = []
+        for position_id in self.token_index.get(token, ()):
+            tracked = self.positions[position_id]
+            previous_risk, previous_hf = tracked.risk_level, tracked.health_factor
+
+            tracked.updates_since_resync += 1
+            if tracked.updates_since_resync >= self.resync_every:
+                self._recompute(tracked)
+            else:
+                tracked.weighted_collateral_usd += tracked.collateral_weights.get(token, 0.0) * delta
+                tracked.collateral_usd += tracked.collateral_amounts.get(token, 0.0) * delta
+                tracked.debt_usd += tracked.debt_amounts.get(token, 0.0) * delta
+                self._update_health(tracked)
+
+            if self._update_listeners:
+                self._emit_update(HealthFactorUpdate(position_id, tracked.health_factor, token, tick_at or time.time()))
+
+            if tracked.risk_level != previous_risk:
+                transitions.append(RiskTransition(
+                    position_id=position_id,
+                    previous_risk_level=previous_risk,
+                    risk_level=tracked.risk_level,
+                    previous_health_factor=previous_hf,
+                    health_factor=tracked.health_factor,
+                    token=token,
+                    timestamp=time.time(),
+                ))
+
+        for transition in transitions:
+            self._emit(transition)
+        return transitions
+
+    def on_prices(self, prices: Dict[str, float]) -> List[RiskTransition]:
+        """Apply several price updates"""
+        tick_at = time.time()
+        transitions = []
+        for token, price in prices.items():
+            transitions.extend(self.on_price_update(token, price, tick_at))
+        return transitions
+
+    def get_health_factor(self, position_id: str) -> Optional[float]:
+        tracked = self.positions.get(position_id)
+        return tracked.health_factor if tracked else None
+
+    def _recompute(self, tracked: TrackedPosition):
+        """Recompute a position's totals from its per-asset contributions"""
+        tracked.weighted_collateral_usd = sum(w * self.prices.get(t, 0.0) for t, w in tracked.collateral_weights.items())
+        tracked.collateral_usd = sum(a * self.prices.get(t, 0.0) for t, a in tracked.collateral_amounts.items())
+        tracked.debt_usd = sum(a * self.prices.get(t, 0.0) for t, a in tracked.debt_amounts.items())
+        tracked.updates_since_resync = 0
+        self._update_health(tracked)
+
+    def _update_health(self, tracked: TrackedPosition):
+        if tracked.debt_usd > 0:
+            tracked.health_factor = tracked.weighted_collateral_usd / tracked.debt_usd
+        else:
+            tracked.health_factor = float('inf')
+        tracked.risk_level = self.knowledge_graph.get_risk_level(tracked.health_factor)
+
+    def _unindex(self, tracked: TrackedPosition):
+        for token in tracked.tokens:
+            holders = self.token_index.get(token)
+            if holders:
+                holders.discard(tracked.position_id)
+                if not holders:
+                    del self.token_index[token]
+
+    def _emit(self, transition: RiskTransition):
+        print(f"🚨 {transition.position_id}: {transition.previous_risk_level} → {transition.risk_level} "
+              f"(HF {transition.health_factor:.2f})")
+        for listener in self._listeners:
+            try:
+                listener(transition)
+            except Exception as e:
+                print(f"⚠️ Risk transition listener failed: {e}")
+
+    def _emit_update(self, update: HealthFactorUpdate):
+        for listener in self._update_listeners:
+            try:
+                listener(update)
+            except Exception as e:
+                print(f"⚠️ Health factor update listener failed: {e}")
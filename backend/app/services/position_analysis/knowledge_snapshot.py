@@ -0,0 +1,91 @@
+"""
+Knowledge Graph Snapshot
+Serializes the initialized DeFi knowledge base so worker processes can start without importing hyperon
+
+Usage:
+    python -m app.services.position_analysis.knowledge_snapshot [output_path] [reserve_params_path]
+"""
+
+import hashlib
+import os
+import pickle
+import sys
+from typing import Dict, Any, Optional
+
+SNAPSHOT_VERSION = 1
+
+# Source files whose contents define the knowledge base
+_SOURCE_FILES = ("defi_knowledge.py", "reserve_parameters.py")
+
+def snapshot_fingerprint(reserve_params_path: Optional[str] = None) -> str:
+    """
+    Fingerprint of everything the knowledge base is built from
+
+    Covers the snapshot format version, the knowledge graph source code and
+    the reserve parameter file (path, size and mtime).
+    """
+    digest = hashlib.sha256(str(SNAPSHOT_VERSION).encode())
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in _SOURCE_FILES:
+        with open(os.path.join(module_dir, name), "rb") as f:
+            digest.update(f.read())
+
+    if reserve_params_path:
+        digest.update(os.path.abspath(reserve_params_path).encode())
+        try:
+            stat = os.stat(reserve_params_path)
+            digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+        except OSError:
+            digest.update(b"missing")
+
+    return digest.hexdigest()
+
+def build_knowledge_snapshot(output_path: str, reserve_params_path: Optional[str] = None) -> Dict[str, Any]:
+    """Build the knowledge graph the slow way and write its lookup tables to output_path"""
+    from .defi_knowledge import DeFiKnowledgeGraph
+
+    knowledge_graph = DeFiKnowledgeGraph(reserve_params_path=reserve_params_path, snapshot_path=None)
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "fingerprint": snapshot_fingerprint(reserve_params_path),
+        "state": knowledge_graph.export_state(),
+    }
+
+    # Write atomically so concurrently starting workers never read a partial file
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, output_path)
+
+    print(f"📦 Knowledge snapshot written to {output_path} ({len(snapshot['state']['reserves'])} reserves)")
+    return snapshot
+
+def load_knowledge_snapshot(path: str, reserve_params_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Load knowledge graph state from a snapshot
+
+    Returns:
+        The exported state, or None if the snapshot is missing, unreadable or stale
+    """
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"⚠️ Could not read knowledge snapshot {path}: {e}")
+        return None
+
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        print(f"⚠️ Knowledge snapshot {path} has an old format, rebuilding in-process")
+        return None
+    if snapshot.get("fingerprint") != snapshot_fingerprint(reserve_params_path):
+        print(f"⚠️ Knowledge snapshot {path} is stale, rebuilding in-process")
+        return None
+
+    return snapshot["state"]
+
+if __name__ == "__main__":
+    output = sys.argv[1] if len(sys.argv) > 1 else os.getenv("KNOWLEDGE_SNAPSHOT_PATH", "knowledge_snapshot.pkl")
+    reserves = sys.argv[2] if len(sys.argv) > 2 else os.getenv("RESERVE_PARAMS_PATH")
+    build_knowledge_snapshot(output, reserves)
@@ -0,0 +1,270 @@
+"""
+Liquidation Price Index
+Sorted per-token index of the prices at which positions cross HF 1.0 or their owner's alert threshold
+"""
+
+from collections import Counter
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import numpy as np
+
+@dataclass
+class ThresholdCrossing:
+    """A position crossing a health factor threshold because of a price move"""
+    position_id: str
+    token: str
+    threshold: float
+    trigger_price: float
+    price: float
+    breached: bool  # True when HF fell below the threshold, False when it recovered
+    health_factor: float  # After the move
+    tick_at: Optional[float] = None  # When the price tick arrived, for tick-to-alert latency
+
+    def to_dict(self):
+        return asdict(self)
+
+class _SortedTriggers:
+    """Trigger prices sorted ascending, with position ids and thresholds in the same order"""
+
+    def __init__(self, prices: np.ndarray, position_ids: np.ndarray, thresholds: np.ndarray):
+        order = np.argsort(prices, kind="stable")
+        self.prices = prices[order]
+        self.position_ids = position_ids[order]
+        self.thresholds = thresholds[order]
+
+    def range(self, low: float, high: float, upper_inclusive: bool) -> List[Tuple[float, str, float]]:
+        """(price, position id, threshold) entries with low < price <= high, or low <= price < high"""
+        side = "right" if upper_inclusive else "left"
+        start, end = np.searchsorted(self.prices, (low, high), side=side)
+        return list(zip(self.prices[start:end].tolist(), self.position_ids[start:end].tolist(),
+                        self.thresholds[start:end].tolist()))
+
+# (token, threshold slot) -> sorted trigger prices
+_SortedIndex = Dict[Tuple[str, int], _SortedTriggers]
+
+class LiquidationPriceIndex:
+    """
+    Per-token sorted trigger prices for HF thresholds
+
+    For a position holding token t with price x, and every other price fixed:
+
+        HF(x) = (Wo + w·x) / (Do + d·x)
+
+    where w is Σ amount × LT of t supplied and d the amount of t borrowed.
+    HF equals threshold h at x* = (h·Do - Wo) / (w - h·d). When w > h·d the
+    HF falls below h as the price drops under x* ("falling" index); when
+    w < h·d it falls below h as the price rises above x* ("rising" index).
+    A price move is then resolved with a range query per threshold slot.
+
+    Every position is indexed at the fixed thresholds (HF 1.0 by default)
+    and at its owner's alert threshold h, set with set_threshold (or
+    default_threshold). With a recovery_margin m it is also indexed at
+    h × (1 + m), so an AlertEngine with hysteresis m fed from crossings sees
+    both the breach and the recovery.
+
+    Trigger prices of t depend on every price but t's own, so a move of t
+    leaves its own triggers valid and invalidates those of the tokens held
+    alongside t. Instead of re-inserting each holder on every tick, those
+    tokens' sorted arrays are marked stale and rebuilt in bulk from the
+    positions' cached totals the next time their price moves.
+    """
+
+    def __init__(self, thresholds: Tuple[float, ...] = (1.0,), default_threshold: Optional[float] = 1.2,
+                 recovery_margin: float = 0.0):
+        self.thresholds = tuple(sorted(thresholds))
+        self.default_threshold = default_threshold
+        self.recovery_margin = recovery_margin
+        self.user_thresholds: Dict[str, float] = {}  # user -> alert threshold
+        self._falling: _SortedIndex = {}
+        self._rising: _SortedIndex = {}
+        self._positions: Dict[str, object] = {}     # position_id -> TrackedPosition
+        self._holders: Dict[str, Set[str]] = {}     # token -> position ids holding it
+        self._co_held: Dict[str, Counter] = {}      # token -> other tokens held by its holders, with counts
+        self._stale: Set[str] = set()               # tokens whose sorted arrays need a rebuild
+        self._listeners: List[Callable[[ThresholdCrossing], None]] = []
+        self.rebuilds = 0
+
+    @staticmethod
+    def _user(position_id: str) -> str:
+        return position_id.split(":", 1)[0].lower()
+
+    def configure(self, default_threshold: Optional[float], recovery_margin: float = 0.0):
+        """Set the alert threshold of users without their own and the recovery margin, e.g. from an AlertEngine"""
+        self.default_threshold = default_threshold
+        self.recovery_margin = recovery_margin
+        self._stale.update(self._holders)
+
+    def set_threshold(self, user: str, threshold: float):
+        """Index a user's positions at their alert threshold"""
+        self.user_thresholds[user.lower()] = threshold
+        self._mark_user_stale(user.lower())
+
+    def forget_user(self, user: str):
+        self.user_thresholds.pop(user.lower(), None)
+        self._mark_user_stale(user.lower())
+
+    def _mark_user_stale(self, user: str):
+        for position_id, tracked in self._positions.items():
+            if self._user(position_id) == user:
+                self._stale.update(tracked.tokens)
+
+    def _slot_count(self) -> int:
+        alerting = self.default_threshold is not None or self.user_thresholds
+        return len(self.thresholds) + (0 if not alerting else 2 if self.recovery_margin else 1)
+
+    def _position_thresholds(self, position_id: str) -> List[float]:
+        """Threshold per slot; NaN where the position has no alert threshold"""
+        thresholds = list(self.thresholds)
+        extra = self._slot_count() - len(thresholds)
+        if extra:
+            alert = self.user_thresholds.get(self._user(position_id), self.default_threshold)
+            alert = float("nan") if alert is None else alert
+            thresholds.append(alert)
+            if extra == 2:
+                thresholds.append(alert * (1 + self.recovery_margin))
+        return thresholds
+
+    def subscribe(self, listener: Callable[[ThresholdCrossing], None]):
+        """Register a callback for threshold crossings"""
+        self._listeners.append(listener)
+
+    def update_position(self, tracked):
+        """
+        Add or replace a position; its tokens are re-indexed on their next price move
+
+        Args:
+            tracked: TrackedPosition from the incremental health factor engine, whose
+                totals the engine keeps current
+        """
+        self.remove_position(tracked.position_id)
+        self._positions[tracked.position_id] = tracked
+        tokens = tracked.tokens
+        for token in tokens:
+            self._holders.setdefault(token, set()).add(tracked.position_id)
+            self._co_held.setdefault(token, Counter()).update(tokens - {token})
+            self._stale.add(token)
+
+    def remove_position(self, position_id: str):
+        """Drop a position from the index"""
+        tracked = self._positions.pop(position_id, None)
+        if tracked is None:
+            return
+        tokens = tracked.tokens
+        for token in tokens:
+            holders = self._holders.get(token)
+            if holders:
+                holders.discard(position_id)
+                if not holders:
+                    del self._holders[token]
+            co_held = self._co_held.get(token)
+            if co_held is not None:
+                co_held.subtract(tokens - {token})
+                co_held += Counter()  # Drop tokens no longer held alongside
+                if not co_held:
+                    del self._co_held[token]
+            self._stale.add(token)
+
+    def _triggers(self, tracked, token: str, price: float) -> Dict[float, float]:
+        """Trigger price per threshold of one position and token, given the token's price"""
+        w = tracked.collateral_weights.get(token, 0.0)
+        d = tracked.debt_amounts.get(token, 0.0)
+        other_weighted = tracked.weighted_collateral_usd - w * price
+        other_debt = tracked.debt_usd - d * price
+        triggers = {}
+        for threshold in self._position_thresholds(tracked.position_id):
+            slope = w - threshold * d
+            if slope != 0 and threshold == threshold:  # Skip NaN: no alert threshold
+                trigger = (threshold * other_debt - other_weighted) / slope
+                if trigger > 0:  # Otherwise unreachable at any positive price
+                    triggers[threshold] = trigger
+        return triggers
+
+    def trigger_prices(self, position_id: str, prices: Dict[str, float]) -> Dict[Tuple[str, float], float]:
+        """Trigger price per (token, threshold) for a position at the given prices"""
+        tracked = self._positions.get(position_id)
+        if tracked is None or not any(tracked.debt_amounts.values()):
+            return {}
+        return {
+            (token, threshold): trigger
+            for token in tracked.tokens
+            for threshold, trigger in self._triggers(tracked, token, prices.get(token, 0.0)).items()
+        }
+
+    def _rebuild(self, token: str, price: float):
+        """Recompute and sort the trigger prices of every holder of a token, with the token at price"""
+        self._stale.discard(token)
+        self.rebuilds += 1
+        holders = [
+            tracked for tracked in (self._positions[p] for p in self._holders.get(token, ()))
+            if any(tracked.debt_amounts.values())  # No debt, HF is infinite at any price
+        ]
+        position_ids = np.array([tracked.position_id for tracked in holders], dtype=object)
+        w = np.array([tracked.collateral_weights.get(token, 0.0) for tracked in holders])
+        d = np.array([tracked.debt_amounts.get(token, 0.0) for tracked in holders])
+        other_weighted = np.array([tracked.weighted_collateral_usd for tracked in holders]) - w * price
+        other_debt = np.array([tracked.debt_usd for tracked in holders]) - d * price
+        slots = self._slot_count()
+        thresholds = np.array([self._position_thresholds(tracked.position_id) for tracked in holders],
+                              dtype=float).reshape(len(holders), slots)
+
+        for key in [key for key in self._falling if key[0] == token and key[1] >= slots]:
+            del self._falling[key], self._rising[key]
+        for slot in range(slots):
+            key = (token, slot)
+            threshold = thresholds[:, slot]
+            slope = w - threshold * d
+            with np.errstate(divide="ignore", invalid="ignore"):
+                trigger = (threshold * other_debt - other_weighted) / slope
+            reachable = (slope != 0) & (trigger > 0)  # NaN thresholds compare False
+            falling, rising = reachable & (slope > 0), reachable & (slope < 0)
+            self._falling[key] = _SortedTriggers(trigger[falling], position_ids[falling], threshold[falling])
+            self._rising[key] = _SortedTriggers(trigger[rising], position_ids[rising], threshold[rising])
+
+    def _health_after(self, position_id: str, token: str, delta: float) -> float:
+        """Health factor of a position once token's price moved by delta (totals are still at the old price)"""
+        tracked = self._positions[position_id]
+        debt = tracked.debt_usd + tracked.debt_amounts.get(token, 0.0) * delta
+        weighted = tracked.weighted_collateral_usd + tracked.collateral_weights.get(token, 0.0) * delta
+        return weighted / debt if debt > 0 else float('inf')
+
+    def find_crossings(self, token: str, old_price: float, new_price: float,
+                       tick_at: Optional[float] = None) -> List[ThresholdCrossing]:
+        """
+        Find every position crossing a threshold when token moves from old_price to new_price
+
+        Call it before the positions' totals are repriced. Only positions whose
+        trigger price lies between the two prices are visited; the token's own
+        triggers are rebuilt first if an earlier move or update left them stale.
+        """
+        if new_price == old_price:
+            return []
+        if token in self._stale and old_price > 0:
+            self._rebuild(token, old_price)
+
+        crossings = []
+        low, high = min(old_price, new_price), max(old_price, new_price)
+        delta = new_price - old_price
+        for slot in range(self._slot_count()) if old_price > 0 else ():
+            key = (token, slot)
+            # Falling index: HF < h iff price < trigger, so triggers in (low, high] are crossed
+            falling = self._falling.get(key)
+            crossed = [(entry, new_price < old_price)
+                       for entry in (falling.range(low, high, upper_inclusive=True) if falling else [])]
+            # Rising index: HF < h iff price > trigger, so triggers in [low, high) are crossed
+            rising = self._rising.get(key)
+            crossed += [(entry, new_price > old_price)
+                        for entry in (rising.range(low, high, upper_inclusive=False) if rising else [])]
+            for (trigger, position_id, threshold), breached in crossed:
+                crossings.append(ThresholdCrossing(position_id, token, threshold, trigger, new_price, breached,
+                                                   self._health_after(position_id, token, delta), tick_at))
+
+        # Triggers of the tokens held alongside this one depend on its price
+        self._stale.update(self._co_held.get(token, ()))
+
+        for crossing in crossings:
+            for listener in self._listeners:
+                try:
+                    listener(crossing)
+                except Exception as e:
+                    print(f"⚠️ Threshold crossing listener failed: {e}")
+        return crossings
@@ -0,0 +1,172 @@
+"""
+Time-to-Liquidation Projection
+Projects how interest accrual erodes health factors over a time grid, for many positions at once
+
+Supplied balances grow at the reserve's supply APY and debt at its borrow
+APY, both compounding, while prices are held at their current values:
+
+    HF(t) = Σ(Si × Pi × LTi × (1 + supply_apyi)^t) / Σ(Bj × Pj × (1 + borrow_apyj)^t)
+
+With borrow rates above supply rates HF drifts down even when prices do
+not move; the projection gives the time until it crosses 1.0 and the
+alert threshold.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import numpy as np
+from .batch_health_factor import PositionBatch
+from .price_history import SECONDS_PER_YEAR
+from .reserve_state import reserve_state_service
+
+# (supply_apy, borrow_apy) keyed by token or by (chain_id, token)
+RateTable = Dict[Union[str, Tuple[str, str]], Tuple[float, float]]
+
+DEFAULT_HORIZON_SECONDS = 5 * SECONDS_PER_YEAR
+DEFAULT_STEPS = 128
+
+# Keep each (rows x time steps) block around this many cells
+_CHUNK_CELLS = 4_000_000
+
+def time_grid(horizon: float = DEFAULT_HORIZON_SECONDS, steps: int = DEFAULT_STEPS,
+              first_step: float = 3600.0) -> np.ndarray:
+    """Seconds from now: 0, then geometrically spaced from first_step to horizon"""
+    return np.concatenate(([0.0], np.geomspace(first_step, horizon, steps - 1)))
+
+def _asset_rate(asset: Dict, chain_id: Optional[str], debt: bool, rates: RateTable) -> float:
+    """APY of one supplied or borrowed asset: its own field, else the rate table, else 0"""
+    own = asset.get("borrow_apy" if debt else "supply_apy")
+    if own is not None:
+        return float(own)
+    token = str(asset["token"]).upper()
+    pair = rates.get((str(chain_id), token), rates.get(token))
+    return float(pair[1] if debt else pair[0]) if pair else 0.0
+
+def growth_rates(positions: List[Dict], rates: Optional[RateTable] = None) -> np.ndarray:
+    """
+    Continuous annual growth rate ln(1 + APY) per row, in PositionBatch.from_positions row order
+    """
+    rates = {
+        key.upper() if isinstance(key, str) else (str(key[0]), key[1].upper()): value
+        for key, value in (rates or {}).items()
+    }
+    apys = [
+        _asset_rate(asset, position.get("chain_id"), debt, rates)
+        for position in positions
+        for key, debt in (("supplied_assets", False), ("borrowed_assets", True))
+        for asset in position.get(key, [])
+    ]
+    return np.log1p(np.asarray(apys, dtype=np.float64))
+
+@dataclass
+class LiquidationProjection:
+    """Per-position projections, aligned with the batch's positions"""
+    times: np.ndarray                # (n_steps,) seconds from now
+    health_factors: np.ndarray       # (n_positions, n_steps)
+    time_to_liquidation: np.ndarray  # (n_positions,) seconds until HF < 1.0, inf if not within the grid
+    time_to_threshold: np.ndarray    # (n_positions,) seconds until HF < its alert threshold
+
+def _crossing_times(times: np.ndarray, health_factors: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+    """
+    First time each row falls below its threshold
+
+    Interpolates log HF linearly between the two grid points around the
+    crossing; log HF of compounding balances is close to linear in time.
+    """
+    below = health_factors < thresholds[:, None]
+    crossed = below.any(axis=1)
+    first = np.argmax(below, axis=1)
+    result = np.full(len(health_factors), np.inf)
+
+    now = crossed & (first == 0)
+    result[now] = times[0]
+
+    later = np.nonzero(crossed & (first > 0))[0]
+    if len(later):
+        step = first[later]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            h0 = np.log(health_factors[later, step - 1])
+            h1 = np.log(health_factors[later, step])
+            fraction = np.clip((h0 - np.log(thresholds[later])) / (h0 - h1), 0.0, 1.0)
+        fraction = np.where(np.isfinite(fraction), fraction, 1.0)
+        result[later] = times[step - 1] + fraction * (times[step] - times[step - 1])
+    return result
+
+def project_batch(batch: PositionBatch, rates: np.ndarray, times: Optional[np.ndarray] = None,
+                  alert_thresholds: Union[float, np.ndarray] = 1.2) -> LiquidationProjection:
+    """
+    Project health factors of every position in a batch along a time grid
+
+    Args:
+        batch: Columnar positions at current prices
+        rates: Per-row continuous annual growth rate, see growth_rates
+        times: Seconds from now, ascending and starting at 0; defaults to time_grid()
+        alert_thresholds: One threshold for all positions, or one per position
+    """
+    times = time_grid() if times is None else np.asarray(times, dtype=np.float64)
+    n_steps = len(times)
+    years = times / SECONDS_PER_YEAR
+
+    values = batch.amounts * batch.asset_prices[batch.asset_index]
+    supplied = ~batch.is_debt
+    weights = np.where(supplied, values * batch.asset_lts[batch.asset_index], values)
+
+    weighted = np.zeros(batch.num_positions * n_steps)
+    debt = np.zeros(batch.num_positions * n_steps)
+    steps = np.arange(n_steps)
+    chunk = max(1, _CHUNK_CELLS // n_steps)
+    for start in range(0, len(values), chunk):
+        rows = slice(start, start + chunk)
+        # Row value at every grid time, summed into flat (position, step) cells
+        grown = (weights[rows, None] * np.exp(np.outer(rates[rows], years))).ravel()
+        cells = (batch.position_index[rows, None] * n_steps + steps).ravel()
+        row_supplied = np.repeat(supplied[rows], n_steps)
+        weighted += np.bincount(cells[row_supplied], weights=grown[row_supplied], minlength=len(weighted))
+        debt += np.bincount(cells[~row_supplied], weights=grown[~row_supplied], minlength=len(debt))
+
+    shape = (batch.num_positions, n_steps)
+    health_factors = np.full(shape, np.inf)
+    np.divide(weighted.reshape(shape), debt.reshape(shape), out=health_factors, where=debt.reshape(shape) != 0)
+
+    thresholds = np.broadcast_to(np.asarray(alert_thresholds, dtype=np.float64), (batch.num_positions,))
+    return LiquidationProjection(
+        times=times,
+        health_factors=health_factors,
+        time_to_liquidation=_crossing_times(times, health_factors, np.ones(batch.num_positions)),
+        time_to_threshold=_crossing_times(times, health_factors, thresholds),
+    )
+
+def project_positions(positions: List[Dict], prices: Dict[str, float], knowledge_graph,
+                      rates: Optional[RateTable] = None, alert_thresholds: Union[float, np.ndarray] = 1.2,
+                      times: Optional[np.ndarray] = None) -> LiquidationProjection:
+    """
+    Project position dicts as produced by the position parser
+
+    Args:
+        positions: [{"chain_id": "84532", "supplied_assets": [...], "borrowed_assets": [...]}];
+            assets may carry their own "supply_apy" / "borrow_apy"
+        prices: Dict of token prices {"WETH": 3000.0, "USDC": 1.0}
+        knowledge_graph: DeFiKnowledgeGraph used for liquidation thresholds
+        rates: APYs for assets without their own, e.g. from reserve_rates
+    """
+    batch = PositionBatch.from_positions(positions, prices, knowledge_graph)
+    return project_batch(batch, growth_rates(positions, rates), times, alert_thresholds)
+
+async def reserve_rates(chain_ids: Iterable[str]) -> RateTable:
+    """Current (supply_apy, borrow_apy) of every cached reserve, keyed by (chain_id, SYMBOL)"""
+    rates: RateTable = {}
+    for chain_id in {str(chain_id) for chain_id in chain_ids}:
+        for state in (await reserve_state_service.get_reserves(chain_id)).values():
+            if state.symbol:
+                rates[(chain_id, state.symbol.upper())] = (state.supply_apy, state.borrow_apy)
+    return rates
+
+def format_duration(seconds: float) -> str:
+    """Human-readable projection time"""
+    if not np.isfinite(seconds):
+        return "never"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min"
+    if seconds < 2 * 24 * 3600:
+        return f"{seconds / 3600:.1f} h"
+    return f"{seconds / (24 * 3600):.1f} days"
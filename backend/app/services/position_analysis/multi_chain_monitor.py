@@ -4,24 +4,72 @@ Monitors Aave positions across multiple chains and generates alerts
 """
 
 import asyncio
-from typing import Dict, List, Any, Optional
-from dataclasses import asdict
+import copy
+import hashlib
+import time
+from typing import Callable, Dict, List, Any, Optional, Tuple, Union
+from dataclasses import asdict, dataclass
 from .aave_analyzer import AavePositionAnalyzer, AavePosition, ExecutableAction
 from .blockscout_client import BlockscoutMCPClient
 from .aave_position_parser import AavePositionParser
 from .health_factor_calculator import HealthFactorCalculator
 from .action_plan_generator import ActionPlanGenerator
+from .incremental_health_factor import IncrementalHealthFactorEngine
+from .liquidation_price_index import LiquidationPriceIndex
+from .price_streamer import price_streamer
+
+# Balances enter the change digest rounded to this many significant digits,
+# so interest accrual on aTokens and debt tokens alone does not count as a change
+DIGEST_SIGNIFICANT_DIGITS = 4
+
+def balance_digest(token_balances: List[Dict[str, Any]]) -> str:
+    """Order-independent digest of a chain's quantized token balances"""
+    entries = sorted(
+        f"{(token.get('token_address') or token.get('token_symbol', '')).lower()}:"
+        f"{token.get('balance', 0):.{DIGEST_SIGNIFICANT_DIGITS}g}"
+        for token in token_balances
+        if token.get("balance")
+    )
+    return hashlib.sha1("|".join(entries).encode()).hexdigest()
+
+@dataclass
+class ChainSnapshot:
+    """Parsed Aave positions of one wallet on one chain and the balances they came from"""
+    digest: str
+    positions: List[Dict[str, Any]]
+    parsed_at: float
 
 class MultiChainPositionMonitor:
     """Monitors Aave positions across multiple chains"""
     
-    def __init__(self, blockscout_client: BlockscoutMCPClient):
+    def __init__(self, blockscout_client: BlockscoutMCPClient, snapshot_max_age: float = 60 * 60):
         self.blockscout_client = blockscout_client
         self.aave_analyzer = AavePositionAnalyzer(blockscout_client)
         self.position_parser = AavePositionParser()
         self.hf_calculator = HealthFactorCalculator()
         self.action_generator = ActionPlanGenerator()
         
+        # Cached positions of tracked wallets for price-tick HF updates and liquidation trigger detection;
+        # subscribed to the price streamer once the first wallet is tracked
+        self.hf_engine = IncrementalHealthFactorEngine(
+            self.hf_calculator.knowledge_graph,
+            liquidation_index=LiquidationPriceIndex()
+        )
+        self._tracked_wallets: Dict[str, str] = {}  # lowercased address -> address used in position IDs
+        self._streaming = False
+        
+        # Incremental mode: (address, chain_id) -> last parse, reused while balances are unchanged
+        self.snapshot_max_age = snapshot_max_age
+        self._snapshots: Dict[Tuple[str, str], ChainSnapshot] = {}
+        self._action_plans: Dict[str, Tuple[str, Dict[str, List]]] = {}  # address -> (risk level, chain -> actions)
+        self.change_stats = {
+            "chains_checked": 0,
+            "chains_unchanged": 0,
+            "parses": 0,
+            "parses_skipped": 0,
+            "action_plans_skipped": 0,
+        }
+        
         # Supported chains (Testnet)
         self.supported_chains = {
             "11155111": "Sepolia (Ethereum Testnet)",
@@ -32,13 +80,24 @@ class MultiChainPositionMonitor:
         }
     
     async def analyze_multi_chain_positions_llm(self, user_address: str, 
-                                                chain_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+                                                chain_ids: Optional[List[str]] = None,
+                                                incremental: bool = False,
+                                                track: Union[bool, Callable[[], bool]] = False) -> Dict[str, Any]:
         """
         Analyze Aave positions using LLM-based parsing
         
         Args:
             user_address: User's EVM address
             chain_ids: List of chain IDs to check (defaults to all supported)
+            incremental: Reuse the previous parse for chains whose quantized
+                balances are unchanged; prices and health factors are always
+                recomputed
+            track: Keep the wallet's positions in hf_engine for price-tick
+                updates, and its parses and action plans for incremental
+                refreshes, until forget_wallet; for monitored wallets, so
+                one-off analyses are not cached. A callable is asked once the
+                analysis is done, so a wallet that stopped being monitored
+                meanwhile is not tracked again
             
         Returns:
             Comprehensive analysis including positions, health factors, and executable actions
@@ -73,7 +132,7 @@ class MultiChainPositionMonitor:
                         token_balances.append({
                             "token_name": token.get("name", ""),
                             "token_symbol": token.get("symbol", ""),
-                            "token_address": token.get("contract_address", ""),
+                            "token_address": token.get("address") or token.get("contract_address", ""),
                             "balance": balance_float,
                             "decimals": decimals
                         })
@@ -93,13 +152,17 @@ class MultiChainPositionMonitor:
                 continue
         
         # Step 2: Use LLM to parse Aave positions
-        print(f"\n🤖 Using LLM to parse Aave positions...")
-        aave_positions = await self.position_parser.parse_aave_positions(chain_tokens)
-        print(f"  ✅ Parsed {len(aave_positions)} Aave positions")
+        if incremental:
+            aave_positions, changed_chains = await self._parse_changed_chains(user_address, chain_tokens, track)
+        else:
+            print(f"\n🤖 Using LLM to parse Aave positions...")
+            aave_positions = await self.position_parser.parse_aave_positions(chain_tokens)
+            print(f"  ✅ Parsed {len(aave_positions)} Aave positions")
+            changed_chains = [chain["chain_id"] for chain in chain_tokens]
         
         # Step 3: Fetch prices for all tokens
         print(f"\n💰 Fetching prices for all tokens...")
-        prices = await self.hf_calculator.get_prices_for_assets(aave_positions)
+        prices = await self.hf_calculator.get_prices_for_assets(aave_positions, chain_tokens)
         print(f"  ✅ Fetched {len(prices)} prices")
         
         # Step 4: Calculate health factors for each position
@@ -111,7 +174,8 @@ class MultiChainPositionMonitor:
             hf = self.hf_calculator.calculate_health_factor(
                 position["supplied_assets"],
                 position["borrowed_assets"],
-                prices
+                prices,
+                position.get("chain_id")
             )
             
             position["health_factor"] = hf
@@ -123,8 +187,16 @@ class MultiChainPositionMonitor:
         overall_risk_level = self.aave_analyzer.knowledge_graph.get_risk_level(min_hf)
         
         # Step 6: Generate action plan if needed
-        executable_actions = []
-        if overall_risk_level in ["high", "critical"]:
+        address_key = user_address.lower()
+        previous_plan = self._action_plans.get(address_key)
+        if (overall_risk_level in ["high", "critical"] and incremental and not changed_chains
+                and previous_plan is not None and previous_plan[0] == overall_risk_level):
+            # Same positions, same risk level: the previous plan still applies
+            self.change_stats["action_plans_skipped"] += 1
+            for position in aave_positions:
+                if position["chain_id"] in previous_plan[1]:
+                    position["actions"] = previous_plan[1][position["chain_id"]]
+        elif overall_risk_level in ["high", "critical"]:
             print(f"\n🎯 Generating action plan for {overall_risk_level} risk...")
             action_plans = await self.action_generator.generate_action_plan(
                 aave_positions,
@@ -139,8 +211,14 @@ class MultiChainPositionMonitor:
                     if position["chain_id"] == chain_id:
                         position["actions"] = action_plan.get("actions", [])
                         break
+            if track:
+                self._action_plans[address_key] = (overall_risk_level, {
+                    position["chain_id"]: position["actions"] for position in aave_positions if "actions" in position
+                })
+        else:
+            self._action_plans.pop(address_key, None)
         
-        return {
+        analysis = {
             "user_address": user_address,
             "total_positions": len(aave_positions),
             "positions": aave_positions,
@@ -151,6 +229,93 @@ class MultiChainPositionMonitor:
             },
             "prices": prices
         }
+        if callable(track) and not track():
+            self.forget_wallet(user_address)  # Drop what this refresh cached
+        elif track:
+            # Only chains fetched successfully tell whether a position is gone
+            self._track(analysis, [chain["chain_id"] for chain in chain_tokens])
+        
+        return analysis
+    
+    def _track(self, analysis: Dict[str, Any], chain_ids: List[str]):
+        """Cache a tracked wallet's positions in hf_engine, dropping those on chain_ids where it no longer has one"""
+        user_address = analysis["user_address"]
+        if not self._streaming:
+            price_streamer.subscribe(self.hf_engine.on_prices)
+            self._streaming = True
+        self._tracked_wallets[user_address.lower()] = user_address
+        current = {str(position["chain_id"]) for position in analysis.get("positions", [])}
+        for chain_id in chain_ids:
+            if str(chain_id) not in current:
+                self.hf_engine.remove_position(f"{user_address}:{chain_id}")
+        self.hf_engine.upsert_from_analysis(analysis)
+    
+    async def _parse_changed_chains(self, user_address: str, chain_tokens: List[Dict[str, Any]],
+                                    keep_snapshots: bool) -> Tuple[List[Dict], List[str]]:
+        """
+        Parse only chains whose balance digest differs from the last snapshot
+        (or whose snapshot is older than snapshot_max_age) and reuse the
+        cached positions for the rest; new parses are snapshotted only with
+        keep_snapshots, so snapshots stay bounded to tracked wallets
+        
+        Returns:
+            (positions for every chain in chain_tokens, chain IDs that were re-parsed)
+        """
+        now = time.time()
+        address_key = user_address.lower()
+        positions: List[Dict] = []
+        changed = []
+        digests = {}
+        for chain in chain_tokens:
+            chain_id = chain["chain_id"]
+            digest = balance_digest(chain["tokens_balances"])
+            snapshot = self._snapshots.get((address_key, chain_id))
+            self.change_stats["chains_checked"] += 1
+            if snapshot is not None and snapshot.digest == digest and now - snapshot.parsed_at < self.snapshot_max_age:
+                self.change_stats["chains_unchanged"] += 1
+                # Copies, since health factors and actions are written into the returned positions
+                positions.extend(copy.deepcopy(snapshot.positions))
+            else:
+                changed.append(chain)
+                digests[chain_id] = digest
+        
+        if not changed:
+            print(f"\n♻️ Balances unchanged on {len(chain_tokens)} chains, skipping LLM parsing")
+            self.change_stats["parses_skipped"] += 1
+            return positions, []
+        
+        print(f"\n🤖 Using LLM to parse Aave positions on {len(changed)}/{len(chain_tokens)} changed chains...")
+        parsed = await self.position_parser.parse_aave_positions(changed)
+        self.change_stats["parses"] += 1
+        print(f"  ✅ Parsed {len(parsed)} Aave positions")
+        
+        for chain_id, digest in digests.items() if keep_snapshots else ():
+            chain_positions = [p for p in parsed if str(p.get("chain_id")) == chain_id]
+            self._snapshots[(address_key, chain_id)] = ChainSnapshot(digest, copy.deepcopy(chain_positions), now)
+        positions.extend(parsed)
+        return positions, list(digests)
+    
+    def forget_wallet(self, user_address: str, chain_id: Optional[str] = None):
+        """
+        Drop the incremental-mode snapshots of a wallet (or of one of its chains) so the
+        next refresh re-parses; forgetting the whole wallet also stops tracking it in hf_engine
+        """
+        address_key = user_address.lower()
+        if chain_id is None and address_key in self._tracked_wallets:
+            tracked_address = self._tracked_wallets.pop(address_key)
+            for position_id in [p for p in self.hf_engine.positions if p.startswith(f"{tracked_address}:")]:
+                self.hf_engine.remove_position(position_id)
+        for key in [key for key in self._snapshots if key[0] == address_key and chain_id in (None, key[1])]:
+            del self._snapshots[key]
+        self._action_plans.pop(address_key, None)
+    
+    def get_change_detection_stats(self) -> Dict[str, Any]:
+        """How often incremental refreshes found a chain unchanged and skipped parsing"""
+        stats = dict(self.change_stats)
+        checked = stats["chains_checked"]
+        stats["skip_ratio"] = stats["chains_unchanged"] / checked if checked else 0.0
+        stats["snapshots"] = len(self._snapshots)
+        return stats
     
     async def monitor_position(self, user_address: str, chain_id: str, 
                               asset: str) -> Dict[str, Any]:
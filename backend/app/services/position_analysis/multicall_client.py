@@ -0,0 +1,255 @@
+"""
+Multicall JSON-RPC Client
+Batched on-chain reads (Aave account data, token balances) through Multicall3 eth_calls
+"""
+
+import asyncio
+import itertools
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+import httpx
+
+# Multicall3 is deployed at the same address on every supported chain (and on anvil forks)
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+# Function selectors, first 4 bytes of keccak256(signature)
+AGGREGATE3 = "82ad56cb"           # aggregate3((address,bool,bytes)[])
+GET_USER_ACCOUNT_DATA = "bf92857c"  # getUserAccountData(address)
+GET_RESERVE_DATA = "35ea6a75"     # getReserveData(address)
+BALANCE_OF = "70a08231"           # balanceOf(address)
+SCALED_BALANCE_OF = "1da24f3e"    # scaledBalanceOf(address)
+
+WAD = 10 ** 18
+UINT256_MAX = 2 ** 256 - 1
+
+def _word(value: int) -> str:
+    return format(value, "064x")
+
+def _address_word(address: str) -> str:
+    return address.lower().removeprefix("0x").rjust(64, "0")
+
+def encode_address_call(selector: str, address: str) -> bytes:
+    """Calldata of a single-address function such as balanceOf(address)"""
+    return bytes.fromhex(selector + _address_word(address))
+
+def encode_aggregate3(calls: Sequence[Tuple[str, bytes]], allow_failure: bool = True) -> str:
+    """
+    Hex calldata of Multicall3.aggregate3 for (target, calldata) pairs
+
+    Encodes the dynamic Call3[] layout directly: array offset, length,
+    per-element offsets, then each (target, allowFailure, bytes) tuple.
+    """
+    tuples = []
+    for target, data in calls:
+        padded = data.hex().ljust((len(data) + 31) // 32 * 64, "0")
+        tuples.append(
+            _address_word(target) + _word(int(allow_failure)) + _word(0x60) + _word(len(data)) + padded
+        )
+    offsets, position = [], 32 * len(tuples)
+    for encoded in tuples:
+        offsets.append(_word(position))
+        position += len(encoded) // 2
+    return "0x" + AGGREGATE3 + _word(0x20) + _word(len(tuples)) + "".join(offsets) + "".join(tuples)
+
+def decode_aggregate3(result: str) -> List[Tuple[bool, bytes]]:
+    """Decode aggregate3's Result[] return value into (success, returnData) pairs"""
+    raw = bytes.fromhex(result.removeprefix("0x"))
+
+    def word(offset: int) -> int:
+        return int.from_bytes(raw[offset:offset + 32], "big")
+
+    array = word(0)
+    count = word(array)
+    base = array + 32
+    decoded = []
+    for i in range(count):
+        start = base + word(base + 32 * i)
+        data_start = start + word(start + 32)
+        length = word(data_start)
+        decoded.append((word(start) != 0, raw[data_start + 32:data_start + 32 + length]))
+    return decoded
+
+def decode_uints(data: bytes) -> List[int]:
+    """Static uint256 words of a return value"""
+    return [int.from_bytes(data[i:i + 32], "big") for i in range(0, len(data) - len(data) % 32, 32)]
+
+@dataclass
+class AccountData:
+    """Pool.getUserAccountData; USD amounts in the market base currency (8 decimals)"""
+    total_collateral_base: int
+    total_debt_base: int
+    available_borrows_base: int
+    current_liquidation_threshold: int  # Basis points
+    ltv: int  # Basis points
+    health_factor_wad: int  # 1e18 = 1.0; uint256 max when there is no debt
+
+    @property
+    def health_factor(self) -> float:
+        if self.health_factor_wad == UINT256_MAX:
+            return float("inf")
+        return self.health_factor_wad / WAD
+
+    def to_dict(self):
+        return {
+            "total_collateral_usd": self.total_collateral_base / 1e8,
+            "total_debt_usd": self.total_debt_base / 1e8,
+            "available_borrows_usd": self.available_borrows_base / 1e8,
+            "liquidation_threshold": self.current_liquidation_threshold / 1e4,
+            "ltv": self.ltv / 1e4,
+            "health_factor": self.health_factor,
+        }
+
+@dataclass
+class ReserveData:
+    """Pool.getReserveData fields used for reconciliation (indexes and rates in ray)"""
+    liquidity_index: int
+    liquidity_rate: int
+    variable_borrow_index: int
+    variable_borrow_rate: int
+    last_update_timestamp: int  # Unix seconds of the last index update
+    a_token: str
+    variable_debt_token: str
+
+    @classmethod
+    def from_words(cls, words: List[int]) -> "ReserveData":
+        # ReserveData struct: configuration, liquidityIndex, currentLiquidityRate, variableBorrowIndex,
+        # currentVariableBorrowRate, currentStableBorrowRate, lastUpdateTimestamp, id, aTokenAddress,
+        # stableDebtTokenAddress, variableDebtTokenAddress, ...
+        return cls(
+            liquidity_index=words[1],
+            liquidity_rate=words[2],
+            variable_borrow_index=words[3],
+            variable_borrow_rate=words[4],
+            last_update_timestamp=words[6],
+            a_token="0x" + format(words[8], "040x"),
+            variable_debt_token="0x" + format(words[10], "040x")
+        )
+
+class MulticallClient:
+    """
+    JSON-RPC reader that packs many contract reads into Multicall3 aggregate3 calls
+
+    Calls are chunked into batch_size-call aggregate3 requests to stay under
+    node eth_call gas caps, and all chunks for a chain go out as one JSON-RPC
+    batch over a pooled HTTP client, so reading thousands of accounts costs a
+    single round trip. Failed individual calls come back as None.
+    """
+
+    def __init__(self, rpc_urls: Dict[str, str], batch_size: int = 100,
+                 multicall_address: str = MULTICALL3_ADDRESS, request_timeout: float = 20.0,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.rpc_urls = rpc_urls
+        self.batch_size = batch_size
+        self.multicall_address = multicall_address
+        self.request_timeout = request_timeout
+        self._transport = transport  # For tests: e.g. httpx.MockTransport standing in for a node
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop = None
+        self._ids = itertools.count(1)
+
+        # Stats
+        self.round_trips = 0
+        self.eth_calls = 0
+        self.contract_calls = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared pooled HTTP client, recreated if the event loop changed"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=self.request_timeout,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                transport=self._transport
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    async def _rpc_batch(self, chain_id: str, requests: List[Tuple[str, list]]) -> List:
+        """Send (method, params) requests as one JSON-RPC batch; returns results in request order"""
+        url = self.rpc_urls.get(chain_id)
+        if url is None:
+            raise ValueError(f"No RPC URL configured for chain {chain_id}")
+        payload = [
+            {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params}
+            for method, params in requests
+        ]
+        response = await self._get_client().post(url, json=payload if len(payload) > 1 else payload[0])
+        response.raise_for_status()
+        self.round_trips += 1
+        body = response.json()
+        replies = {reply["id"]: reply for reply in (body if isinstance(body, list) else [body])}
+
+        results = []
+        for request in payload:
+            reply = replies.get(request["id"])
+            if reply is None:
+                raise RuntimeError(f"RPC reply missing for request {request['id']}")
+            if "error" in reply:
+                raise RuntimeError(f"RPC error on chain {chain_id}: {reply['error']}")
+            results.append(reply["result"])
+        return results
+
+    async def aggregate(self, chain_id: str, calls: Sequence[Tuple[str, bytes]],
+                        block: str = "latest") -> List[Optional[bytes]]:
+        """Execute (target, calldata) calls; returns each call's return data, or None if it reverted"""
+        if not calls:
+            return []
+        chunks = [calls[i:i + self.batch_size] for i in range(0, len(calls), self.batch_size)]
+        results = await self._rpc_batch(chain_id, [
+            ("eth_call", [{"to": self.multicall_address, "data": encode_aggregate3(chunk)}, block])
+            for chunk in chunks
+        ])
+        self.eth_calls += len(chunks)
+        self.contract_calls += len(calls)
+        return [data if success else None for result in results for success, data in decode_aggregate3(result)]
+
+    async def get_user_account_data(self, chain_id: str, pool_address: str, users: Sequence[str],
+                                    block: str = "latest") -> Dict[str, Optional[AccountData]]:
+        """Pool.getUserAccountData for many users at once, keyed by lowercased user address"""
+        results = await self.aggregate(chain_id, [
+            (pool_address, encode_address_call(GET_USER_ACCOUNT_DATA, user)) for user in users
+        ], block)
+        account_data = {}
+        for user, data in zip(users, results):
+            words = decode_uints(data) if data else []
+            account_data[user.lower()] = AccountData(*words[:6]) if len(words) >= 6 else None
+        return account_data
+
+    async def get_reserve_data(self, chain_id: str, pool_address: str, assets: Sequence[str],
+                               block: str = "latest") -> Dict[str, Optional[ReserveData]]:
+        """Pool.getReserveData for many reserves at once, keyed by lowercased asset address"""
+        results = await self.aggregate(chain_id, [
+            (pool_address, encode_address_call(GET_RESERVE_DATA, asset)) for asset in assets
+        ], block)
+        reserve_data = {}
+        for asset, data in zip(assets, results):
+            words = decode_uints(data) if data else []
+            reserve_data[asset.lower()] = ReserveData.from_words(words) if len(words) >= 11 else None
+        return reserve_data
+
+    async def get_balances(self, chain_id: str, pairs: Sequence[Tuple[str, str]], scaled: bool = False,
+                           block: str = "latest") -> Dict[Tuple[str, str], Optional[int]]:
+        """
+        Raw token balances for (token, holder) pairs; with scaled=True reads
+        scaledBalanceOf, for aTokens and variable debt tokens
+        """
+        selector = SCALED_BALANCE_OF if scaled else BALANCE_OF
+        results = await self.aggregate(chain_id, [
+            (token, encode_address_call(selector, holder)) for token, holder in pairs
+        ], block)
+        return {
+            (token.lower(), holder.lower()): (decode_uints(data)[0] if data and len(data) >= 32 else None)
+            for (token, holder), data in zip(pairs, results)
+        }
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "round_trips": self.round_trips,
+            "eth_calls": self.eth_calls,
+            "contract_calls": self.contract_calls,
+        }
@@ -0,0 +1,545 @@
+"""
+Position Monitor Service
+Background scheduler that periodically refreshes monitored wallets' Aave positions
+"""
+
+import asyncio
+import heapq
+import inspect
+import itertools
+import math
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .alert_engine import AlertEngine
+from .blockscout_client import BlockscoutMCPClient
+from .multi_chain_monitor import MultiChainPositionMonitor
+from .defi_knowledge import DeFiKnowledgeGraph
+from .liquidation_projection import format_duration, project_positions, reserve_rates
+from .multicall_client import MulticallClient
+from .price_fetcher import price_fetcher
+from .price_history import SECONDS_PER_YEAR
+from .stress_test import DEFAULT_VOLATILITIES, FALLBACK_VOLATILITY
+
+# Refresh interval multiplier per risk level (DeFiKnowledgeGraph.get_risk_level)
+RISK_LEVEL_INTERVAL_FACTORS = {
+    "critical": 0.125,
+    "high": 0.25,
+    "medium": 0.5,
+    "low": 2.0,
+}
+VERY_SAFE_HEALTH_FACTOR = 4.0  # Wallets above this are refreshed at max_interval
+PROJECTION_WARNING_SECONDS = 7 * 24 * 3600  # Warn when interest alone crosses the alert threshold this soon
+
+@dataclass
+class MonitoredWallet:
+    """Scheduling state for one monitored wallet"""
+    address: str
+    chain_ids: Optional[List[str]] = None  # None = every supported chain
+    alert_threshold: float = 1.2
+    next_due: float = 0.0
+    running: bool = False
+    runs: int = 0
+    failures: int = 0
+    last_started: Optional[float] = None
+    last_duration: Optional[float] = None
+    last_error: Optional[str] = None
+    last_health_factor: Optional[float] = None
+    last_risk_level: Optional[str] = None
+    collateral_tokens: List[str] = field(default_factory=list)
+    last_interval: Optional[float] = None
+    time_to_liquidation: Optional[float] = None  # Projected from interest accrual at current prices
+    time_to_threshold: Optional[float] = None
+    onchain_health_factor: Optional[float] = None  # Lowest Pool.getUserAccountData HF of the last sweep
+
+    def to_dict(self):
+        return {
+            "address": self.address,
+            "chain_ids": self.chain_ids,
+            "alert_threshold": self.alert_threshold,
+            "next_due": self.next_due,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_started": self.last_started,
+            "last_duration": self.last_duration,
+            "last_error": self.last_error,
+            "last_health_factor": self.last_health_factor,
+            "last_risk_level": self.last_risk_level,
+            "collateral_tokens": self.collateral_tokens,
+            "last_interval": self.last_interval,
+            "time_to_liquidation": self.time_to_liquidation,
+            "time_to_threshold": self.time_to_threshold,
+            "onchain_health_factor": self.onchain_health_factor,
+        }
+
+def _summary(samples) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"mean": None, "p95": None, "max": None}
+    ordered = sorted(samples)
+    return {
+        "mean": sum(ordered) / len(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+        "max": ordered[-1],
+    }
+
+class PositionMonitorService:
+    """
+    Periodically refreshes every monitored wallet through MultiChainPositionMonitor
+
+    Wallets wait in a heap ordered by next-due time. Each wallet's interval
+    adapts to its risk: the base interval is scaled by its risk level, cut
+    further when its collateral is more volatile than usual, and capped so a
+    sigma_multiple collateral move cannot take it from its last health
+    factor to liquidation between two refreshes. Intervals get +/- jitter so
+    refreshes spread out instead of bursting. At most max_concurrency
+    refreshes run at once, and a wallet is never refreshed while its
+    previous refresh is still running. Refreshes run in incremental mode, so
+    chains whose balances did not change skip LLM parsing. After each
+    refresh the wallet's HF is projected forward under interest accrual, and
+    the wallet is due again no later than its projected alert-threshold
+    crossing. Listeners receive (address, analysis) after every refresh.
+    With an AlertEngine, each refreshed position is evaluated against the
+    wallet's alert threshold, and so is every price tick that moves one of
+    the monitor's positions across it (from the liquidation price index, or
+    every HF change without one); the engine's delivery worker runs with
+    the scheduler.
+    With an account_reader, every sweep_interval seconds the Pool's own
+    getUserAccountData HF of every monitored wallet is read, one Multicall
+    round trip per chain. These authoritative HFs are evaluated by the
+    AlertEngine, which then ignores the estimates of those positions while
+    the sweeps keep them current. A wallet whose on-chain HF fell below its threshold before
+    its last refresh saw it is made due at once.
+    """
+
+    def __init__(self, blockscout_client: BlockscoutMCPClient, interval_minutes: float = 2,
+                 max_concurrency: int = 4, jitter: float = 0.1, min_interval: float = 15.0,
+                 max_interval_factor: float = 4.0, sigma_multiple: float = 4.0,
+                 monitor: Optional[MultiChainPositionMonitor] = None,
+                 knowledge_graph: Optional[DeFiKnowledgeGraph] = None,
+                 alert_engine: Optional[AlertEngine] = None,
+                 account_reader: Optional[MulticallClient] = None,
+                 pool_addresses: Optional[Dict[str, str]] = None, sweep_interval: float = 30.0):
+        self.monitor = monitor or MultiChainPositionMonitor(blockscout_client)
+        self.alert_engine = alert_engine
+        hf_engine = getattr(self.monitor, "hf_engine", None)
+        self.liquidation_index = getattr(hf_engine, "liquidation_index", None)
+        if alert_engine is not None and self.liquidation_index is not None:
+            # Index each position at its owner's threshold and the recovery level; alerts come from crossings
+            self.liquidation_index.configure(alert_engine.default_threshold, alert_engine.hysteresis)
+            self.liquidation_index.subscribe(alert_engine.on_threshold_crossing)
+        elif alert_engine is not None and hf_engine is not None:
+            hf_engine.subscribe_updates(alert_engine.on_health_update)
+        self.knowledge_graph = knowledge_graph or self.monitor.hf_calculator.knowledge_graph
+        self.interval = interval_minutes * 60
+        self.max_concurrency = max_concurrency
+        self.jitter = jitter
+        self.min_interval = min(min_interval, self.interval)
+        self.max_interval = self.interval * max_interval_factor
+        self.sigma_multiple = sigma_multiple
+        self.account_reader = account_reader
+        # Chains whose Pool can be read directly
+        self.pool_addresses = {
+            chain_id: pool for chain_id, pool in (pool_addresses or {}).items()
+            if account_reader is not None and chain_id in account_reader.rpc_urls
+        }
+        self.sweep_interval = sweep_interval
+        if alert_engine is not None and self.pool_addresses:
+            # A swept position's estimates are ignored until its on-chain HF misses a few sweeps
+            alert_engine.onchain_ttl = 3 * sweep_interval
+        self.wallets: Dict[str, MonitoredWallet] = {}
+        self._queue: List = []  # Heap of (next_due, seq, wallet key); stale entries are skipped
+        self._seq = itertools.count()
+        self._listeners: List[Callable[[str, Dict[str, Any]], Any]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._sweep_task: Optional[asyncio.Task] = None
+        self._refreshes: set = set()
+        self._wakeup: Optional[asyncio.Event] = None
+
+        # Stats
+        self.started_at: Optional[float] = None
+        self.completed = 0
+        self.failed = 0
+        self.overlaps_prevented = 0
+        self.sweeps = 0
+        self.sweep_failures = 0
+        self.sweep_triggers = 0  # Refreshes brought forward by an on-chain HF below threshold
+        self._lags = deque(maxlen=500)  # Seconds between due time and actual start
+        self._durations = deque(maxlen=500)
+        self._completions = deque(maxlen=5000)  # Completion timestamps for throughput
+        self._by_risk_level: Dict[str, Dict[str, float]] = {}  # risk level -> refreshes, summed intervals
+        self._scheduled_seconds = 0.0  # Sum of chosen intervals, for the fixed-schedule baseline
+
+    @staticmethod
+    def _key(address: str) -> str:
+        return address.lower()
+
+    def subscribe(self, listener: Callable[[str, Dict[str, Any]], Any]):
+        """Register a (possibly async) callback invoked with (address, analysis) after each refresh"""
+        self._listeners.append(listener)
+
+    def add_monitored_address(self, address: str, chain_ids: Optional[List[str]] = None,
+                              alert_threshold: float = 1.2) -> MonitoredWallet:
+        """Start monitoring a wallet, or update its settings if already monitored"""
+        wallet = self.wallets.get(self._key(address))
+        if wallet is None:
+            wallet = MonitoredWallet(address, chain_ids, alert_threshold)
+            self.wallets[self._key(address)] = wallet
+            # Spread first refreshes over the jitter window so a restart does not burst
+            self._schedule(wallet, time.time() + random.uniform(0, self.interval * self.jitter))
+        else:
+            wallet.chain_ids = chain_ids
+            wallet.alert_threshold = alert_threshold
+        if self.alert_engine is not None:
+            self.alert_engine.set_threshold(address, alert_threshold)
+            if self.liquidation_index is not None:
+                self.liquidation_index.set_threshold(address, alert_threshold)
+        return wallet
+
+    def remove_monitored_address(self, address: str):
+        self.wallets.pop(self._key(address), None)
+        if self.alert_engine is not None:
+            self.alert_engine.forget_user(address)
+            if self.liquidation_index is not None:
+                self.liquidation_index.forget_user(address)
+        forget = getattr(self.monitor, "forget_wallet", None)
+        if forget is not None:
+            forget(address)
+
+    def trigger(self, address: str) -> bool:
+        """
+        Make a wallet due now
+
+        Returns:
+            False if the wallet is unknown or a refresh is already running
+        """
+        wallet = self.wallets.get(self._key(address))
+        if wallet is None:
+            return False
+        if wallet.running:
+            self.overlaps_prevented += 1
+            return False
+        self._schedule(wallet, time.time())
+        return True
+
+    def _wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _schedule(self, wallet: MonitoredWallet, due: float):
+        wallet.next_due = due
+        heapq.heappush(self._queue, (due, next(self._seq), self._key(wallet.address)))
+        self._wake()
+
+    def _is_stale(self, entry) -> bool:
+        due, _, key = entry
+        wallet = self.wallets.get(key)
+        return wallet is None or wallet.running or wallet.next_due != due
+
+    def _wallet_volatility(self, wallet: MonitoredWallet) -> Tuple[float, float]:
+        """
+        Ratio of realized to typical volatility of the wallet's most volatile
+        collateral, and that realized (or typical) annualized volatility
+        """
+        worst_ratio, worst_vol = 1.0, 0.0
+        for token in wallet.collateral_tokens:
+            typical = DEFAULT_VOLATILITIES.get(token.upper(), FALLBACK_VOLATILITY)
+            realized = price_fetcher.history.volatility(token, 24 * 3600)
+            vol = realized if realized is not None else typical
+            worst_ratio = max(worst_ratio, vol / typical)
+            worst_vol = max(worst_vol, vol)
+        return worst_ratio, worst_vol
+
+    def _next_interval(self, wallet: MonitoredWallet) -> float:
+        """Seconds until the wallet is due again, adapted to its risk"""
+        hf = wallet.last_health_factor
+        if hf is None or not math.isfinite(hf):
+            # Not analysed yet (or no debt): plain interval, or the longest if there is no debt
+            interval = self.interval if hf is None else self.max_interval
+        else:
+            risk_level = wallet.last_risk_level or self.knowledge_graph.get_risk_level(hf)
+            if hf >= VERY_SAFE_HEALTH_FACTOR:
+                interval = self.max_interval
+            else:
+                interval = self.interval * RISK_LEVEL_INTERVAL_FACTORS.get(risk_level, 1.0)
+
+            vol_ratio, vol = self._wallet_volatility(wallet)
+            interval /= vol_ratio
+            if hf > 1.0 and vol > 0:
+                # Time for a sigma_multiple move to cut collateral by the margin left above HF 1.0
+                margin = 1.0 - 1.0 / hf
+                interval = min(interval, SECONDS_PER_YEAR * (margin / (self.sigma_multiple * vol)) ** 2)
+            elif hf <= 1.0:
+                interval = self.min_interval
+            if wallet.time_to_threshold is not None and wallet.time_to_threshold > 0:
+                # Be refreshed by the time interest accrual alone takes it below the alert threshold
+                interval = min(interval, wallet.time_to_threshold)
+
+        interval = min(self.max_interval, max(self.min_interval, interval))
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def _next_wakeup(self, now: float) -> Optional[float]:
+        """Seconds to sleep before the next wallet is due; None to wait for a refresh to finish"""
+        while self._queue and self._is_stale(self._queue[0]):
+            heapq.heappop(self._queue)
+        if len(self._refreshes) >= self.max_concurrency:
+            return None
+        return max(0.0, self._queue[0][0] - now) if self._queue else self.interval
+
+    def _launch_due(self):
+        now = time.time()
+        while self._queue and len(self._refreshes) < self.max_concurrency:
+            entry = self._queue[0]
+            if entry[0] > now:
+                break
+            heapq.heappop(self._queue)
+            if self._is_stale(entry):
+                continue
+            wallet = self.wallets[entry[2]]
+            wallet.running = True
+            task = asyncio.ensure_future(self._refresh_wallet(wallet, due=entry[0]))
+            self._refreshes.add(task)
+            task.add_done_callback(self._refresh_done)
+
+    def _refresh_done(self, task: asyncio.Task):
+        self._refreshes.discard(task)
+        self._wake()
+
+    async def _refresh_wallet(self, wallet: MonitoredWallet, due: float):
+        started = time.time()
+        wallet.last_started = started
+        self._lags.append(max(0.0, started - due))
+        still_monitored = lambda: self.wallets.get(self._key(wallet.address)) is wallet
+        try:
+            analysis = await self.monitor.analyze_multi_chain_positions_llm(
+                wallet.address, wallet.chain_ids, incremental=True, track=still_monitored
+            )
+            risk = analysis.get("risk_assessment", {})
+            wallet.last_health_factor = risk.get("min_health_factor")
+            wallet.last_risk_level = risk.get("risk_level")
+            wallet.collateral_tokens = sorted({
+                asset["token"]
+                for position in analysis.get("positions", [])
+                for asset in position.get("supplied_assets", [])
+                if asset.get("token")
+            })
+            wallet.last_error = None
+            wallet.runs += 1
+            self.completed += 1
+
+            await self._project(wallet, analysis)
+            if not still_monitored():
+                return  # Removed while refreshing: no alerts or listeners for it
+
+            below_threshold = wallet.last_health_factor is not None and wallet.last_health_factor < wallet.alert_threshold
+            if self.alert_engine is not None:
+                for position in analysis.get("positions", []):
+                    if position.get("health_factor") is not None:
+                        self.alert_engine.evaluate(f"{wallet.address}:{position['chain_id']}",
+                                                   position["health_factor"], tick_at=started)
+            elif below_threshold:
+                print(f"🚨 {wallet.address}: health factor {wallet.last_health_factor:.2f} "
+                      f"below alert threshold {wallet.alert_threshold}")
+            if (not below_threshold and wallet.time_to_threshold is not None
+                    and wallet.time_to_threshold < PROJECTION_WARNING_SECONDS):
+                print(f"⏳ {wallet.address}: interest accrual takes health factor below {wallet.alert_threshold} "
+                      f"in {format_duration(wallet.time_to_threshold)} at current prices")
+
+            for listener in self._listeners:
+                try:
+                    result = listener(wallet.address, analysis)
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception as e:
+                    print(f"⚠️ Monitor listener failed for {wallet.address}: {e}")
+        except Exception as e:
+            wallet.failures += 1
+            wallet.last_error = str(e)
+            self.failed += 1
+            print(f"❌ Monitoring refresh failed for {wallet.address}: {e}")
+        finally:
+            finished = time.time()
+            wallet.last_duration = finished - started
+            self._durations.append(wallet.last_duration)
+            self._completions.append(finished)
+            wallet.running = False
+            wallet.last_interval = self._next_interval(wallet)
+            self._record_interval(wallet)
+            # Anchor on the due time so the schedule does not drift by the refresh duration
+            self._schedule(wallet, max(due + wallet.last_interval, finished))
+
+    async def _project(self, wallet: MonitoredWallet, analysis: Dict[str, Any]):
+        """Time until the wallet's positions cross HF 1.0 and its alert threshold from interest alone"""
+        positions = [p for p in analysis.get("positions", []) if p.get("borrowed_assets")]
+        wallet.time_to_liquidation = wallet.time_to_threshold = None
+        if not positions:
+            return
+        try:
+            rates = await reserve_rates(p.get("chain_id") for p in positions)
+            projection = project_positions(
+                positions, analysis.get("prices", {}), self.knowledge_graph, rates, wallet.alert_threshold
+            )
+            # None when the crossing is beyond the projection horizon
+            to_liquidation = float(projection.time_to_liquidation.min())
+            to_threshold = float(projection.time_to_threshold.min())
+            wallet.time_to_liquidation = to_liquidation if math.isfinite(to_liquidation) else None
+            wallet.time_to_threshold = to_threshold if math.isfinite(to_threshold) else None
+        except Exception as e:
+            print(f"⚠️ Liquidation projection failed for {wallet.address}: {e}")
+
+    def _record_interval(self, wallet: MonitoredWallet):
+        level = wallet.last_risk_level or "unknown"
+        stats = self._by_risk_level.setdefault(level, {"refreshes": 0, "interval_seconds": 0.0})
+        stats["refreshes"] += 1
+        stats["interval_seconds"] += wallet.last_interval
+        self._scheduled_seconds += wallet.last_interval
+
+    async def sweep_account_data(self) -> Dict[str, Dict[str, float]]:
+        """
+        Read the on-chain HF of every monitored wallet with debt
+
+        Returns:
+            {chain_id: {address: health factor}}
+        """
+        now = time.time()
+        sweep: Dict[str, Dict[str, float]] = {}
+        lowest: Dict[str, float] = {}
+        for chain_id, pool in self.pool_addresses.items():
+            wallets = [w for w in self.wallets.values() if w.chain_ids is None or chain_id in w.chain_ids]
+            if not wallets:
+                continue
+            try:
+                accounts = await self.account_reader.get_user_account_data(
+                    chain_id, pool, [w.address for w in wallets]
+                )
+            except Exception as e:
+                self.sweep_failures += 1
+                print(f"⚠️ On-chain account sweep failed on chain {chain_id}: {e}")
+                continue
+            for wallet in wallets:
+                account = accounts.get(self._key(wallet.address))
+                if account is None or not account.total_debt_base:
+                    continue
+                health_factor = account.health_factor
+                sweep.setdefault(chain_id, {})[wallet.address] = health_factor
+                key = self._key(wallet.address)
+                lowest[key] = min(lowest.get(key, health_factor), health_factor)
+                if self.alert_engine is not None:
+                    self.alert_engine.evaluate(f"{wallet.address}:{chain_id}", health_factor, tick_at=now,
+                                               onchain=True)
+
+        for key, wallet in self.wallets.items():
+            wallet.onchain_health_factor = lowest.get(key)
+            if key not in lowest or lowest[key] >= wallet.alert_threshold:
+                continue
+            # Already below at the last refresh: its adaptive interval is short anyway
+            if wallet.last_health_factor is None or wallet.last_health_factor >= wallet.alert_threshold:
+                if self.trigger(wallet.address):
+                    self.sweep_triggers += 1
+        self.sweeps += 1
+        return sweep
+
+    async def _sweep_periodically(self):
+        while True:
+            await self.sweep_account_data()
+            await asyncio.sleep(self.sweep_interval)
+
+    async def _run(self):
+        self._wakeup = asyncio.Event()
+        while True:
+            self._launch_due()
+            self._wakeup.clear()
+            try:
+                # With the budget exhausted, sleep until a refresh finishes
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._next_wakeup(time.time()))
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        """Start the scheduler on the running event loop"""
+        if self._task is None or self._task.done():
+            self.started_at = time.time()
+            self._task = asyncio.ensure_future(self._run())
+            if self.alert_engine is not None:
+                self.alert_engine.start()
+            if self.pool_addresses:
+                self._sweep_task = asyncio.ensure_future(self._sweep_periodically())
+            print(f"⏱️ Position monitoring started ({len(self.wallets)} wallets, every {self.interval / 60:g} min)")
+
+    async def stop(self):
+        """Stop scheduling and cancel in-flight refreshes"""
+        tasks = list(self._refreshes)
+        for task in (self._task, self._sweep_task):
+            if task is not None:
+                tasks.append(task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = self._sweep_task = None
+        self._wakeup = None
+        if self.alert_engine is not None:
+            await self.alert_engine.stop()
+        if self.account_reader is not None:
+            await self.account_reader.aclose()
+
+    def _adaptive_stats(self) -> Dict[str, Any]:
+        """
+        Evidence for risk-adaptive polling: refreshes made versus a fixed
+        schedule covering the same time, and the mean interval per risk level
+        """
+        refreshes = sum(stats["refreshes"] for stats in self._by_risk_level.values())
+        fixed_refreshes = self._scheduled_seconds / self.interval
+        return {
+            "base_interval_seconds": self.interval,
+            "refreshes": refreshes,
+            "fixed_schedule_refreshes": fixed_refreshes,
+            "upstream_calls_saved_ratio": 1 - refreshes / fixed_refreshes if fixed_refreshes else 0.0,
+            "by_risk_level": {
+                level: {
+                    "refreshes": stats["refreshes"],
+                    "mean_interval_seconds": stats["interval_seconds"] / stats["refreshes"],
+                }
+                for level, stats in self._by_risk_level.items()
+            },
+        }
+
+    def get_status(self, include_wallets: bool = False) -> Dict[str, Any]:
+        """Scheduler health: lag, throughput and backlog"""
+        now = time.time()
+        window = 5 * 60
+        recent = sum(1 for t in self._completions if t >= now - window)
+        elapsed = min(window, now - self.started_at) if self.started_at else 0.0
+        status = {
+            "running": self._task is not None and not self._task.done(),
+            "wallets": len(self.wallets),
+            "active_refreshes": len(self._refreshes),
+            "max_concurrency": self.max_concurrency,
+            "interval_seconds": self.interval,
+            "queued": len(self._queue),
+            "overdue_wallets": sum(1 for w in self.wallets.values() if not w.running and w.next_due < now),
+            "completed": self.completed,
+            "failed": self.failed,
+            "overlaps_prevented": self.overlaps_prevented,
+            "throughput_per_minute": recent / (elapsed / 60) if elapsed > 0 else 0.0,
+            "lag_seconds": _summary(self._lags),
+            "refresh_duration_seconds": _summary(self._durations),
+            "adaptive_polling": self._adaptive_stats(),
+        }
+        if hasattr(self.monitor, "get_change_detection_stats"):
+            status["change_detection"] = self.monitor.get_change_detection_stats()
+        if self.alert_engine is not None:
+            status["alerts"] = self.alert_engine.get_stats()
+        if self.pool_addresses:
+            status["onchain_sweep"] = {
+                "chains": sorted(self.pool_addresses),
+                "interval_seconds": self.sweep_interval,
+                "sweeps": self.sweeps,
+                "failures": self.sweep_failures,
+                "refreshes_triggered": self.sweep_triggers,
+                **self.account_reader.get_stats(),
+            }
+        if include_wallets:
+            status["wallet_states"] = [w.to_dict() for w in self.wallets.values()]
+        return status
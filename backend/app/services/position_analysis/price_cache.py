@@ -0,0 +1,142 @@
+"""
+Price Cache
+Size-bounded LRU + TTL store for price quotes with pinning and memory accounting
+"""
+
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, Optional, Set
+
+class PriceCache:
+    """
+    Bounded mapping of cache key -> PriceQuote
+
+    Entries older than max_age are dropped, and once max_entries is
+    exceeded the least recently used unpinned entry is evicted, so memory
+    stays flat however many tokens are seen. Pinned keys (core tokens) are
+    never evicted. Supports the dict operations the price fetcher uses.
+    """
+
+    def __init__(self, max_entries: int = 2000, max_age: float = 15 * 60, pinned: Iterable[str] = ()):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.pinned: Set[str] = set(pinned)
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._writes_since_purge = 0
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.lru_evictions = 0
+        self.ttl_evictions = 0
+        self.memory_bytes = 0
+
+    def pin(self, key: str):
+        self.pinned.add(key)
+
+    def unpin(self, key: str):
+        self.pinned.discard(key)
+
+    def _expired(self, quote) -> bool:
+        return time.time() - quote.fetched_at >= self.max_age
+
+    def get(self, key: str, default=None):
+        quote = self._entries.get(key)
+        if quote is None:
+            self.misses += 1
+            return default
+        if self._expired(quote) and key not in self.pinned:
+            self._remove(key)
+            self.ttl_evictions += 1
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return quote
+
+    def __getitem__(self, key: str):
+        quote = self.get(key)
+        if quote is None:
+            raise KeyError(key)
+        return quote
+
+    def __setitem__(self, key: str, quote):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = quote
+        self._sizes[key] = self._entry_size(key, quote)
+        self.memory_bytes += self._sizes[key]
+
+        self._writes_since_purge += 1
+        if self._writes_since_purge >= self.max_entries:
+            self.purge_expired()
+        while len(self._entries) > self.max_entries:
+            if not self._evict_lru():
+                break
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries))
+
+    def pop(self, key: str, default=None):
+        if key not in self._entries:
+            return default
+        quote = self._entries[key]
+        self._remove(key)
+        return quote
+
+    def clear(self):
+        self._entries.clear()
+        self._sizes.clear()
+        self.memory_bytes = 0
+
+    def purge_expired(self) -> int:
+        """Drop every expired unpinned entry"""
+        expired = [key for key, quote in self._entries.items() if key not in self.pinned and self._expired(quote)]
+        for key in expired:
+            self._remove(key)
+        self.ttl_evictions += len(expired)
+        self._writes_since_purge = 0
+        return len(expired)
+
+    def _evict_lru(self) -> bool:
+        for key in self._entries:
+            if key not in self.pinned:
+                self._remove(key)
+                self.lru_evictions += 1
+                return True
+        return False
+
+    def _remove(self, key: str):
+        del self._entries[key]
+        self.memory_bytes -= self._sizes.pop(key, 0)
+
+    @staticmethod
+    def _entry_size(key: str, quote) -> int:
+        """Approximate bytes held by an entry: key, quote object and its field values"""
+        size = sys.getsizeof(key) + sys.getsizeof(quote)
+        fields: Optional[dict] = getattr(quote, "__dict__", None)
+        if fields is not None:
+            size += sys.getsizeof(fields) + sum(sys.getsizeof(value) for value in fields.values())
+        return size
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "pinned": len(self.pinned),
+            "memory_bytes": self.memory_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "lru_evictions": self.lru_evictions,
+            "ttl_evictions": self.ttl_evictions,
+        }
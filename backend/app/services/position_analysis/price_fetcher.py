@@ -1,160 +1,652 @@
 """
 Real-Time Price Fetcher
-Fetches current token prices from external APIs for accurate health factor calculation
+Unified price oracle: one cache, one symbol registry and one fetch path for every consumer
 """
 
 import httpx
 import asyncio
-from typing import Dict, Optional, List
+import time
+from collections import deque
+from dataclasses import dataclass, asdict, field
+from typing import Any, Callable, Dict, Iterable, Optional, List, Set, Tuple
 import json
+from .token_registry import (
+    COINGECKO_PLATFORMS, TOKEN_REGISTRY, aave_underlying, get_token_info, get_fallback_price, normalize_symbol
+)
+from .coingecko_id_cache import CoinGeckoIdCache
+from .price_history import PriceHistory
+from .price_cache import PriceCache
+
+@dataclass
+class PriceQuote:
+    """A token price with its provenance"""
+    symbol: str
+    price: float
+    source: str  # coingecko, coingecko_contract, binance or fallback
+    fetched_at: float  # Unix timestamp of the upstream fetch
+
+    @property
+    def age(self) -> float:
+        """Seconds since the price was fetched upstream"""
+        return time.time() - self.fetched_at
+
+    def to_dict(self):
+        return {**asdict(self), "age": self.age}
+
+@dataclass
+class SourceStats:
+    """Latency and outcome counters for one upstream price source"""
+    requests: int = 0
+    failures: int = 0
+    wins: int = 0  # Symbols for which this source answered first
+    disagreements: int = 0  # Symbols where this source's price deviated from the winner beyond tolerance
+    latencies: deque = field(default_factory=lambda: deque(maxlen=500))
+
+    def to_dict(self, total_wins: int):
+        latencies = sorted(self.latencies)
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else None
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "wins": self.wins,
+            "win_rate": self.wins / total_wins if total_wins else 0.0,
+            "disagreements": self.disagreements,
+            "latency_p50": percentile(0.50),
+            "latency_p95": percentile(0.95),
+        }
 
 class PriceFetcher:
     """Fetches real-time token prices from external sources"""
-    
+
     def __init__(self):
         self.base_urls = {
             "coingecko": "https://api.coingecko.com/api/v3",
             "coinmarketcap": "https://pro-api.coinmarketcap.com/v1",
             "binance": "https://api.binance.com/api/v3"
         }
-        self.cache = {}
-        self.cache_duration = 60  # Cache prices for 60 seconds
-        
+        self.cache_duration = 60  # Soft TTL: older quotes are served stale and refreshed in the background
+        self.cache_max_age = 15 * 60  # Hard TTL: older quotes are never served
+        # Bounded LRU + TTL cache; registry (core) tokens are pinned
+        self.cache = PriceCache(max_entries=2000, max_age=self.cache_max_age, pinned=TOKEN_REGISTRY)
+        self.coingecko_batch_size = 50  # Ids per /simple/price request
+        self.request_timeout = 10.0
+        self.hedge_delay = 1.0  # Seconds before Binance is queried alongside a slow CoinGecko request
+        self.agreement_tolerance = 0.02  # Max relative deviation between sources before warning
+        self.source_stats: Dict[str, SourceStats] = {"coingecko": SourceStats(), "binance": SourceStats()}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop = None
+        self.id_cache = CoinGeckoIdCache()
+        self.history = PriceHistory()  # Recent ticks per symbol for realized volatility
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._background: Set[asyncio.Task] = set()
+        self._last_requested: Dict[str, float] = {}  # Requested symbol -> last request time
+        self._subscribers: List[Callable[[str, float], None]] = []
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared pooled HTTP client, recreated if the event loop changed"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=self.request_timeout,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def aclose(self):
+        """Close the shared HTTP client and write pending id resolutions"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self.id_cache.flush()
+
+    def subscribe(self, callback: Callable[[str, float], None]):
+        """Register a callback invoked with (symbol, price) for every newly fetched price"""
+        self._subscribers.append(callback)
+
+    def _publish(self, token_symbol: str, price: float):
+        """Notify subscribers of a newly fetched price"""
+        for callback in self._subscribers:
+            try:
+                callback(token_symbol, price)
+            except Exception as e:
+                print(f"⚠️ Price subscriber failed for {token_symbol}: {e}")
+
+    async def get_quotes(self, token_symbols: Iterable[str], allow_fallback: bool = False,
+                         critical: bool = False) -> Dict[str, PriceQuote]:
+        """
+        Get quotes for many tokens through the shared cache (stale-while-revalidate)
+
+        Quotes younger than cache_duration are reused. Quotes older than that
+        but younger than cache_max_age are served immediately while one
+        background refresh per symbol updates the cache. Only missing or
+        expired symbols are fetched inline, and a symbol already being
+        fetched by another caller is awaited rather than fetched again.
+
+        Args:
+            token_symbols: Token symbols in any case (e.g. "cbETH", "WETH")
+            allow_fallback: Use the registry's fallback price when no real
+                price younger than cache_max_age is available
+            critical: Query the secondary source immediately instead of after hedge_delay
+
+        Returns:
+            Quotes keyed by the symbols as requested; unpriced symbols are omitted.
+            Check quote.age to see how old a served price is.
+        """
+        requested = {symbol: normalize_symbol(symbol) for symbol in token_symbols if symbol}
+        now = time.time()
+        for symbol in requested:
+            self._last_requested[symbol] = now
+        if len(self._last_requested) > self.cache.max_entries:
+            self.hot_symbols(self.cache_max_age)  # Forget symbols not requested recently
+
+        to_fetch = []
+        to_refresh = []
+        waiting = {}
+        for symbol in set(requested.values()):
+            quote = self.cache.get(symbol)
+            if quote and quote.age < self.cache_duration:
+                continue
+            if quote and quote.age < self.cache_max_age:
+                # Stale but usable: serve it now, revalidate in the background
+                if symbol not in self._inflight:
+                    to_refresh.append(symbol)
+                continue
+            if symbol in self._inflight:
+                waiting[symbol] = self._inflight[symbol]
+            else:
+                to_fetch.append(symbol)
+
+        if to_refresh:
+            task = asyncio.ensure_future(self._refresh(to_refresh))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+        if to_fetch:
+            await self._refresh(to_fetch, critical)
+
+        if waiting:
+            await asyncio.gather(*waiting.values())
+
+        quotes = {}
+        for original, symbol in requested.items():
+            quote = self.cache.get(symbol)
+            if quote and quote.age >= self.cache_max_age:
+                quote = None
+            if quote is None and allow_fallback:
+                fallback_price = get_fallback_price(symbol)
+                if fallback_price is not None:
+                    quote = PriceQuote(symbol, fallback_price, "fallback", time.time())
+                    print(f"  ⚠️ Using fallback price for {symbol}: ${fallback_price:.2f}")
+            if quote:
+                quotes[original] = quote
+        return quotes
+
+    @staticmethod
+    def address_key(chain_id: str, token_address: str) -> str:
+        """Cache key for a token priced by contract address"""
+        return f"{chain_id}:{token_address.lower()}"
+
+    async def get_quotes_by_address(self, chain_id: str, tokens: Iterable[Tuple[str, str]],
+                                    allow_fallback: bool = False) -> Dict[str, PriceQuote]:
+        """
+        Get quotes for tokens on one chain by contract address
+
+        Tokens on chains CoinGecko indexes are priced with batched
+        /simple/token_price requests, which avoids /search resolving a
+        bridged or look-alike symbol to the wrong coin. Aave aTokens are
+        priced by their own contract, then as their underlying asset; debt
+        tokens and tokens on testnets are priced as their (underlying)
+        symbol, unless the id cache maps their contract to a CoinGecko id
+        (e.g. bundled registry addresses). A contract priced through its
+        symbol's CoinGecko id is recorded in the id cache under its address,
+        so later runs price it by that id directly. Results live in the
+        shared cache under address_key().
+
+        Args:
+            chain_id: Chain the tokens live on
+            tokens: (token_symbol, token_address) pairs as reported by Blockscout
+            allow_fallback: Use registry fallback prices for symbol-priced tokens
+
+        Returns:
+            Quotes keyed by lowercased token address; quote.symbol is the underlying symbol
+        """
+        platform = COINGECKO_PLATFORMS.get(str(chain_id))
+        quotes = {}
+        by_contract = {}  # address -> underlying symbol
+        by_symbol = {}  # address -> underlying symbol
+        for token_symbol, token_address in tokens:
+            if not token_address or not token_symbol:
+                continue
+            address = token_address.lower()
+            aave_token = aave_underlying(token_symbol)
+            symbol, is_debt = aave_token if aave_token else (token_symbol, False)
+
+            cached = self.cache.get(self.address_key(chain_id, address))
+            if cached and cached.age < self.cache_duration:
+                quotes[address] = cached
+            elif platform and not is_debt:
+                by_contract[address] = symbol
+            else:
+                by_symbol[address] = symbol
+
+        if by_contract:
+            prices = await self._fetch_token_prices(platform, list(by_contract))
+            fetched_at = time.time()
+            for address, symbol in by_contract.items():
+                if prices.get(address):
+                    quotes[address] = PriceQuote(normalize_symbol(symbol), float(prices[address]),
+                                                 "coingecko_contract", fetched_at)
+                    self.cache[self.address_key(chain_id, address)] = quotes[address]
+                else:
+                    by_symbol[address] = symbol
+
+        address_ids = self._resolve_address_ids(chain_id, by_symbol)
+        if address_ids:
+            # Contracts with a known CoinGecko id are priced by it rather than by their symbol
+            prices = await self._fetch_from_coingecko(list(set(address_ids.values())))
+            fetched_at = time.time()
+            for address, token_id in address_ids.items():
+                if prices.get(token_id):
+                    quotes[address] = PriceQuote(normalize_symbol(by_symbol.pop(address)), float(prices[token_id]),
+                                                 "coingecko", fetched_at)
+                    self.cache[self.address_key(chain_id, address)] = quotes[address]
+
+        if by_symbol:
+            symbol_quotes = await self.get_quotes(set(by_symbol.values()), allow_fallback)
+            for address, symbol in by_symbol.items():
+                if symbol in symbol_quotes:
+                    quotes[address] = symbol_quotes[symbol]
+                    # Remembered per address too, so unlisted contracts aren't retried every call
+                    if symbol_quotes[symbol].source != "fallback":
+                        self.cache[self.address_key(chain_id, address)] = symbol_quotes[symbol]
+                    if symbol_quotes[symbol].source == "coingecko":
+                        self._store_address_id(chain_id, address, symbol)
+
+        return quotes
+
+    async def get_prices_for_balances(self, chain_tokens: List[Dict[str, Any]]) -> Dict[str, float]:
+        """
+        Price Blockscout token balances by contract address, chain by chain
+
+        Args:
+            chain_tokens: [{"chain_id": ..., "tokens_balances": [{"token_symbol", "token_address", ...}]}]
+
+        Returns:
+            Prices keyed by both the held symbol (e.g. aEthWETH) and its underlying symbol (WETH)
+        """
+        quotes = await asyncio.gather(*(
+            self.get_quotes_by_address(
+                chain_data["chain_id"],
+                [(token.get("token_symbol", ""), token.get("token_address", ""))
+                 for token in chain_data.get("tokens_balances", [])]
+            )
+            for chain_data in chain_tokens
+        ))
+
+        priced = []
+        for chain_data, chain_quotes in zip(chain_tokens, quotes):
+            for token in chain_data.get("tokens_balances", []):
+                quote = chain_quotes.get((token.get("token_address") or "").lower())
+                if quote:
+                    priced.append((token["token_symbol"], quote))
+
+        # Contract prices take precedence over symbol prices for a shared underlying
+        priced.sort(key=lambda item: item[1].source != "coingecko_contract")
+        prices = {}
+        for token_symbol, quote in priced:
+            prices.setdefault(token_symbol, quote.price)
+            aave_token = aave_underlying(token_symbol)
+            if aave_token:
+                prices.setdefault(aave_token[0], quote.price)
+        return prices
+
+    async def _fetch_token_prices(self, platform: str, addresses: List[str]) -> Dict[str, float]:
+        """USD prices for contract addresses on one platform, with concurrent chunked requests"""
+        chunks = [
+            addresses[i:i + self.coingecko_batch_size]
+            for i in range(0, len(addresses), self.coingecko_batch_size)
+        ]
+        results = await asyncio.gather(*(self._fetch_token_price_chunk(platform, chunk) for chunk in chunks),
+                                       return_exceptions=True)
+
+        prices = {}
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, Exception):
+                print(f"CoinGecko token price fetch failed on {platform} for {len(chunk)} tokens: {result}")
+                continue
+            prices.update(result)
+        return prices
+
+    async def _fetch_token_price_chunk(self, platform: str, addresses: List[str]) -> Dict[str, float]:
+        """One /simple/token_price request for a chunk of contract addresses"""
+        url = f"{self.base_urls['coingecko']}/simple/token_price/{platform}"
+        params = {
+            "contract_addresses": ",".join(addresses),
+            "vs_currencies": "usd"
+        }
+
+        response = await self._get_client().get(url, params=params)
+        response.raise_for_status()
+        data = response.json()
+
+        return {
+            address.lower(): values["usd"]
+            for address, values in data.items()
+            if "usd" in values
+        }
+
+    def hot_symbols(self, window: float, limit: Optional[int] = None) -> List[str]:
+        """
+        Symbols requested within the last window seconds, most recent first
+
+        Symbols are returned as callers spelled them; older entries are forgotten.
+        """
+        cutoff = time.time() - window
+        for symbol in [s for s, t in self._last_requested.items() if t < cutoff]:
+            del self._last_requested[symbol]
+        hot = sorted(self._last_requested, key=self._last_requested.get, reverse=True)
+        return hot[:limit] if limit else hot
+
+    async def refresh(self, token_symbols: Iterable[str]) -> Dict[str, PriceQuote]:
+        """
+        Refetch tokens upstream regardless of cache age, in one batched call
+
+        Symbols already being fetched are awaited rather than fetched again.
+
+        Returns:
+            Cached quotes keyed by the symbols as requested
+        """
+        requested = {symbol: normalize_symbol(symbol) for symbol in token_symbols if symbol}
+        normalized = set(requested.values())
+        waiting = [self._inflight[symbol] for symbol in normalized if symbol in self._inflight]
+        to_fetch = [symbol for symbol in normalized if symbol not in self._inflight]
+
+        if to_fetch:
+            await self._refresh(to_fetch)
+        if waiting:
+            await asyncio.gather(*waiting)
+
+        quotes = {}
+        for original, symbol in requested.items():
+            quote = self.cache.get(symbol)
+            if quote:
+                quotes[original] = quote
+        return quotes
+
+    async def _refresh(self, symbols: List[str], critical: bool = False):
+        """Fetch symbols upstream into the cache, marking them in flight meanwhile"""
+        loop = asyncio.get_event_loop()
+        futures = {symbol: loop.create_future() for symbol in symbols}
+        self._inflight.update(futures)
+        try:
+            fetched = await self._fetch_quotes(symbols, critical)
+            for symbol, quote in fetched.items():
+                self.cache[symbol] = quote
+                self.history.record(symbol, quote.price, quote.fetched_at)
+                self._publish(symbol, quote.price)
+        except Exception as e:
+            # A failed refresh keeps the previous quotes in the cache
+            print(f"Price refresh failed for {symbols}: {e}")
+        finally:
+            for symbol, future in futures.items():
+                self._inflight.pop(symbol, None)
+                if not future.done():
+                    future.set_result(None)
+
+    async def get_quote(self, token_symbol: str, allow_fallback: bool = False) -> Optional[PriceQuote]:
+        """Get a quote for a single token"""
+        quotes = await self.get_quotes([token_symbol], allow_fallback)
+        return quotes.get(token_symbol)
+
     async def get_price(self, token_symbol: str) -> Optional[float]:
         """
         Get current price for a token
-        
+
         Args:
             token_symbol: Token symbol (e.g., "ETH", "USDC", "WBTC")
-            
+
         Returns:
             Current price in USD or None if not found
         """
-        # Check cache first
-        if token_symbol in self.cache:
-            cached_price, timestamp = self.cache[token_symbol]
-            if asyncio.get_event_loop().time() - timestamp < self.cache_duration:
-                return cached_price
-        
-        # Try multiple sources
-        price = None
-        
-        # Try CoinGecko first (free, no API key needed)
-        try:
-            price = await self._fetch_from_coingecko(token_symbol)
-        except Exception as e:
-            print(f"CoinGecko fetch failed for {token_symbol}: {e}")
-        
-        # Try Binance as fallback
-        if not price:
-            try:
-                price = await self._fetch_from_binance(token_symbol)
-            except Exception as e:
-                print(f"Binance fetch failed for {token_symbol}: {e}")
-        
-        # Cache the result
-        if price:
-            self.cache[token_symbol] = (price, asyncio.get_event_loop().time())
-        
-        return price
-    
+        quote = await self.get_quote(token_symbol)
+        return quote.price if quote else None
+
     async def get_prices_batch(self, token_symbols: List[str]) -> Dict[str, float]:
         """Get prices for multiple tokens at once"""
+        quotes = await self.get_quotes(token_symbols)
+        return {symbol: quote.price for symbol, quote in quotes.items()}
+
+    async def _fetch_quotes(self, symbols: List[str], critical: bool = False) -> Dict[str, PriceQuote]:
+        """
+        Fetch fresh quotes for normalized symbols from upstream sources (hedged)
+
+        CoinGecko is queried first with chunked multi-id requests. If it has
+        not answered after hedge_delay (immediately when critical), Binance
+        is queried in parallel for the symbols it lists, and the first valid
+        price per symbol wins. A losing source that still answers is compared
+        against the winner and deviations beyond agreement_tolerance are
+        reported. Symbols CoinGecko could not price fall back to Binance.
+        """
+        quotes: Dict[str, PriceQuote] = {}
+        hedgeable = [symbol for symbol in symbols if self._binance_ticker(symbol)]
+
+        primary = asyncio.ensure_future(self._timed("coingecko", self._fetch_coingecko_quotes(symbols)))
+        secondary = None
+        if hedgeable:
+            done, _ = await asyncio.wait({primary}, timeout=0 if critical else self.hedge_delay)
+            if not done:
+                secondary = asyncio.ensure_future(self._timed("binance", self._fetch_binance_quotes(hedgeable)))
+
+        pending = {task for task in (primary, secondary) if task is not None}
+        while pending and len(quotes) < len(symbols):
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                self._merge_quotes(quotes, task.result())
+
+        if pending:
+            # Let the losing source finish in the background for the agreement check
+            for task in pending:
+                task.add_done_callback(lambda t: self._merge_quotes(quotes, t.result()))
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+        elif secondary is None:
+            # CoinGecko answered before the hedge, use Binance for its misses
+            misses = [symbol for symbol in hedgeable if symbol not in quotes]
+            if misses:
+                self._merge_quotes(quotes, await self._timed("binance", self._fetch_binance_quotes(misses)))
+
+        return quotes
+
+    def _merge_quotes(self, quotes: Dict[str, PriceQuote], result: Dict[str, PriceQuote]):
+        """Keep the first quote per symbol, recording wins and cross-source disagreements"""
+        for symbol, quote in result.items():
+            winner = quotes.get(symbol)
+            if winner is None:
+                quotes[symbol] = quote
+                self.source_stats[quote.source].wins += 1
+                continue
+            reference = min(winner.price, quote.price)
+            if reference > 0 and abs(winner.price - quote.price) / reference > self.agreement_tolerance:
+                self.source_stats[quote.source].disagreements += 1
+                print(f"  ⚠️ Price sources disagree for {symbol}: {winner.source} ${winner.price:.4f} "
+                      f"vs {quote.source} ${quote.price:.4f}")
+
+    async def _timed(self, source: str, fetch) -> Dict[str, PriceQuote]:
+        """Await a source fetch, recording its latency and failures; failures yield no quotes"""
+        stats = self.source_stats[source]
+        stats.requests += 1
+        started = time.perf_counter()
+        try:
+            return await fetch
+        except Exception as e:
+            stats.failures += 1
+            print(f"{source} price fetch failed: {e}")
+            return {}
+        finally:
+            stats.latencies.append(time.perf_counter() - started)
+
+    async def _fetch_coingecko_quotes(self, symbols: List[str]) -> Dict[str, PriceQuote]:
+        """Resolve symbols to CoinGecko ids and price them with multi-id requests"""
+        ids = await self._resolve_coingecko_ids(symbols)
+        prices = await self._fetch_from_coingecko(list(set(ids.values())))
+        fetched_at = time.time()
+        return {
+            symbol: PriceQuote(symbol, float(prices[token_id]), "coingecko", fetched_at)
+            for symbol, token_id in ids.items()
+            if prices.get(token_id)
+        }
+
+    async def _fetch_binance_quotes(self, symbols: List[str]) -> Dict[str, PriceQuote]:
+        """Price symbols with concurrent Binance ticker requests"""
+        results = await asyncio.gather(
+            *(self._fetch_from_binance(symbol) for symbol in symbols), return_exceptions=True
+        )
+        quotes = {}
+        for symbol, price in zip(symbols, results):
+            if isinstance(price, Exception):
+                print(f"Binance fetch failed for {symbol}: {price}")
+            elif price:
+                quotes[symbol] = PriceQuote(symbol, float(price), "binance", time.time())
+        return quotes
+
+    def get_source_stats(self) -> Dict[str, Dict]:
+        """Per-source request, failure, win-rate, disagreement and latency metrics"""
+        total_wins = sum(stats.wins for stats in self.source_stats.values())
+        return {source: stats.to_dict(total_wins) for source, stats in self.source_stats.items()}
+
+    async def _resolve_coingecko_ids(self, symbols: List[str]) -> Dict[str, str]:
+        """
+        Map symbols to CoinGecko ids
+
+        Uses the token registry, then the persistent id cache; only tokens
+        never resolved before (or whose negative result expired) are looked
+        up with the search API, concurrently.
+        """
+        ids = {}
+        unknown = []
+        for symbol in symbols:
+            info = get_token_info(symbol)
+            if info and info.coingecko_id:
+                ids[symbol] = info.coingecko_id
+                continue
+            hit, token_id = self.id_cache.lookup(symbol)
+            if hit:
+                if token_id:
+                    ids[symbol] = token_id
+            else:
+                unknown.append(symbol)
+
+        if unknown:
+            found = await asyncio.gather(*(self._search_coingecko_id(symbol) for symbol in unknown),
+                                         return_exceptions=True)
+            for symbol, token_id in zip(unknown, found):
+                if isinstance(token_id, Exception):
+                    # Transient failure, don't record a negative result
+                    print(f"  ⚠️ CoinGecko search failed for {symbol}: {token_id}")
+                    continue
+                self.id_cache.store(token_id, symbol=symbol)
+                if token_id:
+                    ids[symbol] = token_id
+        return ids
+
+    def _resolve_address_ids(self, chain_id: str, tokens: Dict[str, str]) -> Dict[str, str]:
+        """CoinGecko ids of contract addresses from the id cache's address entries, e.g. bundled registry addresses"""
+        ids = {}
+        for address in tokens:
+            _, token_id = self.id_cache.lookup(chain_id=str(chain_id), address=address)
+            if token_id:
+                ids[address] = token_id
+        return ids
+
+    def _store_address_id(self, chain_id: str, address: str, symbol: str):
+        """Record the CoinGecko id a contract was priced by, unless its address is already resolved"""
+        hit, _ = self.id_cache.lookup(chain_id=str(chain_id), address=address)
+        if hit:
+            return
+        info = get_token_info(symbol)
+        token_id = info.coingecko_id if info and info.coingecko_id else self.id_cache.lookup(symbol)[1]
+        if token_id:
+            self.id_cache.store(token_id, chain_id=str(chain_id), address=address)
+
+    async def _search_coingecko_id(self, token_symbol: str) -> Optional[str]:
+        """Find a CoinGecko id for a token with the search API, None if there is no match"""
+        search_url = f"{self.base_urls['coingecko']}/search"
+        search_params = {"query": token_symbol.lower()}
+        search_response = await self._get_client().get(search_url, params=search_params)
+        search_response.raise_for_status()
+        search_data = search_response.json()
+
+        if search_data.get("coins") and len(search_data["coins"]) > 0:
+            # Use the first result
+            token_id = search_data["coins"][0]["id"]
+            print(f"  🔍 Found CoinGecko ID for {token_symbol}: {token_id}")
+            return token_id
+        return None
+
+    async def _fetch_from_coingecko(self, token_ids: List[str]) -> Dict[str, float]:
+        """Fetch USD prices for many CoinGecko ids with concurrent chunked requests"""
+        chunks = [
+            token_ids[i:i + self.coingecko_batch_size]
+            for i in range(0, len(token_ids), self.coingecko_batch_size)
+        ]
+        results = await asyncio.gather(*(self._fetch_coingecko_chunk(chunk) for chunk in chunks),
+                                       return_exceptions=True)
+
         prices = {}
-        for symbol in token_symbols:
-            price = await self.get_price(symbol)
-            if price:
-                prices[symbol] = price
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, Exception):
+                print(f"CoinGecko fetch failed for {chunk}: {result}")
+                continue
+            prices.update(result)
         return prices
-    
-    async def _fetch_from_coingecko(self, token_symbol: str) -> Optional[float]:
-        """Fetch price from CoinGecko API"""
-        async with httpx.AsyncClient() as client:
-            # Map token symbols to CoinGecko IDs
-            token_map = {
-                "ETH": "ethereum",
-                "USDC": "usd-coin",
-                "USDT": "tether",
-                "DAI": "dai",
-                "WBTC": "wrapped-bitcoin",
-                "LINK": "chainlink",
-                "UNI": "uniswap",
-                "AAVE": "aave",
-                "WETH": "ethereum",
-                "CBETH": "coinbase-wrapped-staked-eth",
-                "STETH": "staked-ether",
-                "RETH": "rocket-pool-eth",
-                "WSTETH": "wrapped-steth"
-            }
-            
-            token_id = token_map.get(token_symbol.upper())
-            if not token_id:
-                # Try CoinGecko search API for unknown tokens
-                try:
-                    search_url = f"{self.base_urls['coingecko']}/search"
-                    search_params = {"query": token_symbol.lower()}
-                    search_response = await client.get(search_url, params=search_params, timeout=10.0)
-                    search_response.raise_for_status()
-                    search_data = search_response.json()
-                    
-                    if search_data.get("coins") and len(search_data["coins"]) > 0:
-                        # Use the first result
-                        token_id = search_data["coins"][0]["id"]
-                        print(f"  🔍 Found CoinGecko ID for {token_symbol}: {token_id}")
-                except Exception as e:
-                    print(f"  ⚠️ CoinGecko search failed for {token_symbol}: {e}")
-                    return None
-            
-            url = f"{self.base_urls['coingecko']}/simple/price"
-            params = {
-                "ids": token_id,
-                "vs_currencies": "usd"
-            }
-            
-            response = await client.get(url, params=params, timeout=10.0)
-            response.raise_for_status()
-            data = response.json()
-            
-            if token_id in data and "usd" in data[token_id]:
-                return data[token_id]["usd"]
-            
-        return None
-    
+
+    async def _fetch_coingecko_chunk(self, token_ids: List[str]) -> Dict[str, float]:
+        """One /simple/price request for a chunk of ids"""
+        url = f"{self.base_urls['coingecko']}/simple/price"
+        params = {
+            "ids": ",".join(token_ids),
+            "vs_currencies": "usd"
+        }
+
+        response = await self._get_client().get(url, params=params)
+        response.raise_for_status()
+        data = response.json()
+
+        return {
+            token_id: data[token_id]["usd"]
+            for token_id in token_ids
+            if token_id in data and "usd" in data[token_id]
+        }
+
+    @staticmethod
+    def _binance_ticker(token_symbol: str) -> Optional[str]:
+        info = get_token_info(token_symbol)
+        return info.binance_ticker if info else None
+
     async def _fetch_from_binance(self, token_symbol: str) -> Optional[float]:
         """Fetch price from Binance API"""
-        async with httpx.AsyncClient() as client:
-            # Map to Binance trading pairs
-            ticker_map = {
-                "ETH": "ETHUSDT",
-                "USDC": "USDCUSDT",
-                "USDT": "USDTUSD",
-                "WBTC": "WBTCUSDT",
-                "LINK": "LINKUSDT",
-                "UNI": "UNIUSDT",
-                "AAVE": "AAVEUSDT"
-            }
-            
-            ticker = ticker_map.get(token_symbol.upper())
-            if not ticker:
-                return None
-            
-            url = f"{self.base_urls['binance']}/ticker/price"
-            params = {"symbol": ticker}
-            
-            response = await client.get(url, params=params, timeout=10.0)
-            response.raise_for_status()
-            data = response.json()
-            
-            if "price" in data:
-                return float(data["price"])
-            
+        ticker = self._binance_ticker(token_symbol)
+        if not ticker:
+            return None
+
+        url = f"{self.base_urls['binance']}/ticker/price"
+        params = {"symbol": ticker}
+
+        response = await self._get_client().get(url, params=params)
+        response.raise_for_status()
+        data = response.json()
+
+        if "price" in data:
+            return float(data["price"])
+
         return None
-    
+
     def get_cached_price(self, token_symbol: str) -> Optional[float]:
         """Get cached price without making API call"""
-        if token_symbol in self.cache:
-            return self.cache[token_symbol][0]
-        return None
+        quote = self.cache.get(normalize_symbol(token_symbol))
+        return quote.price if quote else None
 
 # Global instance
 price_fetcher = PriceFetcher()
@@ -167,3 +659,8 @@ async def get_price(token_symbol: str) -> Optional[float]:
 async def get_prices_batch(token_symbols: List[str]) -> Dict[str, float]:
     """Get prices for multiple tokens"""
     return await price_fetcher.get_prices_batch(token_symbols)
+
+async def get_quotes(token_symbols: List[str], allow_fallback: bool = False,
+                     critical: bool = False) -> Dict[str, PriceQuote]:
+    """Get quotes with source and age metadata for multiple tokens"""
+    return await price_fetcher.get_quotes(token_symbols, allow_fallback, critical)
@@ -0,0 +1,151 @@
+"""
+Price History
+Fixed-memory per-token ring buffers of recent price ticks with vectorized risk metrics
+"""
+
+from typing import Dict, Iterable, Optional, Tuple
+import numpy as np
+from .token_registry import normalize_symbol
+
+SECONDS_PER_YEAR = 365.0 * 24 * 3600
+
+class PriceRingBuffer:
+    """
+    Ring buffer of (timestamp, price) ticks backed by preallocated arrays
+
+    Appends are O(1) and never allocate; once full the oldest tick is
+    overwritten. Metrics operate on array views in chronological order.
+    """
+
+    def __init__(self, capacity: int = 512):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.prices = np.zeros(capacity, dtype=np.float64)
+        self.head = 0  # Next write position
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, price: float, timestamp: float):
+        """Record a tick; ticks not newer than the last one are ignored"""
+        if price <= 0:
+            return
+        if self.count and timestamp <= self.timestamps[(self.head - 1) % self.capacity]:
+            return
+        self.timestamps[self.head] = timestamp
+        self.prices[self.head] = price
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def latest(self) -> Optional[Tuple[float, float]]:
+        """Most recent (timestamp, price), None if empty"""
+        if not self.count:
+            return None
+        i = (self.head - 1) % self.capacity
+        return float(self.timestamps[i]), float(self.prices[i])
+
+    def window(self, seconds: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ticks in chronological order, optionally only the last `seconds` seconds
+
+        Returns:
+            (timestamps, prices) arrays
+        """
+        if self.count < self.capacity:
+            timestamps, prices = self.timestamps[:self.count], self.prices[:self.count]
+        else:
+            order = np.r_[self.head:self.capacity, 0:self.head]
+            timestamps, prices = self.timestamps[order], self.prices[order]
+
+        if seconds is not None and len(timestamps):
+            start = np.searchsorted(timestamps, timestamps[-1] - seconds, side="left")
+            timestamps, prices = timestamps[start:], prices[start:]
+        return timestamps, prices
+
+    def log_returns(self, seconds: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Log returns between consecutive ticks
+
+        Returns:
+            (returns, interval lengths in seconds)
+        """
+        timestamps, prices = self.window(seconds)
+        return np.diff(np.log(prices)), np.diff(timestamps)
+
+    def volatility(self, seconds: Optional[float] = None) -> Optional[float]:
+        """
+        Annualized realized volatility over the window
+
+        Uses the sum of squared log returns over the elapsed time, so
+        irregularly spaced ticks are weighted correctly.
+        """
+        returns, intervals = self.log_returns(seconds)
+        elapsed = intervals.sum()
+        if len(returns) < 2 or elapsed <= 0:
+            return None
+        return float(np.sqrt(np.dot(returns, returns) / elapsed * SECONDS_PER_YEAR))
+
+    def max_drawdown(self, seconds: Optional[float] = None) -> float:
+        """Largest peak-to-trough decline over the window, as a positive fraction"""
+        _, prices = self.window(seconds)
+        if len(prices) < 2:
+            return 0.0
+        peaks = np.maximum.accumulate(prices)
+        return float(np.max(1.0 - prices / peaks))
+
+    def change(self, seconds: Optional[float] = None) -> Optional[float]:
+        """Simple return from the first to the last tick of the window"""
+        _, prices = self.window(seconds)
+        if len(prices) < 2:
+            return None
+        return float(prices[-1] / prices[0] - 1.0)
+
+class PriceHistory:
+    """
+    Per-token ring buffers fed from fetched prices
+
+    Memory is bounded by max_tokens * capacity ticks; tokens beyond
+    max_tokens are not tracked.
+    """
+
+    def __init__(self, capacity: int = 512, max_tokens: int = 500):
+        self.capacity = capacity
+        self.max_tokens = max_tokens
+        self.buffers: Dict[str, PriceRingBuffer] = {}
+
+    def record(self, symbol: str, price: float, timestamp: float):
+        symbol = normalize_symbol(symbol)
+        buffer = self.buffers.get(symbol)
+        if buffer is None:
+            if len(self.buffers) >= self.max_tokens:
+                return
+            buffer = self.buffers[symbol] = PriceRingBuffer(self.capacity)
+        buffer.append(price, timestamp)
+
+    def get(self, symbol: str) -> Optional[PriceRingBuffer]:
+        return self.buffers.get(normalize_symbol(symbol))
+
+    def volatility(self, symbol: str, seconds: Optional[float] = None) -> Optional[float]:
+        buffer = self.get(symbol)
+        return buffer.volatility(seconds) if buffer else None
+
+    def max_drawdown(self, symbol: str, seconds: Optional[float] = None) -> float:
+        buffer = self.get(symbol)
+        return buffer.max_drawdown(seconds) if buffer else 0.0
+
+    def change(self, symbol: str, seconds: Optional[float] = None) -> Optional[float]:
+        buffer = self.get(symbol)
+        return buffer.change(seconds) if buffer else None
+
+    def volatilities(self, symbols: Iterable[str], seconds: Optional[float] = None) -> Dict[str, float]:
+        """Realized annualized volatility per symbol, omitting symbols without enough history"""
+        result = {}
+        for symbol in symbols:
+            vol = self.volatility(symbol, seconds)
+            if vol is not None:
+                result[symbol] = vol
+        return result
+
+    def memory_bytes(self) -> int:
+        return sum(b.timestamps.nbytes + b.prices.nbytes for b in self.buffers.values())
@@ -0,0 +1,130 @@
+"""
+Hot-Set Price Streamer
+Keeps recently requested tokens warm in the price cache and pushes refreshed prices to subscribers
+"""
+
+import asyncio
+import time
+import weakref
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .price_fetcher import PriceFetcher, price_fetcher as default_price_fetcher
+
+class HotPriceStreamer:
+    """
+    Background refresher for the hot token set
+
+    Every interval seconds, the tokens requested within the last hot_window
+    seconds (plus any pinned tokens) are refetched in one batched call, so
+    user requests find warm prices instead of blocking on price I/O. The
+    interval should stay below the fetcher's cache_duration.
+
+    Subscribers receive a {symbol: price} dict per refresh cycle, keyed by
+    symbols as callers requested them. Bound methods are held weakly, so a
+    short-lived owner (e.g. a per-request monitor's HF engine) can subscribe
+    without being kept alive.
+    """
+
+    def __init__(self, fetcher: Optional[PriceFetcher] = None, interval: float = 30.0,
+                 hot_window: float = 10 * 60, max_tokens: int = 200,
+                 pinned: Iterable[str] = ("WETH", "USDC", "WBTC")):
+        self.fetcher = fetcher or default_price_fetcher
+        self.interval = interval
+        self.hot_window = hot_window
+        self.max_tokens = max_tokens
+        self.pinned = list(pinned)
+        self._subscribers: List[Callable[[], Optional[Callable[[Dict[str, float]], None]]]] = []
+        self._task: Optional[asyncio.Task] = None
+
+        # Stats
+        self.cycles = 0
+        self.last_cycle_at: Optional[float] = None
+        self.last_cycle_duration = 0.0
+        self.last_hot_set_size = 0
+
+    def subscribe(self, callback: Callable[[Dict[str, float]], None]):
+        """Register a callback invoked with the prices refreshed in each cycle"""
+        if hasattr(callback, "__self__"):
+            self._subscribers.append(weakref.WeakMethod(callback))
+        else:
+            self._subscribers.append(lambda: callback)
+
+    def _publish(self, prices: Dict[str, float]):
+        alive = []
+        for ref in self._subscribers:
+            callback = ref()
+            if callback is None:
+                continue
+            alive.append(ref)
+            try:
+                callback(prices)
+            except Exception as e:
+                print(f"⚠️ Price stream subscriber failed: {e}")
+        self._subscribers = alive
+
+    def hot_set(self) -> List[str]:
+        """Tokens refreshed in the next cycle"""
+        hot = self.fetcher.hot_symbols(self.hot_window, self.max_tokens)
+        seen = {symbol.upper() for symbol in hot}
+        return hot + [symbol for symbol in self.pinned if symbol.upper() not in seen]
+
+    async def refresh_once(self) -> Dict[str, float]:
+        """Refresh the hot set once and publish the prices that were actually refetched"""
+        started = time.time()
+        symbols = self.hot_set()
+        prices = {}
+        if symbols:
+            quotes = await self.fetcher.refresh(symbols)
+            prices = {
+                symbol: quote.price
+                for symbol, quote in quotes.items()
+                if quote.fetched_at >= started
+            }
+            if prices:
+                self._publish(prices)
+
+        self.cycles += 1
+        self.last_cycle_at = started
+        self.last_cycle_duration = time.time() - started
+        self.last_hot_set_size = len(symbols)
+        return prices
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Hot price refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start the refresh loop on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+            print(f"📡 Price streamer started (every {self.interval:.0f}s)")
+
+    async def stop(self):
+        """Stop the refresh loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> Dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval": self.interval,
+            "cycles": self.cycles,
+            "hot_set_size": self.last_hot_set_size,
+            "last_cycle_at": self.last_cycle_at,
+            "last_cycle_duration": self.last_cycle_duration,
+            "subscribers": len(self._subscribers),
+        }
+
+# Global instance
+price_streamer = HotPriceStreamer()
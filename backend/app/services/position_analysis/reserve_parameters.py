@@ -0,0 +1,126 @@
+"""
+Reserve Parameter Loader
+Loads per-chain Aave reserve parameters (LTV, LT, liquidation bonus, e-mode, caps) from JSON/CSV snapshots
+"""
+
+import csv
+import json
+import os
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Any, Optional
+
+# Accepted column/key aliases -> canonical field name
+FIELD_ALIASES = {
+    "chain": "chain_id",
+    "chainid": "chain_id",
+    "chain_id": "chain_id",
+    "symbol": "symbol",
+    "asset": "symbol",
+    "token": "symbol",
+    "ltv": "ltv",
+    "collateral_factor": "ltv",
+    "lt": "liquidation_threshold",
+    "liquidation_threshold": "liquidation_threshold",
+    "liquidation_bonus": "liquidation_bonus",
+    "bonus": "liquidation_bonus",
+    "emode_category": "emode_category",
+    "emode": "emode_category",
+    "supply_cap": "supply_cap",
+    "borrow_cap": "borrow_cap",
+}
+
+@dataclass
+class ReserveParameters:
+    """Risk parameters of a single Aave reserve on a specific chain"""
+    chain_id: str
+    symbol: str
+    ltv: float
+    liquidation_threshold: float
+    liquidation_bonus: float = 0.0  # Aave convention, e.g. 1.05 for a 5% bonus
+    emode_category: int = 0
+    supply_cap: float = 0.0  # 0 means uncapped
+    borrow_cap: float = 0.0
+
+    def to_dict(self):
+        return asdict(self)
+
+def _to_ratio(value: Any) -> float:
+    """
+    Normalize a percentage given either as a ratio (0.8) or in basis points (8000)
+
+    Values above 1 but at most 100 could be percentages or basis points and
+    are rejected rather than guessed.
+    """
+    value = float(value)
+    if value <= 1:
+        return value
+    if value <= 100:
+        raise ValueError(f"Ambiguous ratio {value:g}: give a ratio (0.8) or basis points (8000)")
+    return value / 10000
+
+def _to_bonus(value: Any) -> float:
+    """
+    Normalize a liquidation bonus given either as a multiplier (1.05) or in basis points (10500)
+
+    0 means no bonus (reserves that are not collateral). Anything else
+    outside 1-2 or 10000-20000 is rejected rather than guessed.
+    """
+    value = float(value)
+    if value == 0 or 1 <= value <= 2:
+        return value
+    if 10000 <= value <= 20000:
+        return value / 10000
+    raise ValueError(f"Ambiguous liquidation bonus {value:g}: give a multiplier (1.05) or basis points (10500)")
+
+def parse_reserve_record(record: Dict[str, Any]) -> ReserveParameters:
+    """Build ReserveParameters from a raw JSON object or CSV row"""
+    fields = {}
+    for key, value in record.items():
+        canonical = FIELD_ALIASES.get(str(key).strip().lower())
+        if canonical and value not in (None, ""):
+            fields[canonical] = value
+
+    missing = [name for name in ("chain_id", "symbol", "ltv", "liquidation_threshold") if name not in fields]
+    if missing:
+        raise ValueError(f"Reserve record missing fields {missing}: {record}")
+
+    return ReserveParameters(
+        chain_id=str(fields["chain_id"]).strip(),
+        symbol=str(fields["symbol"]).strip().upper(),
+        ltv=_to_ratio(fields["ltv"]),
+        liquidation_threshold=_to_ratio(fields["liquidation_threshold"]),
+        liquidation_bonus=_to_bonus(fields.get("liquidation_bonus", 0.0)),
+        emode_category=int(float(fields.get("emode_category", 0))),
+        supply_cap=float(fields.get("supply_cap", 0.0)),
+        borrow_cap=float(fields.get("borrow_cap", 0.0)),
+    )
+
+def load_reserve_parameters(path: str) -> List[ReserveParameters]:
+    """
+    Load reserve parameters from a JSON or CSV snapshot
+
+    JSON files may contain a list of reserve objects or {"reserves": [...]}.
+    CSV files need a header row; columns are matched through FIELD_ALIASES.
+    LTV and liquidation threshold are ratios (0.8) or basis points (8000).
+    Liquidation bonus is a multiplier (1.05) or basis points (10500).
+    A chain_id of "*" gives parameters for chains without a row of their own.
+
+    Args:
+        path: Path to a .json or .csv snapshot
+
+    Returns:
+        List of ReserveParameters in file order
+    """
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == ".csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            records = list(csv.DictReader(f))
+    elif extension == ".json":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        records = data.get("reserves", []) if isinstance(data, dict) else data
+    else:
+        raise ValueError(f"Unsupported reserve snapshot format: {path}")
+
+    return [parse_reserve_record(record) for record in records]
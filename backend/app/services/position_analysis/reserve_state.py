@@ -0,0 +1,190 @@
+"""
+Reserve State Service
+Cached Aave reserve indexes and rates, projected forward to compute exact balances from scaled balances
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from .aave_events import RAY, ray_mul
+
+SECONDS_PER_YEAR = 365 * 24 * 3600  # As in Aave's MathUtils
+
+def calculate_linear_interest(rate: int, elapsed: int) -> int:
+    """Supply-side growth factor over elapsed seconds (ray), as MathUtils.calculateLinearInterest"""
+    return RAY + rate * elapsed // SECONDS_PER_YEAR
+
+def calculate_compounded_interest(rate: int, elapsed: int) -> int:
+    """Borrow-side growth factor over elapsed seconds (ray), as MathUtils.calculateCompoundedInterest"""
+    if elapsed <= 0:
+        return RAY
+    elapsed_minus_one = elapsed - 1
+    elapsed_minus_two = elapsed - 2 if elapsed > 2 else 0
+    base_power_two = ray_mul(rate, rate) // (SECONDS_PER_YEAR * SECONDS_PER_YEAR)
+    base_power_three = ray_mul(base_power_two, rate) // SECONDS_PER_YEAR
+    second_term = elapsed * elapsed_minus_one * base_power_two // 2
+    third_term = elapsed * elapsed_minus_one * elapsed_minus_two * base_power_three // 6
+    return RAY + rate * elapsed // SECONDS_PER_YEAR + second_term + third_term
+
+def rate_to_apy(rate: int) -> float:
+    """Per-second compounded APY of a ray-denominated annual rate"""
+    return (1 + rate / RAY / SECONDS_PER_YEAR) ** SECONDS_PER_YEAR - 1
+
+@dataclass
+class ReserveState:
+    """Indexes and rates of one reserve as of its last on-chain update"""
+    reserve: str
+    liquidity_index: int
+    variable_borrow_index: int
+    liquidity_rate: int
+    variable_borrow_rate: int
+    last_update: Optional[float]  # Unix seconds of the update the indexes were written at, None if unknown
+    symbol: Optional[str] = None
+    decimals: Optional[int] = None
+
+    def normalized_income(self, at: Optional[float] = None) -> int:
+        """Liquidity index projected to `at` (ray), as Pool.getReserveNormalizedIncome"""
+        elapsed = int((at if at is not None else time.time()) - self.last_update)
+        if elapsed <= 0:
+            return self.liquidity_index
+        return ray_mul(calculate_linear_interest(self.liquidity_rate, elapsed), self.liquidity_index)
+
+    def normalized_debt(self, at: Optional[float] = None) -> int:
+        """Variable borrow index projected to `at` (ray), as Pool.getReserveNormalizedVariableDebt"""
+        elapsed = int((at if at is not None else time.time()) - self.last_update)
+        if elapsed <= 0:
+            return self.variable_borrow_index
+        return ray_mul(calculate_compounded_interest(self.variable_borrow_rate, elapsed), self.variable_borrow_index)
+
+    @property
+    def supply_apy(self) -> float:
+        return rate_to_apy(self.liquidity_rate)
+
+    @property
+    def borrow_apy(self) -> float:
+        return rate_to_apy(self.variable_borrow_rate)
+
+    def to_units(self, amount: int) -> float:
+        """Raw token amount in whole tokens"""
+        return amount / 10 ** (self.decimals if self.decimals is not None else 18)
+
+class ReserveStateService:
+    """
+    Per-chain cache of reserve states
+
+    Reserve indexes only change when someone interacts with the reserve and
+    grow deterministically in between, so the cache is refreshed every ttl
+    seconds and projected forward in the meantime. Current balances are
+    scaled balances times the projected index, with no upstream call per
+    position. Reserves whose update time is unknown cannot be projected and
+    are left out until the loader reports it. Loaders are plain (blocking)
+    functions run in the executor:
+    reserve_loader(chain_id) -> [ReserveState] and
+    balance_loader(chain_id, user) -> [{"reserve", "scaled_supply", "scaled_variable_debt", "stable_debt"}].
+    """
+
+    def __init__(self, reserve_loader: Optional[Callable[[str], List[ReserveState]]] = None,
+                 balance_loader: Optional[Callable[[str, str], List[Dict[str, Any]]]] = None,
+                 ttl: float = 300.0):
+        self.reserve_loader = reserve_loader
+        self.balance_loader = balance_loader
+        self.ttl = ttl
+        self._reserves: Dict[str, Dict[str, ReserveState]] = {}  # chain -> reserve address -> state
+        self._loaded_at: Dict[str, float] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        # Stats
+        self.loads = 0
+        self.hits = 0
+
+    def configure(self, reserve_loader: Callable[[str], List[ReserveState]],
+                  balance_loader: Optional[Callable[[str, str], List[Dict[str, Any]]]] = None):
+        self.reserve_loader = reserve_loader
+        self.balance_loader = balance_loader
+        self._reserves.clear()
+        self._loaded_at.clear()
+
+    async def _load(self, chain_id: str):
+        loop = asyncio.get_event_loop()
+        states = await loop.run_in_executor(None, self.reserve_loader, chain_id)
+        undated = sum(1 for state in states if not state.last_update)
+        if undated:
+            print(f"⚠️ {undated} reserves on chain {chain_id} have no update time yet, left out")
+        self._reserves[chain_id] = {state.reserve.lower(): state for state in states if state.last_update}
+        self._loaded_at[chain_id] = time.time()
+        self.loads += 1
+
+    async def get_reserves(self, chain_id: str) -> Dict[str, ReserveState]:
+        """Reserve states of a chain, reloaded at most once per ttl however many callers ask"""
+        if self.reserve_loader is None:
+            return {}
+        if time.time() - self._loaded_at.get(chain_id, 0.0) < self.ttl:
+            self.hits += 1
+            return self._reserves.get(chain_id, {})
+        future = self._inflight.get(chain_id)
+        if future is None:
+            future = self._inflight[chain_id] = asyncio.ensure_future(self._load(chain_id))
+            future.add_done_callback(lambda _: self._inflight.pop(chain_id, None))
+        try:
+            await asyncio.shield(future)
+        except Exception as e:
+            print(f"⚠️ Could not load reserve states for chain {chain_id}: {e}")
+        return self._reserves.get(chain_id, {})
+
+    async def get_reserve(self, chain_id: str, reserve_or_symbol: str) -> Optional[ReserveState]:
+        """Look up a reserve by underlying address or, case-insensitively, by symbol"""
+        reserves = await self.get_reserves(chain_id)
+        key = reserve_or_symbol.lower()
+        if key in reserves:
+            return reserves[key]
+        for state in reserves.values():
+            if state.symbol and state.symbol.lower() == key:
+                return state
+        return None
+
+    async def get_user_balances(self, chain_id: str, user_address: str,
+                                at: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Current supply and debt of a user per reserve, from indexed scaled balances
+
+        Returns:
+            {reserve address: {"symbol", "supplied", "borrowed", "supply_apy", "borrow_apy"}},
+            amounts in whole tokens; empty if no balance loader is configured
+        """
+        if self.balance_loader is None:
+            return {}
+        reserves = await self.get_reserves(chain_id)
+        loop = asyncio.get_event_loop()
+        rows = await loop.run_in_executor(None, self.balance_loader, chain_id, user_address.lower())
+        at = at if at is not None else time.time()
+
+        balances = {}
+        for row in rows:
+            state = reserves.get(row["reserve"].lower())
+            if state is None:
+                continue
+            supplied = ray_mul(int(row["scaled_supply"]), state.normalized_income(at))
+            borrowed = ray_mul(int(row["scaled_variable_debt"]), state.normalized_debt(at)) + int(row.get("stable_debt", 0))
+            if supplied == 0 and borrowed == 0:
+                continue
+            balances[state.reserve.lower()] = {
+                "symbol": state.symbol,
+                "supplied": state.to_units(supplied),
+                "borrowed": state.to_units(borrowed),
+                "supply_apy": state.supply_apy,
+                "borrow_apy": state.borrow_apy,
+            }
+        return balances
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "chains": len(self._reserves),
+            "reserves": sum(len(reserves) for reserves in self._reserves.values()),
+            "loads": self.loads,
+            "cache_hits": self.hits,
+        }
+
+# Global service instance, configured with database loaders at startup
+reserve_state_service = ReserveStateService()
@@ -0,0 +1,356 @@
+"""
+Price-Shock Stress Testing
+Evaluates every stored position under a matrix of price scenarios in vectorized form
+
+Usage:
+    python -m app.services.position_analysis.stress_test --shock WETH=-0.2 --shock USDC=-0.05
+    python -m app.services.position_analysis.stress_test --monte-carlo 10000 --processes 4
+"""
+
+import argparse
+import asyncio
+import json
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Tuple
+import numpy as np
+from .batch_health_factor import PositionBatch
+from .token_registry import normalize_symbol
+
+# Annualized volatility used for Monte Carlo draws when none is given
+DEFAULT_VOLATILITIES = {
+    "ETH": 0.75, "WETH": 0.75, "CBETH": 0.75, "STETH": 0.75, "WSTETH": 0.75, "RETH": 0.75,
+    "WBTC": 0.6,
+    "LINK": 0.9, "UNI": 0.9, "AAVE": 0.95,
+    "USDC": 0.03, "USDT": 0.03, "DAI": 0.04, "GHO": 0.05,
+}
+FALLBACK_VOLATILITY = 1.0
+
+STABLECOINS = {"USDC", "USDT", "DAI", "GHO"}
+ETH_DERIVATIVES = {"ETH", "WETH", "CBETH", "STETH", "WSTETH", "RETH"}
+
+# Keep each (scenarios x positions) block around this many cells
+_CHUNK_CELLS = 4_000_000
+
+def default_correlation(a: str, b: str) -> float:
+    """Rough correlation between two tokens' returns"""
+    if a == b:
+        return 1.0
+    if a in ETH_DERIVATIVES and b in ETH_DERIVATIVES:
+        return 0.95
+    if a in STABLECOINS and b in STABLECOINS:
+        return 0.5
+    if a in STABLECOINS or b in STABLECOINS:
+        return 0.0
+    return 0.8
+
+def shock_scenarios(tokens: List[str], scenarios: List[Dict[str, float]]) -> np.ndarray:
+    """
+    Build a price factor matrix from explicit per-token shocks
+
+    Args:
+        tokens: Token order of the matrix columns
+        scenarios: e.g. [{"WETH": -0.2}, {"USDC": -0.05, "DAI": -0.05}]; unlisted tokens are unshocked
+
+    Returns:
+        (n_scenarios, n_tokens) array of price multipliers
+    """
+    factors = np.ones((len(scenarios), len(tokens)))
+    columns = {token: i for i, token in enumerate(tokens)}
+    for s_idx, scenario in enumerate(scenarios):
+        for token, shock in scenario.items():
+            if token in columns:
+                factors[s_idx, columns[token]] = 1.0 + shock
+    return factors
+
+def monte_carlo_scenarios(tokens: List[str], count: int, horizon_days: float = 1.0,
+                          volatilities: Optional[Dict[str, float]] = None,
+                          correlation: Optional[np.ndarray] = None,
+                          seed: Optional[int] = None) -> np.ndarray:
+    """
+    Draw correlated log-normal price multipliers
+
+    Args:
+        tokens: Token order of the matrix columns
+        count: Number of scenarios
+        horizon_days: Shock horizon
+        volatilities: Annualized volatility per token, defaults to DEFAULT_VOLATILITIES
+        correlation: (n_tokens, n_tokens) correlation matrix, defaults to default_correlation
+        seed: Random seed for reproducible runs
+
+    Returns:
+        (count, n_tokens) array of price multipliers
+    """
+    volatilities = {**DEFAULT_VOLATILITIES, **(volatilities or {})}
+    sigma = np.array([volatilities.get(token, FALLBACK_VOLATILITY) for token in tokens])
+    sigma = sigma * np.sqrt(horizon_days / 365.0)
+
+    if correlation is None:
+        correlation = np.array([[default_correlation(a, b) for b in tokens] for a in tokens])
+    # Jitter the diagonal so perfectly correlated tokens still factorize
+    cholesky = np.linalg.cholesky(correlation + 1e-9 * np.eye(len(tokens)))
+
+    rng = np.random.default_rng(seed)
+    z = rng.standard_normal((count, len(tokens))) @ cholesky.T
+    return np.exp(sigma * z - 0.5 * sigma ** 2)
+
+@dataclass
+class StressExposure:
+    """Per-position USD exposure per token at base prices"""
+    weighted_collateral: np.ndarray  # (n_positions, n_tokens) Σ amount × price × LT
+    collateral: np.ndarray           # (n_positions, n_tokens) Σ amount × price supplied
+    debt: np.ndarray                 # (n_positions, n_tokens) Σ amount × price borrowed
+    tokens: List[str]
+
+    @classmethod
+    def from_batch(cls, batch: PositionBatch) -> "StressExposure":
+        tokens = sorted({token for _, token in batch.assets})
+        token_columns = {token: i for i, token in enumerate(tokens)}
+        asset_to_token = np.array([token_columns[token] for _, token in batch.assets], dtype=np.int64)
+
+        row_tokens = asset_to_token[batch.asset_index]
+        values = batch.amounts * batch.asset_prices[batch.asset_index]
+        supplied = ~batch.is_debt
+        shape = (batch.num_positions, len(tokens))
+
+        weighted = np.zeros(shape)
+        collateral = np.zeros(shape)
+        debt = np.zeros(shape)
+        np.add.at(weighted, (batch.position_index[supplied], row_tokens[supplied]),
+                  values[supplied] * batch.asset_lts[batch.asset_index[supplied]])
+        np.add.at(collateral, (batch.position_index[supplied], row_tokens[supplied]), values[supplied])
+        np.add.at(debt, (batch.position_index[batch.is_debt], row_tokens[batch.is_debt]), values[batch.is_debt])
+        return cls(weighted, collateral, debt, tokens)
+
+def _evaluate(exposure: Tuple[np.ndarray, np.ndarray, np.ndarray], factors: np.ndarray) -> Dict[str, np.ndarray]:
+    """Evaluate a block of scenarios against every position"""
+    weighted, collateral, debt = exposure
+    num_positions = weighted.shape[0]
+    chunk = max(1, _CHUNK_CELLS // max(num_positions, 1))
+
+    liquidated, bad_debt, liquidatable_debt = [], [], []
+    breach_counts = np.zeros(num_positions, dtype=np.int64)
+    min_health = np.full(num_positions, np.inf)
+
+    for start in range(0, len(factors), chunk):
+        block = factors[start:start + chunk]
+        scenario_weighted = block @ weighted.T    # (scenarios, positions)
+        scenario_collateral = block @ collateral.T
+        scenario_debt = block @ debt.T
+
+        health = np.full(scenario_debt.shape, np.inf)
+        np.divide(scenario_weighted, scenario_debt, out=health, where=scenario_debt > 0)
+        breached = health < 1.0
+
+        liquidated.append(breached.sum(axis=1))
+        bad_debt.append(np.maximum(scenario_debt - scenario_collateral, 0.0).sum(axis=1))
+        liquidatable_debt.append(np.where(breached, scenario_debt, 0.0).sum(axis=1))
+        breach_counts += breached.sum(axis=0)
+        np.minimum(min_health, health.min(axis=0), out=min_health)
+
+    return {
+        "liquidated": np.concatenate(liquidated) if liquidated else np.zeros(0, dtype=np.int64),
+        "bad_debt": np.concatenate(bad_debt) if bad_debt else np.zeros(0),
+        "liquidatable_debt": np.concatenate(liquidatable_debt) if liquidatable_debt else np.zeros(0),
+        "breach_counts": breach_counts,
+        "min_health": min_health,
+    }
+
+# Exposure shared with pool workers through the initializer instead of every task
+_worker_exposure = None
+
+def _init_worker(weighted: np.ndarray, collateral: np.ndarray, debt: np.ndarray):
+    global _worker_exposure
+    _worker_exposure = (weighted, collateral, debt)
+
+def _evaluate_in_worker(factors: np.ndarray) -> Dict[str, np.ndarray]:
+    return _evaluate(_worker_exposure, factors)
+
+@dataclass
+class StressTestResult:
+    """Outcome of a stress test run"""
+    liquidated_counts: np.ndarray        # (n_scenarios,) positions with HF < 1
+    bad_debt_usd: np.ndarray             # (n_scenarios,) Σ max(debt - collateral, 0)
+    liquidatable_debt_usd: np.ndarray    # (n_scenarios,) debt of positions with HF < 1
+    breach_probability: np.ndarray       # (n_positions,) share of scenarios with HF < 1
+    min_health_factors: np.ndarray       # (n_positions,) worst HF across scenarios
+    position_keys: List[Any]
+
+    def at_risk(self, min_probability: float = 0.0) -> List[Dict[str, Any]]:
+        """Positions that go under HF 1.0 in more than min_probability of scenarios, worst first"""
+        order = np.argsort(-self.breach_probability, kind="stable")
+        return [
+            {
+                "position": self.position_keys[i],
+                "breach_probability": float(self.breach_probability[i]),
+                "min_health_factor": float(self.min_health_factors[i]),
+            }
+            for i in order
+            if self.breach_probability[i] > min_probability
+        ]
+
+    def summary(self, percentiles: Tuple[float, ...] = (50, 95, 99)) -> Dict[str, Any]:
+        """Loss distribution and at-risk list as plain JSON-serializable data"""
+        def distribution(values: np.ndarray) -> Dict[str, float]:
+            if values.size == 0:
+                return {}
+            stats = {f"p{int(p)}": float(np.percentile(values, p)) for p in percentiles}
+            stats["mean"] = float(values.mean())
+            stats["max"] = float(values.max())
+            return stats
+
+        return {
+            "scenarios": int(self.liquidated_counts.size),
+            "positions": len(self.position_keys),
+            "bad_debt_usd": distribution(self.bad_debt_usd),
+            "liquidatable_debt_usd": distribution(self.liquidatable_debt_usd),
+            "liquidated_positions": distribution(self.liquidated_counts.astype(float)),
+            "at_risk": self.at_risk(),
+        }
+
+def _normalize_keys(values: Optional[Dict[str, float]]) -> Dict[str, float]:
+    return {normalize_symbol(token): value for token, value in (values or {}).items()}
+
+def _normalize_positions(positions: List[Dict]) -> List[Dict]:
+    """Copies of positions with token symbols normalized, e.g. cbETH to CBETH"""
+    return [
+        {
+            **position,
+            "supplied_assets": [{**a, "token": normalize_symbol(a["token"])} for a in position.get("supplied_assets", [])],
+            "borrowed_assets": [{**a, "token": normalize_symbol(a["token"])} for a in position.get("borrowed_assets", [])],
+        }
+        for position in positions
+    ]
+
+class StressTestEngine:
+    """
+    Vectorized price-shock stress tests over a fixed set of positions
+
+    Token symbols of positions, prices, overrides, shocks and volatilities
+    are all normalized with normalize_symbol, so "cbETH" and "CBETH" name
+    the same exposure column.
+    """
+
+    def __init__(self, positions: List[Dict], prices: Dict[str, float], knowledge_graph,
+                 position_keys: Optional[List[Any]] = None,
+                 price_overrides: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            positions: Position dicts with chain_id, supplied_assets and borrowed_assets
+            prices: Base token prices the shocks are applied to
+            knowledge_graph: DeFiKnowledgeGraph used for liquidation thresholds
+            position_keys: Identifier per position reported in results (defaults to index)
+            price_overrides: Base prices replacing those in prices
+        """
+        prices = {**_normalize_keys(prices), **_normalize_keys(price_overrides)}
+        batch = PositionBatch.from_positions(_normalize_positions(positions), prices, knowledge_graph)
+        self.exposure = StressExposure.from_batch(batch)
+        self.position_keys = position_keys if position_keys is not None else list(range(len(positions)))
+
+    @property
+    def tokens(self) -> List[str]:
+        return self.exposure.tokens
+
+    def run(self, factors: np.ndarray, processes: int = 0, tasks_per_process: int = 4) -> StressTestResult:
+        """
+        Evaluate every position under every scenario
+
+        Args:
+            factors: (n_scenarios, n_tokens) price multipliers in self.tokens order
+            processes: Worker processes to spread scenarios over (0 runs in-process)
+            tasks_per_process: Scenario chunks submitted per worker
+        """
+        arrays = (self.exposure.weighted_collateral, self.exposure.collateral, self.exposure.debt)
+
+        if processes and len(factors) > 1:
+            chunks = np.array_split(factors, min(len(factors), processes * tasks_per_process))
+            with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=arrays) as pool:
+                parts = list(pool.map(_evaluate_in_worker, chunks))
+        else:
+            parts = [_evaluate(arrays, factors)]
+
+        breach_counts = sum(part["breach_counts"] for part in parts)
+        min_health = np.minimum.reduce([part["min_health"] for part in parts])
+        return StressTestResult(
+            liquidated_counts=np.concatenate([part["liquidated"] for part in parts]),
+            bad_debt_usd=np.concatenate([part["bad_debt"] for part in parts]),
+            liquidatable_debt_usd=np.concatenate([part["liquidatable_debt"] for part in parts]),
+            breach_probability=breach_counts / max(len(factors), 1),
+            min_health_factors=min_health,
+            position_keys=self.position_keys,
+        )
+
+    def run_shocks(self, scenarios: List[Dict[str, float]], processes: int = 0) -> StressTestResult:
+        """Run explicit per-token shock scenarios, e.g. [{"WETH": -0.2}]"""
+        return self.run(shock_scenarios(self.tokens, [_normalize_keys(s) for s in scenarios]), processes)
+
+    def run_monte_carlo(self, count: int, horizon_days: float = 1.0,
+                        volatilities: Optional[Dict[str, float]] = None,
+                        seed: Optional[int] = None, processes: int = 0) -> StressTestResult:
+        """Run correlated Monte Carlo scenarios"""
+        factors = monte_carlo_scenarios(self.tokens, count, horizon_days, _normalize_keys(volatilities), seed=seed)
+        return self.run(factors, processes)
+
+def load_stored_positions() -> Tuple[List[Dict], List[str]]:
+    """Load every stored position with its owner's wallet address from the database"""
+    from app.core.database import SessionLocal
+    from app.models.position import Position
+    from app.models.user import User
+
+    db = SessionLocal()
+    try:
+        rows = db.query(Position, User.wallet_address).join(User, Position.user_id == User.id).all()
+        positions = [
+            {
+                "chain_id": position.chain_id,
+                "supplied_assets": position.supplied_assets or [],
+                "borrowed_assets": position.borrowed_assets or [],
+            }
+            for position, _ in rows
+        ]
+        keys = [f"{wallet}:{position.chain_id}" for position, wallet in rows]
+        return positions, keys
+    finally:
+        db.close()
+
+def _parse_assignments(values: List[str]) -> Dict[str, float]:
+    parsed = {}
+    for value in values:
+        token, _, number = value.partition("=")
+        parsed[normalize_symbol(token)] = float(number)
+    return parsed
+
+async def _main():
+    parser = argparse.ArgumentParser(description="Stress test stored Aave positions against price shocks")
+    parser.add_argument("--shock", action="append", default=[],
+                        help="TOKEN=RETURN shock applied together as one scenario, e.g. WETH=-0.2")
+    parser.add_argument("--monte-carlo", type=int, default=0, help="Number of Monte Carlo scenarios")
+    parser.add_argument("--horizon-days", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--processes", type=int, default=0)
+    parser.add_argument("--positions", help="JSON file of positions instead of the database")
+    parser.add_argument("--price", action="append", default=[], help="TOKEN=USD base price override")
+    args = parser.parse_args()
+
+    from .health_factor_calculator import HealthFactorCalculator
+
+    if args.positions:
+        with open(args.positions, encoding="utf-8") as f:
+            positions = json.load(f)
+        keys = [position.get("id", i) for i, position in enumerate(positions)]
+    else:
+        positions, keys = load_stored_positions()
+
+    calculator = HealthFactorCalculator()
+    prices = await calculator.get_prices_for_assets(positions)
+
+    engine = StressTestEngine(positions, prices, calculator.knowledge_graph, keys, _parse_assignments(args.price))
+    if args.monte_carlo:
+        result = engine.run_monte_carlo(args.monte_carlo, args.horizon_days, seed=args.seed, processes=args.processes)
+    else:
+        result = engine.run_shocks([_parse_assignments(args.shock)], processes=args.processes)
+
+    print(json.dumps(result.summary(), indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(_main())
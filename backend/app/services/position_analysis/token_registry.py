@@ -0,0 +1,84 @@
+"""
+Token Registry
+Single source of truth for token symbol -> price source identifiers and fallback prices
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+@dataclass(frozen=True)
+class TokenInfo:
+    """Price source identifiers for a token"""
+    symbol: str
+    coingecko_id: Optional[str] = None
+    binance_ticker: Optional[str] = None
+    fallback_price: Optional[float] = None  # Last-resort USD price when every source fails
+
+TOKEN_REGISTRY: Dict[str, TokenInfo] = {
+    info.symbol: info
+    for info in [
+        TokenInfo("ETH", "ethereum", "ETHUSDT", 3000.0),
+        TokenInfo("WETH", "ethereum", "ETHUSDT", 3000.0),
+        TokenInfo("USDC", "usd-coin", "USDCUSDT", 1.0),
+        TokenInfo("USDT", "tether", "USDTUSD", 1.0),
+        TokenInfo("DAI", "dai", None, 1.0),
+        TokenInfo("WBTC", "wrapped-bitcoin", "WBTCUSDT", 45000.0),
+        TokenInfo("LINK", "chainlink", "LINKUSDT", 15.0),
+        TokenInfo("UNI", "uniswap", "UNIUSDT", 7.0),
+        TokenInfo("AAVE", "aave", "AAVEUSDT", 100.0),
+        TokenInfo("CBETH", "coinbase-wrapped-staked-eth", None, 3000.0),  # Coinbase staked ETH
+        TokenInfo("STETH", "staked-ether", None, 3000.0),                 # Lido staked ETH
+        TokenInfo("RETH", "rocket-pool-eth", None, 3000.0),               # Rocket Pool ETH
+        TokenInfo("WSTETH", "wrapped-steth", None, 3000.0),               # Wrapped stETH
+        TokenInfo("MATIC", "matic-network", "MATICUSDT", 0.5),
+        TokenInfo("ARB", "arbitrum", "ARBUSDT", 1.0),
+    ]
+}
+
+# Chain id -> CoinGecko asset platform for /simple/token_price (testnets have none)
+COINGECKO_PLATFORMS: Dict[str, str] = {
+    "1": "ethereum",
+    "10": "optimistic-ethereum",
+    "56": "binance-smart-chain",
+    "100": "xdai",
+    "137": "polygon-pos",
+    "8453": "base",
+    "42161": "arbitrum-one",
+    "43114": "avalanche",
+}
+
+# Aave aToken / debt token symbols: prefix, optional market identifier, underlying symbol
+# (e.g. aEthWETH, aEthcbETH, variableDebtEthUSDC, aWETH); longer market ids first.
+# Without a market id the underlying must start uppercase so e.g. axlUSDC is not matched.
+AAVE_TOKEN_PATTERN = re.compile(
+    r"^(a|variableDebt|stableDebt)"
+    r"(?:(EthSep|BasSep|ArbSep|OptSep|Eth|Bas|Arb|Opt|Op|Pol|Ava|Gno|Scr|Lin|Zks|Bnb|Sep)([A-Za-z0-9][A-Za-z0-9.]*)"
+    r"|([A-Z0-9][A-Za-z0-9.]*))$"
+)
+
+def aave_underlying(symbol: str) -> Optional[Tuple[str, bool]]:
+    """
+    Underlying asset of an Aave aToken or debt token
+
+    Returns:
+        (underlying_symbol, is_debt), or None if the symbol is not an Aave token
+    """
+    match = AAVE_TOKEN_PATTERN.match(symbol.strip())
+    if not match:
+        return None
+    prefix, _, underlying, bare_underlying = match.groups()
+    return underlying or bare_underlying, prefix != "a"
+
+def normalize_symbol(symbol: str) -> str:
+    """Canonical registry key for a token symbol"""
+    return symbol.strip().upper()
+
+def get_token_info(symbol: str) -> Optional[TokenInfo]:
+    """Look up a token by symbol, case-insensitively"""
+    return TOKEN_REGISTRY.get(normalize_symbol(symbol))
+
+def get_fallback_price(symbol: str) -> Optional[float]:
+    """Last-resort USD price for a token, None if unknown"""
+    info = get_token_info(symbol)
+    return info.fallback_price if info else None
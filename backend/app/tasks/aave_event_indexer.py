@@ -0,0 +1,686 @@
+"""
+Aave Pool event indexer
+
+Ingests Supply, Borrow, Repay, Withdraw, LiquidationCall and
+ReserveDataUpdated logs of each chain's Aave Pool through Blockscout into
+aave_pool_events, and folds them into per-user scaled balances
+(aave_user_reserves) and reserve indexes (aave_reserve_states).
+
+Blockscout pages logs newest first, so a pass walks down from the head to
+the last synced block minus the reorg depth. A walk that does not finish
+within max_pages (the bootstrap rescan of a chain's full history, or a long
+outage) is resumed on the next pass from its stored page cursor. Events
+within reorg_depth blocks of the synced head are stored but not applied;
+they are re-read by the next walk, which deletes any that Blockscout no
+longer returns. Everything older is append-only and applied exactly once,
+in (block, log index) order, so position state advances incrementally and
+a full rescan is only needed at bootstrap.
+
+aToken transfers emit no Pool event, so replayed scaled supplies drift for
+wallets that send or receive aTokens. With a MulticallClient configured, the
+indexed supplies are periodically overwritten with the aTokens'
+scaledBalanceOf, read at the last applied block.
+
+Usage (one-off bootstrap or catch-up):
+    python -m app.tasks.aave_event_indexer --chain 11155111
+"""
+
+import argparse
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.aave_event import AavePoolEvent, AaveIndexerCursor, AaveReserveState, AaveUserReserve
+from app.services.position_analysis.aave_events import (
+    PoolState, ReserveIndexes, UserReserve, affected_keys, decode_args, decode_pool_log,
+    encode_args, event_user, ray_mul
+)
+from app.services.position_analysis.blockscout_client import BlockscoutMCPClient
+from app.services.position_analysis.multicall_client import MulticallClient
+from app.services.position_analysis.reserve_state import ReserveState
+
+def _block_number(response: Dict[str, Any]) -> Optional[int]:
+    data = response.get("data", response)
+    if isinstance(data, dict):
+        value = data.get("block_number", data.get("height"))
+        if value is not None:
+            return int(value)
+    return None
+
+def _timestamp(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def _block_timestamp(response: Dict[str, Any]) -> Optional[datetime]:
+    data = response.get("data", response)
+    return _timestamp(data.get("timestamp")) if isinstance(data, dict) else None
+
+def _token_metadata(response: Dict[str, Any]) -> Optional[Tuple[str, int]]:
+    """(symbol, decimals) from a Blockscout address info response"""
+    data = response.get("data", response)
+    candidates = [data, data.get("basic_info", {})] if isinstance(data, dict) else []
+    for candidate in candidates:
+        token = candidate.get("token") if isinstance(candidate, dict) else None
+        if isinstance(token, dict) and token.get("symbol") and token.get("decimals") is not None:
+            return token["symbol"], int(token["decimals"])
+    return None
+
+@dataclass
+class IndexPass:
+    """Outcome of one indexing pass over a chain"""
+    chain_id: str
+    pages: int = 0
+    events_stored: int = 0
+    events_removed: int = 0  # Reorged out
+    events_applied: int = 0
+    complete: bool = False  # Walk reached the synced range; False while bootstrapping
+    synced_block: Optional[int] = None
+    users: Set[str] = field(default_factory=set)  # Position owners with newly stored events or corrected supplies
+    supplies_corrected: int = 0  # Scaled supplies overwritten by scaledBalanceOf
+
+class AaveEventIndexer:
+    """Indexes Aave Pool events of several chains into the local store"""
+
+    def __init__(self, blockscout_client: BlockscoutMCPClient, pools: Dict[str, str],
+                 reorg_depth: int = 64, max_pages: int = 20, apply_batch: int = 5000,
+                 session_factory: Callable = SessionLocal, multicall_client: Optional[MulticallClient] = None,
+                 reconcile_interval: float = 3600.0, reconcile_chunk: int = 5000):
+        self.blockscout_client = blockscout_client
+        self.pools = {chain_id: address.lower() for chain_id, address in pools.items()}
+        self.reorg_depth = reorg_depth
+        self.max_pages = max_pages
+        self.apply_batch = apply_batch
+        self.session_factory = session_factory
+        self.multicall_client = multicall_client
+        self.reconcile_interval = reconcile_interval
+        self.reconcile_chunk = reconcile_chunk  # (aToken, user) reads per JSON-RPC batch
+        self._reserves: Dict[str, Dict[str, ReserveIndexes]] = {}  # chain -> reserve -> latest applied indexes
+        self._walk_seen: Dict[str, Set[Tuple[str, int]]] = {}  # chain -> (tx, log index) read by the current walk
+        self._a_tokens: Dict[str, Dict[str, str]] = {}  # chain -> reserve -> aToken
+        self._reconciled_at: Dict[str, float] = {}
+        self._listeners: List[Callable[[str, Set[str]], Any]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, listener: Callable[[str, Set[str]], Any]):
+        """Register a (possibly async) callback invoked with (chain_id, users) when users have new Pool events"""
+        self._listeners.append(listener)
+
+    # --- Database side (runs in the executor) ---
+
+    def _load_cursor(self, chain_id: str) -> Dict[str, Any]:
+        db = self.session_factory()
+        try:
+            cursor = db.get(AaveIndexerCursor, chain_id)
+            if cursor is None:
+                cursor = AaveIndexerCursor(chain_id=chain_id, pool_address=self.pools[chain_id])
+                db.add(cursor)
+                db.commit()
+            if chain_id not in self._reserves:
+                self._reserves[chain_id] = {
+                    row.reserve: ReserveIndexes(
+                        liquidity_index=int(row.liquidity_index),
+                        variable_borrow_index=int(row.variable_borrow_index),
+                        liquidity_rate=int(row.liquidity_rate),
+                        variable_borrow_rate=int(row.variable_borrow_rate),
+                        stable_borrow_rate=int(row.stable_borrow_rate),
+                        block_number=row.block_number,
+                        timestamp=row.block_timestamp,
+                        known=True
+                    )
+                    for row in db.query(AaveReserveState).filter(AaveReserveState.chain_id == chain_id).all()
+                }
+            return {
+                "synced_block": cursor.synced_block,
+                "applied_block": cursor.applied_block,
+                "pending_cursor": cursor.pending_cursor,
+                "pending_floor": cursor.pending_floor,
+                "pending_top": cursor.pending_top,
+            }
+        finally:
+            db.close()
+
+    def _store_events(self, chain_id: str, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert events not stored yet; returns the inserted ones"""
+        if not events:
+            return []
+        db = self.session_factory()
+        try:
+            low = min(e["block_number"] for e in events)
+            high = max(e["block_number"] for e in events)
+            existing = {
+                (row[0], row[1]) for row in db.query(AavePoolEvent.tx_hash, AavePoolEvent.log_index).filter(
+                    AavePoolEvent.chain_id == chain_id,
+                    AavePoolEvent.block_number.between(low, high)
+                ).all()
+            }
+            inserted = []
+            for event in events:
+                key = (event["tx_hash"], event["log_index"])
+                if key in existing:
+                    continue
+                existing.add(key)
+                db.add(AavePoolEvent(chain_id=chain_id, **event))
+                inserted.append(event)
+            db.commit()
+            return inserted
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _finish_walk(self, chain_id: str, floor: Optional[int], top: int,
+                     seen: Optional[Set[Tuple[str, int]]]) -> int:
+        """Drop reorged-out events in (floor, top] and mark the range synced; returns events removed"""
+        db = self.session_factory()
+        try:
+            removed = 0
+            if floor is not None and seen is not None:
+                stale = [
+                    row for row in db.query(AavePoolEvent).filter(
+                        AavePoolEvent.chain_id == chain_id,
+                        AavePoolEvent.block_number > floor,
+                        AavePoolEvent.block_number <= top
+                    ).all()
+                    if (row.tx_hash, row.log_index) not in seen
+                ]
+                for row in stale:
+                    db.delete(row)
+                removed = len(stale)
+            cursor = db.get(AaveIndexerCursor, chain_id)
+            cursor.synced_block = top
+            cursor.pending_cursor = cursor.pending_floor = cursor.pending_top = None
+            db.commit()
+            return removed
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _save_pending(self, chain_id: str, page_cursor: str, floor: Optional[int], top: int):
+        db = self.session_factory()
+        try:
+            cursor = db.get(AaveIndexerCursor, chain_id)
+            cursor.pending_cursor = page_cursor
+            cursor.pending_floor = floor
+            cursor.pending_top = top
+            db.commit()
+        finally:
+            db.close()
+
+    def _apply_confirmed(self, chain_id: str) -> int:
+        """Fold stored events older than the reorg depth into position state; returns events applied"""
+        db = self.session_factory()
+        try:
+            cursor = db.get(AaveIndexerCursor, chain_id)
+            if cursor.synced_block is None:
+                return 0
+            bound = cursor.synced_block - self.reorg_depth
+            position = (
+                cursor.applied_block if cursor.applied_block is not None else -1,
+                cursor.applied_log_index if cursor.applied_log_index is not None else float("inf")
+            )
+            reserves = self._reserves.setdefault(chain_id, {})
+            applied = 0
+            while True:
+                rows = db.query(AavePoolEvent).filter(
+                    AavePoolEvent.chain_id == chain_id,
+                    AavePoolEvent.block_number <= bound,
+                    (AavePoolEvent.block_number > position[0]) |
+                    ((AavePoolEvent.block_number == position[0]) & (AavePoolEvent.log_index > position[1]))
+                ).order_by(AavePoolEvent.block_number, AavePoolEvent.log_index).limit(self.apply_batch).all()
+                if not rows:
+                    break
+
+                events = [(row, decode_args(row.event, row.args)) for row in rows]
+                state = PoolState(reserves=reserves)
+                keys = {key for row, args in events for key in affected_keys(row.event, args)}
+                users = {user for user, _ in keys}
+                for stored in db.query(AaveUserReserve).filter(
+                    AaveUserReserve.chain_id == chain_id, AaveUserReserve.user_address.in_(users)
+                ).all() if users else []:
+                    if (stored.user_address, stored.reserve) in keys:
+                        state.users[(stored.user_address, stored.reserve)] = UserReserve(
+                            int(stored.scaled_supply), int(stored.scaled_variable_debt),
+                            int(stored.stable_debt), stored.last_block
+                        )
+
+                for row, args in events:
+                    state.apply(row.event, args, row.block_number, row.block_timestamp)
+
+                for user, reserve in state.touched:
+                    balances = state.users[(user, reserve)]
+                    db.merge(AaveUserReserve(
+                        chain_id=chain_id, user_address=user, reserve=reserve,
+                        scaled_supply=balances.scaled_supply,
+                        scaled_variable_debt=balances.scaled_variable_debt,
+                        stable_debt=balances.stable_debt,
+                        last_block=balances.last_block
+                    ))
+                for reserve in state.touched_reserves:
+                    indexes = reserves[reserve]
+                    db.merge(AaveReserveState(
+                        chain_id=chain_id, reserve=reserve,
+                        liquidity_index=indexes.liquidity_index,
+                        variable_borrow_index=indexes.variable_borrow_index,
+                        liquidity_rate=indexes.liquidity_rate,
+                        variable_borrow_rate=indexes.variable_borrow_rate,
+                        stable_borrow_rate=indexes.stable_borrow_rate,
+                        block_number=indexes.block_number,
+                        block_timestamp=indexes.timestamp
+                    ))
+                position = (rows[-1].block_number, rows[-1].log_index)
+                applied += len(rows)
+                # Commit per batch so a long bootstrap replay resumes after the last applied log
+                cursor.applied_block, cursor.applied_log_index = position
+                db.commit()
+                if len(rows) < self.apply_batch:
+                    break
+
+            if cursor.applied_block is None or cursor.applied_block <= bound:
+                cursor.applied_block, cursor.applied_log_index = bound, None
+            db.commit()
+            return applied
+        except Exception:
+            db.rollback()
+            # Indexes in memory may be ahead of what was committed
+            self._reserves.pop(chain_id, None)
+            raise
+        finally:
+            db.close()
+
+    def _reserves_without_metadata(self, chain_id: str) -> List[str]:
+        db = self.session_factory()
+        try:
+            return [row[0] for row in db.query(AaveReserveState.reserve).filter(
+                AaveReserveState.chain_id == chain_id, AaveReserveState.symbol == None
+            ).all()]
+        finally:
+            db.close()
+
+    def _save_metadata(self, chain_id: str, reserve: str, symbol: str, decimals: int):
+        db = self.session_factory()
+        try:
+            db.query(AaveReserveState).filter(
+                AaveReserveState.chain_id == chain_id, AaveReserveState.reserve == reserve
+            ).update({"symbol": symbol, "decimals": decimals}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def _supply_rows(self, chain_id: str) -> List[Tuple[str, str, int]]:
+        db = self.session_factory()
+        try:
+            return [
+                (row[0], row[1], int(row[2])) for row in db.query(
+                    AaveUserReserve.user_address, AaveUserReserve.reserve, AaveUserReserve.scaled_supply
+                ).filter(AaveUserReserve.chain_id == chain_id).all()
+            ]
+        finally:
+            db.close()
+
+    def _save_supplies(self, chain_id: str, supplies: Dict[Tuple[str, str], int]):
+        db = self.session_factory()
+        try:
+            for (user, reserve), scaled_supply in supplies.items():
+                row = db.get(AaveUserReserve, (chain_id, user, reserve))
+                if row is not None:
+                    row.scaled_supply = scaled_supply
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _reserves_without_timestamp(self, chain_id: str) -> List[Tuple[str, int]]:
+        db = self.session_factory()
+        try:
+            return [
+                (row[0], row[1]) for row in db.query(AaveReserveState.reserve, AaveReserveState.block_number).filter(
+                    AaveReserveState.chain_id == chain_id, AaveReserveState.block_timestamp == None
+                ).all()
+            ]
+        finally:
+            db.close()
+
+    def _save_timestamp(self, chain_id: str, reserve: str, block_number: int, timestamp: datetime):
+        db = self.session_factory()
+        try:
+            db.query(AaveReserveState).filter(
+                AaveReserveState.chain_id == chain_id, AaveReserveState.reserve == reserve,
+                AaveReserveState.block_number == block_number
+            ).update({"block_timestamp": timestamp}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    # --- Blockscout and RPC side ---
+
+    async def _fill_timestamps(self, chain_id: str, events: List[Dict[str, Any]]):
+        """Look up block times missing from ReserveDataUpdated logs, which anchor interest projection"""
+        blocks: Dict[int, Optional[datetime]] = {}
+        for event in events:
+            if event["event"] == "ReserveDataUpdated" and event["block_timestamp"] is None:
+                block = event["block_number"]
+                if block not in blocks:
+                    blocks[block] = _block_timestamp(await self.blockscout_client.get_block_info(block, chain_id))
+                event["block_timestamp"] = blocks[block]
+
+    async def _resolve_timestamps(self, chain_id: str):
+        """Look up block times of applied reserve states stored without one"""
+        loop = asyncio.get_event_loop()
+        for reserve, block in await loop.run_in_executor(None, self._reserves_without_timestamp, chain_id):
+            timestamp = _block_timestamp(await self.blockscout_client.get_block_info(block, chain_id))
+            if timestamp is None:
+                continue
+            await loop.run_in_executor(None, self._save_timestamp, chain_id, reserve, block, timestamp)
+            indexes = self._reserves.get(chain_id, {}).get(reserve)
+            if indexes is not None and indexes.block_number == block:
+                indexes.timestamp = timestamp
+
+    async def reconcile_supplies(self, chain_id: str, block: int) -> Dict[Tuple[str, str], int]:
+        """
+        Overwrite indexed scaled supplies that differ from the aTokens' scaledBalanceOf at block
+
+        block must be the last applied block, so reads and replayed state
+        describe the same point in the chain. Returns the corrected
+        {(user, reserve): scaled supply}.
+        """
+        loop = asyncio.get_event_loop()
+        rows = await loop.run_in_executor(None, self._supply_rows, chain_id)
+        a_tokens = self._a_tokens.setdefault(chain_id, {})
+        missing = sorted({reserve for _, reserve, _ in rows if reserve not in a_tokens})
+        if missing:
+            reserve_data = await self.multicall_client.get_reserve_data(chain_id, self.pools[chain_id], missing)
+            a_tokens.update({reserve: data.a_token for reserve, data in reserve_data.items() if data is not None})
+
+        rows = [row for row in rows if row[1] in a_tokens]
+        corrections = {}
+        for start in range(0, len(rows), self.reconcile_chunk):
+            chunk = rows[start:start + self.reconcile_chunk]
+            balances = await self.multicall_client.get_balances(
+                chain_id, [(a_tokens[reserve], user) for user, reserve, _ in chunk], scaled=True, block=hex(block)
+            )
+            for user, reserve, scaled_supply in chunk:
+                on_chain = balances.get((a_tokens[reserve], user))
+                if on_chain is not None and on_chain != scaled_supply:
+                    corrections[(user, reserve)] = on_chain
+        if corrections:
+            await loop.run_in_executor(None, self._save_supplies, chain_id, corrections)
+        return corrections
+
+
+    async def _resolve_metadata(self, chain_id: str):
+        """Look up symbol and decimals of newly seen reserves, once per reserve"""
+        loop = asyncio.get_event_loop()
+        for reserve in await loop.run_in_executor(None, self._reserves_without_metadata, chain_id):
+            metadata = _token_metadata(await self.blockscout_client.get_address_info(reserve, chain_id))
+            if metadata is not None:
+                await loop.run_in_executor(None, self._save_metadata, chain_id, reserve, *metadata)
+
+    def _to_event(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        decoded = decode_pool_log(item)
+        tx_hash = item.get("transaction_hash") or item.get("tx_hash")
+        log_index = item.get("index", item.get("log_index"))
+        if decoded is None or tx_hash is None or log_index is None or item.get("block_number") is None:
+            return None
+        name, args = decoded
+        return {
+            "block_number": int(item["block_number"]),
+            "log_index": int(log_index),
+            "tx_hash": tx_hash.lower(),
+            "event": name,
+            "user_address": event_user(name, args),
+            "reserve": args.get("reserve", args.get("debtAsset")),
+            "args": encode_args(args),
+            "block_timestamp": _timestamp(item.get("block_timestamp") or item.get("timestamp")),
+        }
+
+    async def index_chain(self, chain_id: str) -> IndexPass:
+        """Run one pass for a chain: walk new logs, reconcile the reorg window, apply confirmed events"""
+        loop = asyncio.get_event_loop()
+        result = IndexPass(chain_id)
+        cursor = await loop.run_in_executor(None, self._load_cursor, chain_id)
+
+        if cursor["pending_cursor"]:
+            page_cursor, floor, top = cursor["pending_cursor"], cursor["pending_floor"], cursor["pending_top"]
+        else:
+            head = _block_number(await self.blockscout_client.get_latest_block(chain_id))
+            if head is None:
+                raise RuntimeError(f"Could not read the latest block of chain {chain_id}")
+            synced = cursor["synced_block"]
+            page_cursor, top = None, head
+            floor = synced - self.reorg_depth if synced is not None else None
+            self._walk_seen[chain_id] = set()
+        seen = self._walk_seen.get(chain_id)  # None when resuming a walk started by another process
+
+        reached_floor = False
+        while True:
+            response = await self.blockscout_client.get_address_logs(self.pools[chain_id], chain_id, cursor=page_cursor)
+            if "error" in response:
+                raise RuntimeError(response["error"])
+            result.pages += 1
+
+            events = []
+            for item in response.get("data") or []:
+                block = item.get("block_number")
+                if floor is not None and block is not None and int(block) <= floor:
+                    reached_floor = True
+                    break
+                event = self._to_event(item)
+                if event is not None:
+                    events.append(event)
+            if seen is not None:
+                seen.update((e["tx_hash"], e["log_index"]) for e in events)
+            await self._fill_timestamps(chain_id, events)
+            inserted = await loop.run_in_executor(None, self._store_events, chain_id, events)
+            result.events_stored += len(inserted)
+            result.users.update(e["user_address"] for e in inserted if e["user_address"])
+
+            next_call = (response.get("pagination") or {}).get("next_call") or {}
+            page_cursor = (next_call.get("params") or {}).get("cursor")
+            if reached_floor or not page_cursor:
+                break
+            if result.pages >= self.max_pages:
+                await loop.run_in_executor(None, self._save_pending, chain_id, page_cursor, floor, top)
+                print(f"⏳ Aave indexer chain {chain_id}: walk continues next pass "
+                      f"({result.events_stored} events stored so far)")
+                return result
+
+        result.events_removed = await loop.run_in_executor(None, self._finish_walk, chain_id, floor, top, seen)
+        self._walk_seen.pop(chain_id, None)
+        result.complete = True
+        result.synced_block = top
+        result.events_applied = await loop.run_in_executor(None, self._apply_confirmed, chain_id)
+        await self._resolve_metadata(chain_id)
+        await self._resolve_timestamps(chain_id)
+        if self.multicall_client is not None and top > self.reorg_depth and \
+                time.time() - self._reconciled_at.get(chain_id, 0.0) >= self.reconcile_interval:
+            self._reconciled_at[chain_id] = time.time()
+            try:
+                corrections = await self.reconcile_supplies(chain_id, top - self.reorg_depth)
+            except Exception as e:
+                print(f"⚠️ Aave indexer chain {chain_id}: could not reconcile supplies: {e}")
+            else:
+                result.supplies_corrected = len(corrections)
+                result.users.update(user for user, _ in corrections)
+                if corrections:
+                    print(f"🔁 Aave indexer chain {chain_id}: {len(corrections)} scaled supplies "
+                          f"corrected from scaledBalanceOf")
+        if result.events_removed:
+            print(f"♻️ Aave indexer chain {chain_id}: {result.events_removed} reorged events removed")
+
+        if result.users:
+            for listener in self._listeners:
+                try:
+                    signal = listener(chain_id, result.users)
+                    if inspect.isawaitable(signal):
+                        await signal
+                except Exception as e:
+                    print(f"⚠️ Aave indexer listener failed: {e}")
+        return result
+
+    def get_user_reserves(self, chain_id: str, user_address: str) -> List[Dict[str, Any]]:
+        """
+        Indexed balances of a user, in raw token units, at the last applied
+        reserve indexes (interest accrued up to each reserve's last update)
+        """
+        db = self.session_factory()
+        try:
+            rows = db.query(AaveUserReserve).filter(
+                AaveUserReserve.chain_id == chain_id,
+                AaveUserReserve.user_address == user_address.lower()
+            ).all()
+            reserves = self._reserves.get(chain_id, {})
+            positions = []
+            for row in rows:
+                indexes = reserves.get(row.reserve, ReserveIndexes())
+                positions.append({
+                    "reserve": row.reserve,
+                    "scaled_supply": int(row.scaled_supply),
+                    "scaled_variable_debt": int(row.scaled_variable_debt),
+                    "supply": ray_mul(int(row.scaled_supply), indexes.liquidity_index),
+                    "variable_debt": ray_mul(int(row.scaled_variable_debt), indexes.variable_borrow_index),
+                    "stable_debt": int(row.stable_debt),
+                    "last_block": row.last_block,
+                })
+            return positions
+        finally:
+            db.close()
+
+    async def run(self, chain_ids: List[str], interval: float):
+        while True:
+            for chain_id in chain_ids:
+                try:
+                    await self.index_chain(chain_id)
+                except Exception as e:
+                    print(f"❌ Aave indexer failed on chain {chain_id}: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self, chain_ids: List[str], interval: float):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run(chain_ids, interval))
+            print(f"📚 Aave event indexer started for chains {', '.join(chain_ids)}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.multicall_client is not None:
+            await self.multicall_client.aclose()
+
+def load_reserve_states(chain_id: str) -> List[ReserveState]:
+    """Reserve loader for ReserveStateService: indexes as of each reserve's last applied update"""
+    db = SessionLocal()
+    try:
+        return [
+            ReserveState(
+                reserve=row.reserve,
+                liquidity_index=int(row.liquidity_index),
+                variable_borrow_index=int(row.variable_borrow_index),
+                liquidity_rate=int(row.liquidity_rate),
+                variable_borrow_rate=int(row.variable_borrow_rate),
+                last_update=row.block_timestamp.timestamp() if row.block_timestamp else None,
+                symbol=row.symbol,
+                decimals=row.decimals
+            )
+            for row in db.query(AaveReserveState).filter(AaveReserveState.chain_id == chain_id).all()
+        ]
+    finally:
+        db.close()
+
+def load_user_reserves(chain_id: str, user_address: str) -> List[Dict[str, Any]]:
+    """Balance loader for ReserveStateService: a user's indexed scaled balances"""
+    db = SessionLocal()
+    try:
+        return [
+            {
+                "reserve": row.reserve,
+                "scaled_supply": int(row.scaled_supply),
+                "scaled_variable_debt": int(row.scaled_variable_debt),
+                "stable_debt": int(row.stable_debt),
+            }
+            for row in db.query(AaveUserReserve).filter(
+                AaveUserReserve.chain_id == chain_id, AaveUserReserve.user_address == user_address.lower()
+            ).all()
+        ]
+    finally:
+        db.close()
+
+# Global indexer instance, started with the API when AAVE_EVENT_INDEXER_ENABLED is set
+event_indexer: Optional[AaveEventIndexer] = None
+
+def _blockscout_client() -> BlockscoutMCPClient:
+    from langchain_mcp_adapters.client import MultiServerMCPClient
+
+    mcp_client = MultiServerMCPClient({
+        "blockscout": {
+            "transport": "streamable_http",
+            "url": "https://mcp.blockscout.com/mcp",
+        }
+    })
+    return BlockscoutMCPClient(mcp_client)
+
+def indexer_chains() -> List[str]:
+    """Configured chains that have a known Pool address"""
+    chains = [c.strip() for c in settings.AAVE_EVENT_INDEXER_CHAINS.split(",") if c.strip()]
+    return [c for c in chains if c in settings.AAVE_POOL_ADDRESSES]
+
+def create_event_indexer(blockscout_client: BlockscoutMCPClient) -> AaveEventIndexer:
+    return AaveEventIndexer(
+        blockscout_client,
+        settings.AAVE_POOL_ADDRESSES,
+        reorg_depth=settings.AAVE_REORG_DEPTH_BLOCKS,
+        max_pages=settings.AAVE_EVENT_INDEXER_MAX_PAGES,
+        multicall_client=MulticallClient(settings.RPC_URLS, batch_size=settings.MULTICALL_BATCH_SIZE),
+        reconcile_interval=settings.AAVE_SUPPLY_RECONCILE_MINUTES * 60
+    )
+
+def start_event_indexer(monitor_service=None):
+    """Start indexing the configured chains; users with new Pool events are refreshed by monitor_service"""
+    global event_indexer
+    client = monitor_service.monitor.blockscout_client if monitor_service is not None else _blockscout_client()
+    event_indexer = create_event_indexer(client)
+    if monitor_service is not None:
+        def refresh_users(chain_id: str, users: Set[str]):
+            for user in users:
+                monitor_service.trigger(user)
+        event_indexer.subscribe(refresh_users)
+    event_indexer.start(indexer_chains(), settings.AAVE_EVENT_INDEXER_INTERVAL_SECONDS)
+
+async def stop_event_indexer():
+    if event_indexer is not None:
+        await event_indexer.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Index Aave Pool events until the chain is synced")
+    parser.add_argument("--chain", action="append", help="Chain id (repeatable); defaults to AAVE_EVENT_INDEXER_CHAINS")
+    args = parser.parse_args()
+
+    indexer = create_event_indexer(_blockscout_client())
+
+    async def catch_up():
+        for chain_id in args.chain or indexer_chains():
+            while True:
+                result = await indexer.index_chain(chain_id)
+                if result.complete:
+                    print(f"✅ Chain {chain_id} synced to block {result.synced_block}, "
+                          f"{result.events_applied} events applied")
+                    break
+
+    asyncio.run(catch_up())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Background position monitoring for registered users
+Keeps every active user's wallet under PositionMonitorService and stores refreshed positions
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.user import User
+from app.models.position import Position
+from app.services.position_analysis.alert_engine import AlertEngine, LogSink, WebhookSink
+from app.services.position_analysis.blockscout_client import BlockscoutMCPClient
+from app.services.position_analysis.multicall_client import MulticallClient
+from app.services.position_analysis.position_monitor import PositionMonitorService
+from app.tasks.transaction_ingestion import TransactionIngestionLoop, create_ingestion_loop
+
+# Global service instance
+monitor_service: Optional[PositionMonitorService] = None
+ingestion_loop: Optional[TransactionIngestionLoop] = None
+_wallet_sync_task: Optional[asyncio.Task] = None
+
+def create_alert_engine() -> AlertEngine:
+    """Alert engine logging every alert, and POSTing to ALERT_WEBHOOK_URL when set"""
+    sinks = [LogSink()]
+    if settings.ALERT_WEBHOOK_URL:
+        sinks.append(WebhookSink(settings.ALERT_WEBHOOK_URL))
+    return AlertEngine(
+        sinks,
+        default_threshold=settings.HEALTH_FACTOR_DANGER,
+        hysteresis=settings.ALERT_HYSTERESIS,
+        dedup_window=settings.ALERT_DEDUP_WINDOW_MINUTES * 60,
+        queue_size=settings.ALERT_QUEUE_SIZE,
+        batch_size=settings.ALERT_BATCH_SIZE,
+        max_retries=settings.ALERT_MAX_RETRIES
+    )
+
+def create_monitor_service() -> PositionMonitorService:
+    """Build a monitoring service that stores refreshed positions"""
+    # Initialize MCP client for Blockscout
+    mcp_client = MultiServerMCPClient({
+        "blockscout": {
+            "transport": "streamable_http",
+            "url": "https://mcp.blockscout.com/mcp",
+        }
+    })
+
+    blockscout_client = BlockscoutMCPClient(mcp_client)
+    service = PositionMonitorService(
+        blockscout_client,
+        interval_minutes=settings.POSITION_UPDATE_INTERVAL_MINUTES,
+        max_concurrency=settings.POSITION_MONITOR_MAX_CONCURRENCY,
+        jitter=settings.POSITION_MONITOR_JITTER,
+        alert_engine=create_alert_engine(),
+        account_reader=MulticallClient(settings.RPC_URLS, batch_size=settings.MULTICALL_BATCH_SIZE),
+        pool_addresses=settings.AAVE_POOL_ADDRESSES,
+        sweep_interval=settings.POSITION_MONITOR_ONCHAIN_SWEEP_SECONDS
+    )
+    service.subscribe(store_analysis)
+    return service
+
+def get_monitor_service() -> PositionMonitorService:
+    """Get or initialize the monitoring service"""
+    global monitor_service
+    if monitor_service is None:
+        monitor_service = create_monitor_service()
+    return monitor_service
+
+def load_registered_wallets() -> List[str]:
+    """Wallet addresses of every active user"""
+    db = SessionLocal()
+    try:
+        return [row[0] for row in db.query(User.wallet_address).filter(User.is_active == True).all()]
+    finally:
+        db.close()
+
+async def sync_registered_wallets(service: PositionMonitorService) -> int:
+    """
+    Monitor every active user's wallet and stop monitoring wallets of deactivated or deleted users
+
+    Wallets already monitored keep their chains and alert threshold. Returns the number of wallets monitored.
+    """
+    loop = asyncio.get_event_loop()
+    wallets = {wallet.lower(): wallet for wallet in await loop.run_in_executor(None, load_registered_wallets)}
+    for key in [key for key in service.wallets if key not in wallets]:
+        service.remove_monitored_address(key)
+    for key, wallet in wallets.items():
+        if key not in service.wallets:
+            service.add_monitored_address(wallet, alert_threshold=settings.HEALTH_FACTOR_DANGER)
+    return len(wallets)
+
+async def store_analysis(wallet_address: str, analysis: Dict[str, Any]):
+    """Persist a refreshed analysis without blocking the event loop"""
+    loop = asyncio.get_event_loop()
+    await loop.run_in_executor(None, store_positions, wallet_address, analysis)
+
+def store_positions(wallet_address: str, analysis: Dict[str, Any]):
+    """Upsert the refreshed positions of a registered wallet"""
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.wallet_address == wallet_address).first()
+        if user is None:
+            return
+
+        prices = analysis.get("prices", {})
+        for pos_data in analysis.get("positions", []):
+            supplied = pos_data.get("supplied_assets", [])
+            borrowed = pos_data.get("borrowed_assets", [])
+            total_collateral_usd = sum(
+                asset.get("usd_value", asset.get("amount", 0) * prices.get(asset.get("token"), 0.0))
+                for asset in supplied
+            )
+            total_borrowed_usd = sum(
+                asset.get("usd_value", asset.get("amount", 0) * prices.get(asset.get("token"), 0.0))
+                for asset in borrowed
+            )
+
+            existing = db.query(Position).filter(
+                Position.user_id == user.id,
+                Position.chain_id == pos_data["chain_id"]
+            ).first()
+
+            if existing is None:
+                db.add(Position(
+                    user_id=user.id,
+                    chain_id=pos_data["chain_id"],
+                    chain_name=pos_data["chain_name"],
+                    supplied_assets=supplied,
+                    borrowed_assets=borrowed,
+                    health_factor=pos_data["health_factor"],
+                    risk_level=pos_data["risk_level"],
+                    total_collateral_usd=total_collateral_usd,
+                    total_borrowed_usd=total_borrowed_usd
+                ))
+            else:
+                existing.supplied_assets = supplied
+                existing.borrowed_assets = borrowed
+                existing.health_factor = pos_data["health_factor"]
+                existing.risk_level = pos_data["risk_level"]
+                existing.total_collateral_usd = total_collateral_usd
+                existing.total_borrowed_usd = total_borrowed_usd
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+async def _sync_wallets_periodically(service: PositionMonitorService):
+    """Pick up newly registered users once per update interval"""
+    while True:
+        await asyncio.sleep(service.interval)
+        try:
+            await sync_registered_wallets(service)
+        except Exception as e:
+            print(f"⚠️ Could not sync monitored wallets: {e}")
+
+async def start_position_monitoring():
+    """Load registered wallets and start the scheduler and transaction ingestion"""
+    global _wallet_sync_task, ingestion_loop
+    service = get_monitor_service()
+    count = await sync_registered_wallets(service)
+    print(f"👛 Monitoring {count} registered wallets")
+    service.start()
+    _wallet_sync_task = asyncio.ensure_future(_sync_wallets_periodically(service))
+    ingestion_loop = create_ingestion_loop(service)
+    ingestion_loop.start()
+
+async def stop_position_monitoring():
+    if _wallet_sync_task is not None:
+        _wallet_sync_task.cancel()
+    if ingestion_loop is not None:
+        await ingestion_loop.stop()
+    if monitor_service is not None:
+        await monitor_service.stop()
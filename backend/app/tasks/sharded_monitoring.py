@@ -0,0 +1,227 @@
+"""
+Sharded position monitoring across worker processes
+
+Wallets map to a fixed number of shards by address hash, and shards map to
+live workers on a consistent-hash ring, so a worker joining or leaving only
+moves the shards adjacent to it on the ring. Ownership is coordinated
+through Postgres: workers heartbeat into monitor_workers and hold
+time-limited leases in monitor_shard_leases. A worker releases shards the
+ring no longer assigns to it and picks up free or expired ones, so a dead
+worker's shards move after at most one lease TTL.
+
+Each worker process runs its own event loop, database pool, price caches
+and PositionMonitorService over the wallets of the shards it owns.
+
+Usage (set POSITION_MONITORING_ENABLED=false on the API processes):
+    python -m app.tasks.sharded_monitoring --workers 4
+"""
+
+import argparse
+import asyncio
+import bisect
+import hashlib
+import multiprocessing
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable, List, Optional, Set
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.models.monitor_shard import MonitorWorker, ShardLease
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.sha1(key.encode()).digest()[:8], "big")
+
+def shard_for_address(address: str, num_shards: int) -> int:
+    """Stable shard of a wallet address"""
+    return _hash(address.lower()) % num_shards
+
+class HashRing:
+    """Consistent-hash ring with virtual nodes"""
+
+    def __init__(self, nodes: Iterable[str], replicas: int = 64):
+        points = sorted((_hash(f"{node}#{i}"), node) for node in nodes for i in range(replicas))
+        self._hashes = [h for h, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._nodes:
+            return None
+        i = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._nodes[i]
+
+class ShardCoordinator:
+    """Shard leases for one worker, stored in the shared database"""
+
+    def __init__(self, worker_id: str, num_shards: int, lease_ttl: float,
+                 session_factory: Callable = SessionLocal):
+        self.worker_id = worker_id
+        self.num_shards = num_shards
+        self.lease_ttl = timedelta(seconds=lease_ttl)
+        self.session_factory = session_factory
+
+    @staticmethod
+    def _now() -> datetime:
+        return datetime.now(timezone.utc)
+
+    def ensure_shards(self):
+        """Create missing shard rows; concurrent workers may race, which is harmless"""
+        db = self.session_factory()
+        try:
+            existing = {row[0] for row in db.query(ShardLease.shard_id).all()}
+            for shard_id in range(self.num_shards):
+                if shard_id not in existing:
+                    db.add(ShardLease(shard_id=shard_id))
+            db.commit()
+        except Exception:
+            db.rollback()
+        finally:
+            db.close()
+
+    def rebalance(self) -> Set[int]:
+        """
+        Heartbeat, then release shards assigned elsewhere and acquire or
+        renew the shards the ring assigns to this worker
+
+        Returns:
+            Shards this worker currently holds a valid lease on
+        """
+        now = self._now()
+        db = self.session_factory()
+        try:
+            db.merge(MonitorWorker(worker_id=self.worker_id, heartbeat_at=now))
+            db.commit()
+
+            live = [
+                row[0] for row in db.query(MonitorWorker.worker_id)
+                .filter(MonitorWorker.heartbeat_at > now - self.lease_ttl).all()
+            ]
+            ring = HashRing(live)
+            desired = [s for s in range(self.num_shards) if ring.owner(str(s)) == self.worker_id]
+
+            db.query(ShardLease).filter(
+                ShardLease.owner == self.worker_id,
+                ShardLease.shard_id.notin_(desired)
+            ).update({"owner": None, "lease_expires_at": None}, synchronize_session=False)
+
+            if desired:
+                # Conditional update: only free, expired or already owned leases are taken
+                db.query(ShardLease).filter(
+                    ShardLease.shard_id.in_(desired),
+                    (ShardLease.owner == None) | (ShardLease.owner == self.worker_id) |
+                    (ShardLease.lease_expires_at < now)
+                ).update({"owner": self.worker_id, "lease_expires_at": now + self.lease_ttl},
+                         synchronize_session=False)
+            db.commit()
+
+            return {
+                row[0] for row in db.query(ShardLease.shard_id)
+                .filter(ShardLease.owner == self.worker_id, ShardLease.lease_expires_at > now).all()
+            }
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def leave(self):
+        """Release every lease and deregister so other workers take over at once"""
+        db = self.session_factory()
+        try:
+            db.query(ShardLease).filter(ShardLease.owner == self.worker_id).update(
+                {"owner": None, "lease_expires_at": None}, synchronize_session=False
+            )
+            db.query(MonitorWorker).filter(MonitorWorker.worker_id == self.worker_id).delete()
+            db.commit()
+        finally:
+            db.close()
+
+class ShardedMonitorWorker:
+    """Runs a PositionMonitorService over the wallets of the shards this worker owns"""
+
+    def __init__(self, worker_id: str, service, coordinator: ShardCoordinator,
+                 load_wallets: Callable[[], List[str]], rebalance_interval: Optional[float] = None,
+                 ingestion=None):
+        self.worker_id = worker_id
+        self.service = service
+        self.coordinator = coordinator
+        self.load_wallets = load_wallets
+        self.ingestion = ingestion  # Optional TransactionIngestionLoop over the same service
+        self.rebalance_interval = rebalance_interval or coordinator.lease_ttl.total_seconds() / 3
+        self.owned: Set[int] = set()
+
+    def _apply(self, owned: Set[int], wallets: List[str]):
+        num_shards = self.coordinator.num_shards
+        mine = {w.lower(): w for w in wallets if shard_for_address(w, num_shards) in owned}
+        for key in [key for key in self.service.wallets if key not in mine]:
+            self.service.remove_monitored_address(key)
+        for wallet in mine.values():
+            if wallet.lower() not in self.service.wallets:
+                self.service.add_monitored_address(wallet, alert_threshold=settings.HEALTH_FACTOR_DANGER)
+        if owned != self.owned:
+            print(f"🧩 {self.worker_id}: {len(owned)} shards, {len(mine)} wallets")
+        self.owned = owned
+
+    async def run(self):
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self.coordinator.ensure_shards)
+        self.service.start()
+        if self.ingestion is not None:
+            self.ingestion.start()
+        try:
+            while True:
+                try:
+                    owned = await loop.run_in_executor(None, self.coordinator.rebalance)
+                    wallets = await loop.run_in_executor(None, self.load_wallets)
+                    self._apply(owned, wallets)
+                except Exception as e:
+                    print(f"⚠️ {self.worker_id}: rebalance failed: {e}")
+                await asyncio.sleep(self.rebalance_interval)
+        finally:
+            if self.ingestion is not None:
+                await self.ingestion.stop()
+            await self.service.stop()
+            await loop.run_in_executor(None, self.coordinator.leave)
+
+def run_worker(worker_id: str, num_shards: int, lease_ttl: float):
+    """Worker process entry point"""
+    from app.tasks.position_monitoring import create_monitor_service, load_registered_wallets
+    from app.tasks.transaction_ingestion import create_ingestion_loop
+    from app.tasks.aave_event_indexer import load_reserve_states, load_user_reserves
+    from app.services.position_analysis.reserve_state import reserve_state_service
+
+    # Connections inherited from the parent process must not be shared
+    engine.dispose()
+    reserve_state_service.configure(load_reserve_states, load_user_reserves)
+    coordinator = ShardCoordinator(worker_id, num_shards, lease_ttl)
+    service = create_monitor_service()
+    worker = ShardedMonitorWorker(worker_id, service, coordinator, load_registered_wallets,
+                                  ingestion=create_ingestion_loop(service))
+    try:
+        asyncio.run(worker.run())
+    except KeyboardInterrupt:
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Run sharded position monitoring workers")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes on this host")
+    parser.add_argument("--shards", type=int, default=settings.MONITOR_SHARDS)
+    parser.add_argument("--lease-ttl", type=float, default=settings.MONITOR_LEASE_TTL_SECONDS)
+    args = parser.parse_args()
+
+    prefix = f"{socket.gethostname()}-{os.getpid()}"
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(f"{prefix}-{i}", args.shards, args.lease_ttl))
+        for i in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""
+Transaction-cursor ingestion per (wallet, chain)
+
+Each monitored wallet keeps a cursor per chain in wallet_tx_cursors holding
+the timestamp of the newest transaction ingested. A pass asks Blockscout only
+for transactions since the cursor (age_from, minus a small overlap for
+transactions sharing the cursor's second), follows pagination, stores unseen
+transactions in wallet_transactions and advances the cursor. A pass that
+hits max_pages saves its page cursor instead of advancing, and the next
+passes resume paging that same window until it is exhausted; only then
+does the cursor move to the newest transaction seen, so no gap is left
+behind. Transactions
+that touch Aave (pool methods, aTokens or debt tokens) are signalled to
+listeners; the ingestion loop uses that to make the wallet due in
+PositionMonitorService instead of waiting for its next scheduled refresh.
+"""
+
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.wallet_transaction import WalletTxCursor, WalletTransaction
+from app.services.position_analysis.blockscout_client import BlockscoutMCPClient
+from app.services.position_analysis.token_registry import aave_underlying
+
+# Aave Pool and WrappedTokenGateway entry points, lowercased
+AAVE_METHODS = {
+    "supply", "supplywithpermit", "deposit", "depositeth", "borrow", "borroweth",
+    "repay", "repaywithpermit", "repaywithatokens", "repayeth", "withdraw", "withdraweth",
+    "liquidationcall", "setuserusereserveascollateral", "setuseremode", "swapborrowratemode",
+    "flashloan", "flashloansimple",
+}
+
+def _address(value: Any) -> Optional[str]:
+    """Blockscout returns addresses either as a hash string or as {"hash": ...}"""
+    if isinstance(value, dict):
+        value = value.get("hash")
+    return value.lower() if isinstance(value, str) else None
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    """Timestamps read back from databases without timezone support are UTC"""
+    return value.replace(tzinfo=timezone.utc) if value is not None and value.tzinfo is None else value
+
+AAVE_POOLS = {address.lower() for address in settings.AAVE_POOL_ADDRESSES.values()}
+
+def is_aave_transaction(item: Dict[str, Any]) -> bool:
+    """Whether a Blockscout transaction item calls Aave or moves an aToken or debt token"""
+    method = (item.get("method") or "").split("(")[0].lower()
+    if method in AAVE_METHODS or _address(item.get("to")) in AAVE_POOLS:
+        return True
+    token = item.get("token")
+    symbol = token.get("symbol") if isinstance(token, dict) else None
+    return bool(symbol) and aave_underlying(symbol) is not None
+
+@dataclass
+class IngestResult:
+    """Outcome of one incremental pass over a (wallet, chain)"""
+    wallet_address: str
+    chain_id: str
+    new_transactions: List[Dict[str, Any]] = field(default_factory=list)
+    aave_transactions: List[Dict[str, Any]] = field(default_factory=list)
+    pages: int = 0
+    truncated: bool = False  # Stopped at max_pages; the next pass resumes the same window
+    resumed: bool = False  # Continued the window of an earlier truncated pass
+    baseline: bool = False  # First pass for this (wallet, chain): nothing to compare against
+
+class TransactionIngestor:
+    """Pulls transactions newer than each (wallet, chain) cursor into the local store"""
+
+    def __init__(self, blockscout_client: BlockscoutMCPClient, session_factory: Callable = SessionLocal,
+                 initial_lookback: float = 24 * 3600, overlap: float = 60.0, max_pages: int = 10):
+        self.blockscout_client = blockscout_client
+        self.session_factory = session_factory
+        self.initial_lookback = timedelta(seconds=initial_lookback)
+        self.overlap = timedelta(seconds=overlap)
+        self.max_pages = max_pages
+        self._listeners: List[Callable[[IngestResult], Any]] = []
+
+        # Stats
+        self.passes = 0
+        self.failures = 0
+        self.pages_fetched = 0
+        self.truncated_passes = 0
+        self.transactions_stored = 0
+        self.aave_signals = 0
+
+    def subscribe(self, listener: Callable[[IngestResult], Any]):
+        """Register a (possibly async) callback invoked with each IngestResult that has Aave activity"""
+        self._listeners.append(listener)
+
+    def _load_cursor(self, wallet: str, chain_id: str) -> Tuple[Optional[datetime], Optional[str], Optional[datetime]]:
+        """(last ingested timestamp, page cursor to resume, age_from of the window being resumed)"""
+        db = self.session_factory()
+        try:
+            cursor = db.get(WalletTxCursor, (wallet, chain_id))
+            if cursor is None:
+                return None, None, None
+            return _aware(cursor.last_timestamp), cursor.page_cursor, _aware(cursor.page_age_from)
+        finally:
+            db.close()
+
+    def _store(self, wallet: str, chain_id: str, items: List[Tuple[datetime, Dict[str, Any]]],
+               checked_at: datetime, age_from: datetime, next_page: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Insert unseen transactions, then either save where to resume paging (next_page set)
+        or advance the cursor past the completed window; returns the newly stored items
+        """
+        db = self.session_factory()
+        try:
+            hashes = [item["hash"] for _, item in items]
+            existing = {
+                row[0] for row in db.query(WalletTransaction.tx_hash).filter(
+                    WalletTransaction.wallet_address == wallet,
+                    WalletTransaction.chain_id == chain_id,
+                    WalletTransaction.tx_hash.in_(hashes)
+                ).all()
+            } if hashes else set()
+
+            stored = []
+            for timestamp, item in items:
+                if item["hash"] in existing:
+                    continue
+                existing.add(item["hash"])
+                db.add(WalletTransaction(
+                    wallet_address=wallet,
+                    chain_id=chain_id,
+                    tx_hash=item["hash"],
+                    block_number=item.get("block_number"),
+                    timestamp=timestamp,
+                    from_address=_address(item.get("from")),
+                    to_address=_address(item.get("to")),
+                    method=(item.get("method") or None),
+                    is_aave=is_aave_transaction(item),
+                    raw=item
+                ))
+                stored.append(item)
+
+            cursor = db.get(WalletTxCursor, (wallet, chain_id))
+            if cursor is None:
+                cursor = WalletTxCursor(wallet_address=wallet, chain_id=chain_id)
+                db.add(cursor)
+
+            # Newest transaction of the window, across the passes that paged it
+            newest_at, newest_hash = _aware(cursor.pending_timestamp), cursor.pending_tx_hash
+            if items:
+                item_at, item = max(items, key=lambda entry: entry[0])
+                if newest_at is None or item_at > newest_at:
+                    newest_at, newest_hash = item_at, item["hash"]
+
+            if next_page:
+                cursor.page_cursor = next_page
+                cursor.page_age_from = age_from
+                cursor.pending_timestamp = newest_at
+                cursor.pending_tx_hash = newest_hash
+            else:
+                last = _aware(cursor.last_timestamp)
+                if newest_at is not None and (last is None or newest_at > last):
+                    cursor.last_timestamp = newest_at
+                    cursor.last_tx_hash = newest_hash
+                elif last is None:
+                    # Nothing in the lookback window: start from this pass
+                    cursor.last_timestamp = checked_at
+                cursor.page_cursor = None
+                cursor.page_age_from = None
+                cursor.pending_timestamp = None
+                cursor.pending_tx_hash = None
+            db.commit()
+            return stored
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def ingest(self, wallet_address: str, chain_id: str) -> IngestResult:
+        """Fetch, store and signal the transactions of one wallet on one chain since its cursor"""
+        wallet = wallet_address.lower()
+        loop = asyncio.get_event_loop()
+        checked_at = datetime.now(timezone.utc)
+        since, page_cursor, page_age_from = await loop.run_in_executor(None, self._load_cursor, wallet, chain_id)
+        result = IngestResult(wallet, chain_id, baseline=since is None, resumed=page_cursor is not None)
+        if page_cursor is not None:
+            age_from = page_age_from  # Continue the window an earlier pass could not finish
+        else:
+            age_from = (since - self.overlap) if since is not None else checked_at - self.initial_lookback
+
+        items: List[Tuple[datetime, Dict[str, Any]]] = []
+        self.passes += 1
+        try:
+            while True:
+                response = await self.blockscout_client.get_transactions_by_address(
+                    wallet_address, chain_id, age_from=age_from.strftime("%Y-%m-%dT%H:%M:%S.00Z"), cursor=page_cursor
+                )
+                if "error" in response:
+                    raise RuntimeError(response["error"])
+                result.pages += 1
+                for item in response.get("data") or []:
+                    timestamp = _parse_timestamp(item.get("timestamp"))
+                    if item.get("hash") and timestamp is not None:
+                        items.append((timestamp, item))
+
+                next_call = (response.get("pagination") or {}).get("next_call") or {}
+                page_cursor = (next_call.get("params") or {}).get("cursor")
+                if not page_cursor:
+                    break
+                if result.pages >= self.max_pages:
+                    # Pages run newest first: the older rest of the window is paged on the next pass
+                    result.truncated = True
+                    self.truncated_passes += 1
+                    print(f"⚠️ {wallet} on chain {chain_id}: more than {self.max_pages} pages of new transactions, "
+                          f"resuming the oldest on the next pass")
+                    break
+        except Exception:
+            self.failures += 1
+            raise
+        finally:
+            self.pages_fetched += result.pages
+
+        result.new_transactions = await loop.run_in_executor(
+            None, self._store, wallet, chain_id, items, checked_at, age_from,
+            page_cursor if result.truncated else None
+        )
+        result.aave_transactions = [item for item in result.new_transactions if is_aave_transaction(item)]
+        self.transactions_stored += len(result.new_transactions)
+
+        if result.aave_transactions and not result.baseline:
+            self.aave_signals += 1
+            for listener in self._listeners:
+                try:
+                    signal = listener(result)
+                    if inspect.isawaitable(signal):
+                        await signal
+                except Exception as e:
+                    print(f"⚠️ Ingestion listener failed for {wallet}: {e}")
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "passes": self.passes,
+            "failures": self.failures,
+            "pages_fetched": self.pages_fetched,
+            "pages_per_pass": self.pages_fetched / self.passes if self.passes else 0.0,
+            "truncated_passes": self.truncated_passes,
+            "transactions_stored": self.transactions_stored,
+            "aave_signals": self.aave_signals,
+        }
+
+class TransactionIngestionLoop:
+    """
+    Runs an ingestion pass over every (wallet, chain) a PositionMonitorService
+    monitors, and makes wallets with new Aave activity due immediately
+    """
+
+    def __init__(self, ingestor: TransactionIngestor, service, interval: float = 60.0,
+                 max_concurrency: int = 4):
+        self.ingestor = ingestor
+        self.service = service
+        self.interval = interval
+        self.max_concurrency = max_concurrency
+        self._task: Optional[asyncio.Task] = None
+        self.last_pass_at: Optional[float] = None
+        self.last_pass_seconds: Optional[float] = None
+        ingestor.subscribe(self._on_aave_activity)
+
+    def _on_aave_activity(self, result: IngestResult):
+        # The change digest may round a small repay away, so force a re-parse of that chain
+        forget = getattr(self.service.monitor, "forget_wallet", None)
+        if forget is not None:
+            forget(result.wallet_address, result.chain_id)
+        if self.service.trigger(result.wallet_address):
+            print(f"🔔 {result.wallet_address}: {len(result.aave_transactions)} new Aave transaction(s) "
+                  f"on chain {result.chain_id}, refreshing")
+
+    def _targets(self) -> List[Tuple[str, str]]:
+        default_chains = list(self.service.monitor.supported_chains)
+        return [
+            (wallet.address, chain_id)
+            for wallet in list(self.service.wallets.values())
+            for chain_id in (wallet.chain_ids or default_chains)
+        ]
+
+    async def run_once(self) -> int:
+        """One pass over all monitored (wallet, chain) pairs; returns the number of new transactions"""
+        started = time.time()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def ingest(address: str, chain_id: str) -> int:
+            async with semaphore:
+                try:
+                    return len((await self.ingestor.ingest(address, chain_id)).new_transactions)
+                except Exception as e:
+                    print(f"❌ Transaction ingestion failed for {address} on chain {chain_id}: {e}")
+                    return 0
+
+        counts = await asyncio.gather(*(ingest(address, chain_id) for address, chain_id in self._targets()))
+        self.last_pass_at = time.time()
+        self.last_pass_seconds = self.last_pass_at - started
+        return sum(counts)
+
+    async def _run(self):
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+            print(f"📥 Transaction ingestion started (every {self.interval:g}s)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval_seconds": self.interval,
+            "last_pass_at": self.last_pass_at,
+            "last_pass_seconds": self.last_pass_seconds,
+            **self.ingestor.get_stats(),
+        }
+
+def create_ingestion_loop(service) -> TransactionIngestionLoop:
+    """Ingestion loop over the wallets of a monitoring service, configured from settings"""
+    ingestor = TransactionIngestor(
+        service.monitor.blockscout_client,
+        initial_lookback=settings.TX_INGESTION_INITIAL_LOOKBACK_HOURS * 3600
+    )
+    return TransactionIngestionLoop(
+        ingestor,
+        service,
+        interval=settings.TX_INGESTION_INTERVAL_SECONDS,
+        max_concurrency=settings.TX_INGESTION_MAX_CONCURRENCY
+    )
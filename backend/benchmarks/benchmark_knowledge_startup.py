@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold process startup of the DeFi knowledge graph with and without a prebuilt snapshot
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Construct the graph and do a first lookup, as a worker would on its first request
+STARTUP_CODE = (
+    "from app.services.position_analysis.defi_knowledge import DeFiKnowledgeGraph; "
+    "DeFiKnowledgeGraph().get_liquidation_threshold('WETH')"
+)
+
+def time_startup(env: dict, runs: int) -> float:
+    """Average wall-clock time of a fresh interpreter running STARTUP_CODE"""
+    total = 0.0
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", STARTUP_CODE], cwd=BACKEND_DIR, env=env, check=True)
+        total += time.perf_counter() - start
+    return total / runs
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    base_env = {k: v for k, v in os.environ.items() if k != "KNOWLEDGE_SNAPSHOT_PATH"}
+
+    print("🚀 Knowledge graph startup benchmark\n")
+    cold = time_startup(base_env, runs)
+    print(f"  Without snapshot: {1000 * cold:8.1f} ms")
+
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot_path = os.path.join(directory, "knowledge_snapshot.pkl")
+        subprocess.run(
+            [sys.executable, "-m", "app.services.position_analysis.knowledge_snapshot", snapshot_path],
+            cwd=BACKEND_DIR, env=base_env, check=True
+        )
+
+        warm = time_startup({**base_env, "KNOWLEDGE_SNAPSHOT_PATH": snapshot_path}, runs)
+        print(f"  With snapshot:    {1000 * warm:8.1f} ms")
+        print(f"\n📊 Speedup: {cold / warm:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark batched getUserAccountData reads through Multicall3
+
+Runs against a JSON-RPC node given with --rpc-url (e.g. `anvil --fork-url <mainnet rpc>`
+and --rpc-url http://127.0.0.1:8545), or by default against an in-process stand-in
+node that decodes aggregate3 calldata and answers each call.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+import httpx
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.position_analysis.multicall_client import (
+    AGGREGATE3, GET_USER_ACCOUNT_DATA, MulticallClient
+)
+
+MAINNET_POOL = "0x87870Bca3F3fD6335C3F4ce8392D69350B4fA4E2"
+
+def _word(value: int) -> bytes:
+    return value.to_bytes(32, "big")
+
+def _answer_aggregate3(calldata: str) -> str:
+    """Stand-in node: decode Call3[] and return a synthetic account per user"""
+    raw = bytes.fromhex(calldata.removeprefix("0x"))[4:]
+    words = lambda offset: int.from_bytes(raw[offset:offset + 32], "big")
+    base = words(0) + 32
+    count = words(base - 32)
+    results = []
+    for i in range(count):
+        start = base + words(base + 32 * i)
+        data_start = start + words(start + 64)
+        data = raw[data_start + 32:data_start + 32 + words(data_start)]
+        if data[:4].hex() != GET_USER_ACCOUNT_DATA:
+            results.append((False, b""))
+            continue
+        user = int.from_bytes(data[4:36], "big")
+        collateral = 10 ** 8 * (1000 + user % 100_000)
+        debt = collateral * (user % 70) // 100
+        hf = collateral * 8250 * 10 ** 14 // debt if debt else 2 ** 256 - 1
+        results.append((True, b"".join(_word(v) for v in (collateral, debt, 0, 8250, 8000, hf))))
+
+    # Result[] = (bool success, bytes returnData)[]
+    encoded = [_word(int(success)) + _word(0x40) + _word(len(data)) + data.ljust((len(data) + 31) // 32 * 32, b"\0")
+               for success, data in results]
+    offsets, position = [], 32 * len(encoded)
+    for element in encoded:
+        offsets.append(_word(position))
+        position += len(element)
+    return "0x" + (_word(0x20) + _word(len(encoded)) + b"".join(offsets) + b"".join(encoded)).hex()
+
+def stand_in_transport(latency: float) -> httpx.MockTransport:
+    async def handle(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        body = json.loads(request.content)
+        replies = []
+        for call in body if isinstance(body, list) else [body]:
+            data = call["params"][0]["data"]
+            assert data[2:10] == AGGREGATE3
+            replies.append({"jsonrpc": "2.0", "id": call["id"], "result": _answer_aggregate3(data)})
+        return httpx.Response(200, json=replies if isinstance(body, list) else replies[0])
+    return httpx.MockTransport(handle)
+
+async def run(args):
+    transport = None if args.rpc_url else stand_in_transport(args.latency)
+    client = MulticallClient({"1": args.rpc_url or "http://stand-in"}, batch_size=args.batch_size,
+                             transport=transport)
+    rng = random.Random(42)
+    users = ["0x" + rng.getrandbits(160).to_bytes(20, "big").hex() for _ in range(args.users)]
+    target = "the stand-in node" if transport else args.rpc_url
+    print(f"🚀 Multicall account-data benchmark ({args.users} users, {args.batch_size} calls per eth_call, {target})\n")
+
+    try:
+        for label in ("cold", "warm"):
+            start = time.perf_counter()
+            accounts = await client.get_user_account_data("1", args.pool, users)
+            elapsed = time.perf_counter() - start
+            print(f"  {label:4s}: {1000 * elapsed:8.1f} ms, {args.users / elapsed:10.0f} users/s")
+
+        # The same reads as one eth_call per user, on a sample
+        sample = users[:min(len(users), 200)]
+        single = MulticallClient(client.rpc_urls, batch_size=1, transport=transport)
+        start = time.perf_counter()
+        for user in sample:
+            await single.get_user_account_data("1", args.pool, [user])
+        elapsed = time.perf_counter() - start
+        await single.aclose()
+        print(f"  one call per user: {1000 * elapsed * args.users / len(sample):8.1f} ms (extrapolated from {len(sample)})")
+    finally:
+        await client.aclose()
+
+    decoded = sum(1 for account in accounts.values() if account is not None)
+    with_debt = [account.health_factor for account in accounts.values() if account and account.total_debt_base]
+    stats = client.get_stats()
+    print(f"\n📊 Decoded {decoded}/{args.users} accounts, {len(with_debt)} with debt"
+          + (f" (lowest HF {min(with_debt):.3f})" if with_debt else ""))
+    print(f"   {stats['contract_calls']} calls in {stats['eth_calls']} eth_calls over {stats['round_trips']} round trips "
+          f"({stats['contract_calls'] / stats['round_trips']:.0f} users per round trip)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rpc-url", help="JSON-RPC node, e.g. http://127.0.0.1:8545 for an anvil mainnet fork")
+    parser.add_argument("--pool", default=MAINNET_POOL, help="Aave V3 Pool address")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05, help="Stand-in node round-trip seconds")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark bulk loading of reserve parameters into the DeFi knowledge graph
+"""
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.position_analysis.defi_knowledge import DeFiKnowledgeGraph
+from app.services.position_analysis.reserve_parameters import load_reserve_parameters
+
+FIELDS = ["chain_id", "symbol", "ltv", "liquidation_threshold", "liquidation_bonus",
+          "emode_category", "supply_cap", "borrow_cap"]
+
+def make_reserves(count: int):
+    """Generate synthetic reserves spread over a handful of chains"""
+    chains = ["1", "137", "42161", "10", "8453", "11155111", "84532"]
+    return [
+        {
+            "chain_id": chains[i % len(chains)],
+            "symbol": f"TKN{i}",
+            "ltv": 7000 + i % 1000,
+            "liquidation_threshold": 7500 + i % 1000,
+            "liquidation_bonus": 10500,
+            "emode_category": i % 3,
+            "supply_cap": 1_000_000,
+            "borrow_cap": 500_000,
+        }
+        for i in range(count)
+    ]
+
+def write_snapshots(directory: str, reserves):
+    json_path = os.path.join(directory, "reserves.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"reserves": reserves}, f)
+
+    csv_path = os.path.join(directory, "reserves.csv")
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(reserves)
+
+    return json_path, csv_path
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [1000, 5000, 10000]
+    kg = DeFiKnowledgeGraph()
+
+    print("🚀 Reserve parameter bulk-load benchmark\n")
+    for count in counts:
+        with tempfile.TemporaryDirectory() as directory:
+            json_path, csv_path = write_snapshots(directory, make_reserves(count))
+
+            for label, path in (("json", json_path), ("csv", csv_path)):
+                start = time.perf_counter()
+                reserves = load_reserve_parameters(path)
+                parsed = time.perf_counter()
+                kg.bulk_insert_reserves(reserves)
+                inserted = time.perf_counter()
+
+                print(f"  {count:>6} reserves ({label}): parse {1000 * (parsed - start):8.1f} ms, "
+                      f"insert {1000 * (inserted - parsed):8.1f} ms")
+
+            start = time.perf_counter()
+            for i in range(count):
+                kg.get_liquidation_threshold(f"TKN{i}", "1")
+            elapsed = time.perf_counter() - start
+            print(f"  {count:>6} lookups: {1e6 * elapsed / count:.2f} µs/lookup\n")
+
+if __name__ == "__main__":
+    main()
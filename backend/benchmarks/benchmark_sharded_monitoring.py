@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark sharded monitoring throughput with 1..N local worker processes
+
+Workers coordinate shard leases through a database (a temporary SQLite file
+unless --database-url is given) and refresh synthetic wallets with a
+simulated refresh of --cpu-ms CPU work plus --io-ms of awaited I/O, so the
+single-process ceiling is the CPU budget of one event loop.
+
+Usage:
+    python benchmarks/benchmark_sharded_monitoring.py --max-workers 4
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+class SimulatedMonitor:
+    """Stands in for MultiChainPositionMonitor: CPU work plus awaited I/O per refresh"""
+
+    def __init__(self, cpu_ms: float, io_ms: float):
+        self.cpu_ms = cpu_ms
+        self.io_ms = io_ms
+
+    async def analyze_multi_chain_positions_llm(self, user_address, chain_ids=None, incremental=False, track=False):
+        await asyncio.sleep(self.io_ms / 1000)
+        deadline = time.perf_counter() + self.cpu_ms / 1000
+        while time.perf_counter() < deadline:
+            pass
+        return {"risk_assessment": {"min_health_factor": 1.3, "risk_level": "high"}, "positions": []}
+
+def worker_main(worker_id, database_url, args, wallets, results):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.services.position_analysis.defi_knowledge import DeFiKnowledgeGraph
+    from app.services.position_analysis.position_monitor import PositionMonitorService
+    from app.tasks.sharded_monitoring import ShardCoordinator, ShardedMonitorWorker
+
+    session_factory = sessionmaker(bind=create_engine(database_url))
+    service = PositionMonitorService(
+        None, interval_minutes=0.01 / 60, max_concurrency=args.concurrency, min_interval=0.0,
+        monitor=SimulatedMonitor(args.cpu_ms, args.io_ms), knowledge_graph=DeFiKnowledgeGraph()
+    )
+    coordinator = ShardCoordinator(worker_id, args.shards, args.lease_ttl, session_factory)
+    worker = ShardedMonitorWorker(worker_id, service, coordinator, lambda: wallets,
+                                  rebalance_interval=args.lease_ttl / 3)
+
+    async def measure():
+        task = asyncio.ensure_future(worker.run())
+        await asyncio.sleep(args.warmup)
+        start_count, start = service.completed, time.perf_counter()
+        await asyncio.sleep(args.duration)
+        completed, elapsed = service.completed - start_count, time.perf_counter() - start
+        owned = len(worker.owned)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return completed / elapsed, owned
+
+    throughput, owned = asyncio.run(measure())
+    results.put((worker_id, throughput, owned))
+
+def run(num_workers, database_url, args, wallets):
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=worker_main, args=(f"bench-{num_workers}-{i}", database_url, args, wallets, results))
+        for i in range(num_workers)
+    ]
+    for process in processes:
+        process.start()
+    # A crashed worker never reports, don't wait forever
+    rows = [results.get(timeout=args.warmup + args.duration + 60) for _ in processes]
+    for process in processes:
+        process.join()
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--wallets", type=int, default=2000)
+    parser.add_argument("--shards", type=int, default=64)
+    parser.add_argument("--cpu-ms", type=float, default=2.0)
+    parser.add_argument("--io-ms", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--lease-ttl", type=float, default=3.0)
+    parser.add_argument("--warmup", type=float, default=4.0)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine
+    from app.models.monitor_shard import MonitorWorker, ShardLease
+
+    tmpdir = tempfile.mkdtemp()
+    database_url = args.database_url or f"sqlite:///{os.path.join(tmpdir, 'leases.db')}"
+    db_engine = create_engine(database_url)
+    tables = [MonitorWorker.__table__, ShardLease.__table__]
+
+    wallets = [f"0x{i:040x}" for i in range(args.wallets)]
+    print(f"🚀 Sharded monitoring benchmark: {args.wallets} wallets, {args.shards} shards, "
+          f"{args.cpu_ms}ms CPU + {args.io_ms}ms I/O per refresh, {os.cpu_count()} CPUs\n")
+
+    baseline = None
+    for num_workers in range(1, args.max_workers + 1):
+        # Fresh lease tables per run
+        for table in reversed(tables):
+            table.drop(db_engine, checkfirst=True)
+        for table in tables:
+            table.create(db_engine)
+
+        rows = run(num_workers, database_url, args, wallets)
+        total = sum(throughput for _, throughput, _ in rows)
+        baseline = baseline or total
+        shards = "/".join(str(owned) for _, _, owned in sorted(rows))
+        print(f"  {num_workers} worker(s): {total:8.1f} refreshes/s  "
+              f"scaling {total / baseline:4.2f}x (ideal {num_workers}x)  shards {shards}")
+
+if __name__ == "__main__":
+    main()
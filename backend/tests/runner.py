@@ -0,0 +1,29 @@
+"""
+Minimal runner so each test script works both with `python tests/test_x.py` and under pytest
+"""
+import asyncio
+import inspect
+import os
+import sys
+import traceback
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+def run_tests(title: str, tests) -> int:
+    """Run test functions (sync or async), print results and return a process exit code"""
+    print(f"🚀 {title}\n")
+    passed = 0
+    for test in tests:
+        try:
+            result = test()
+            if inspect.isawaitable(result):
+                asyncio.run(result)
+            print(f"✅ {test.__name__}")
+            passed += 1
+        except Exception:
+            print(f"❌ {test.__name__}")
+            traceback.print_exc()
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
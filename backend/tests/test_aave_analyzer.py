@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests for Aave position analysis from wallet token balances
+"""
+import asyncio
+import contextlib
+import io
+import sys
+from unittest import mock
+
+from runner import run_tests
+
+from app.services.position_analysis import aave_analyzer
+from app.services.position_analysis.aave_analyzer import AavePositionAnalyzer
+
+PRICES = {"WETH": 3000.0, "USDC": 1.0}
+
+class FakeBlockscout:
+    def __init__(self, tokens):
+        self.tokens = tokens
+
+    async def call_tool(self, tool_name, arguments):
+        assert tool_name == "get_tokens_by_address"
+        return {"data": self.tokens}
+
+def _positions(tokens):
+    analyzer = AavePositionAnalyzer(FakeBlockscout(tokens))
+
+    async def get_price(symbol):
+        return PRICES.get(symbol)
+
+    with mock.patch.object(aave_analyzer.price_fetcher, "get_price", get_price), \
+            contextlib.redirect_stdout(io.StringIO()):
+        positions = asyncio.run(analyzer.get_aave_positions("0x" + "a1" * 20, "1"))
+    return analyzer, {position.asset: position for position in positions}
+
+def test_debt_in_reserve_not_supplied():
+    analyzer, positions = _positions([
+        {"symbol": "aEthWETH", "name": "Aave Ethereum WETH", "balance": str(10 ** 18), "decimals": 18},
+        {"symbol": "variableDebtEthUSDC", "name": "Aave Ethereum Variable Debt USDC",
+         "balance": str(1500 * 10 ** 6), "decimals": 6},
+    ])
+    assert set(positions) == {"WETH", "USDC"}
+    weth, usdc = positions["WETH"], positions["USDC"]
+    assert usdc.supplied_amount == 0 and usdc.borrowed_amount == 1500.0
+    assert weth.borrowed_amount == 0
+
+    # One account-wide health factor: WETH collateral backs the USDC loan
+    expected = 3000.0 * weth.liquidation_threshold / 1500.0
+    assert abs(weth.health_factor - expected) < 1e-9 and usdc.health_factor == weth.health_factor
+    risk = analyzer.calculate_liquidation_risk(list(positions.values()))
+    assert risk["min_health_factor"] == expected and risk["total_borrowed"] == 1500.0
+
+def test_supply_only_has_no_debt():
+    _, positions = _positions([
+        {"symbol": "aEthWETH", "name": "Aave Ethereum WETH", "balance": str(2 * 10 ** 18), "decimals": 18},
+    ])
+    assert list(positions) == ["WETH"]
+    assert positions["WETH"].health_factor == float("inf")
+
+def main():
+    return run_tests("Aave analyzer tests", [
+        test_debt_in_reserve_not_supplied,
+        test_supply_only_has_no_debt,
+    ])
+
+if __name__ == "__main__":
+    sys.exit(main())
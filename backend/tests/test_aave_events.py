@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Tests for replaying Aave Pool events into scaled balances and reconciling supplies with scaledBalanceOf
+"""
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from runner import run_tests
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.models.aave_event import AaveUserReserve
+from app.services.position_analysis.aave_events import (
+    POOL_EVENTS, RAY, PoolState, affected_keys, decode_pool_log, ray_div
+)
+from app.services.position_analysis.multicall_client import (
+    AGGREGATE3, GET_RESERVE_DATA, SCALED_BALANCE_OF, MulticallClient
+)
+from app.services.position_analysis.reserve_state import ReserveState, ReserveStateService
+from app.tasks.aave_event_indexer import AaveEventIndexer
+
+CHAIN = "11155111"
+POOL = "0x6ae43d3271ff6888e7fc43fd7321a503ff738951"
+USDC = "0x94a9d9ac8a22534e3faca9f4e7f2e2cf85d5e4c8"
+A_USDC = "0x16da4541ad1807f4443d92d26044c1147406eb80"
+ALICE = "0x00000000000000000000000000000000000000a1"
+BOB = "0x00000000000000000000000000000000000000b0"
+LIQUIDATOR = "0x00000000000000000000000000000000000000cc"
+TOPICS = {name: topic for topic, (name, _) in POOL_EVENTS.items()}
+
+def _word(value) -> str:
+    if isinstance(value, str):
+        return value.removeprefix("0x").rjust(64, "0")
+    return format(int(value), "064x")
+
+def _log(name: str, **args):
+    """Raw Blockscout log item of a Pool event, encoded from its POOL_EVENTS spec"""
+    params = POOL_EVENTS[TOPICS[name]][1]
+    return {
+        "topics": [TOPICS[name]] + ["0x" + _word(args[p]) for p, _, indexed in params if indexed],
+        "data": "0x" + "".join(_word(args[p]) for p, _, indexed in params if not indexed),
+    }
+
+def _reserve_updated(liquidity_index: int, variable_borrow_index: int):
+    return _log("ReserveDataUpdated", reserve=USDC, liquidityRate=0, stableBorrowRate=0, variableBorrowRate=0,
+                liquidityIndex=liquidity_index, variableBorrowIndex=variable_borrow_index)
+
+def test_replay_reproduces_scaled_balances():
+    logs = [
+        _reserve_updated(RAY, RAY),
+        _log("Supply", reserve=USDC, user=ALICE, onBehalfOf=ALICE, amount=1000 * 10 ** 6, referralCode=0),
+        _reserve_updated(RAY * 105 // 100, RAY * 110 // 100),
+        _log("Supply", reserve=USDC, user=BOB, onBehalfOf=BOB, amount=2100 * 10 ** 6, referralCode=0),
+        _log("Borrow", reserve=USDC, user=ALICE, onBehalfOf=ALICE, amount=550 * 10 ** 6,
+             interestRateMode=2, borrowRate=0, referralCode=0),
+        _reserve_updated(RAY * 120 // 100, RAY * 110 // 100),
+        _log("Withdraw", reserve=USDC, user=ALICE, to=ALICE, amount=600 * 10 ** 6),
+        _log("Repay", reserve=USDC, user=ALICE, repayer=ALICE, amount=275 * 10 ** 6, useATokens=False),
+        _log("LiquidationCall", collateralAsset=USDC, debtAsset=USDC, user=ALICE, debtToCover=110 * 10 ** 6,
+             liquidatedCollateralAmount=120 * 10 ** 6, liquidator=LIQUIDATOR, receiveAToken=True),
+    ]
+    state = PoolState()
+    keys = set()
+    for block, item in enumerate(logs, start=1):
+        name, args = decode_pool_log(item)
+        keys.update(affected_keys(name, args))
+        state.apply(name, args, block)
+
+    alice, bob, liquidator = (state.users[(user, USDC)] for user in (ALICE, BOB, LIQUIDATOR))
+    assert alice.scaled_supply == 1000 * 10 ** 6 - 500 * 10 ** 6 - 100 * 10 ** 6
+    assert alice.scaled_variable_debt == 500 * 10 ** 6 - 250 * 10 ** 6 - 100 * 10 ** 6
+    assert bob.scaled_supply == ray_div(2100 * 10 ** 6, RAY * 105 // 100) == 2000 * 10 ** 6
+    assert liquidator.scaled_supply == 100 * 10 ** 6
+    assert alice.last_block == len(logs) and bob.last_block == 4
+    assert keys == state.touched == {(ALICE, USDC), (BOB, USDC), (LIQUIDATOR, USDC)}
+    assert state.reserves[USDC].liquidity_index == RAY * 120 // 100
+
+class StandInNode:
+    """JSON-RPC node answering aggregate3 with getReserveData and scaledBalanceOf from fixed state"""
+
+    def __init__(self, scaled_balances):
+        self.scaled_balances = scaled_balances  # (aToken, holder) -> scaled balance
+        self.blocks = []
+        self.reserve_reads = 0
+
+    def _answer(self, data: bytes) -> bytes:
+        selector, argument = data[:4].hex(), "0x" + data[-20:].hex()
+        if selector == GET_RESERVE_DATA and argument == USDC:
+            self.reserve_reads += 1
+            words = [0, RAY, 0, RAY, 0, 0, 1_700_000_000, 1, A_USDC, 0, 0, 0, 0, 0, 0]
+            return bytes.fromhex("".join(_word(w) for w in words))
+        if selector == SCALED_BALANCE_OF:
+            return bytes.fromhex(_word(self.scaled_balances.get((A_USDC, argument), 0)))
+        return b""
+
+    def _aggregate3(self, calldata: str) -> str:
+        raw = bytes.fromhex(calldata.removeprefix("0x"))[4:]
+        word = lambda offset: int.from_bytes(raw[offset:offset + 32], "big")
+        base = word(0) + 32
+        encoded = []
+        for i in range(word(base - 32)):
+            start = base + word(base + 32 * i)
+            data_start = start + word(start + 64)
+            answer = self._answer(raw[data_start + 32:data_start + 32 + word(data_start)])
+            encoded.append(_word(int(bool(answer))) + _word(0x40) + _word(len(answer)) + answer.hex())
+        offsets, position = [], 32 * len(encoded)
+        for element in encoded:
+            offsets.append(_word(position))
+            position += len(element) // 2
+        return "0x" + _word(0x20) + _word(len(encoded)) + "".join(offsets) + "".join(encoded)
+
+    def transport(self) -> httpx.MockTransport:
+        def handle(request: httpx.Request) -> httpx.Response:
+            body = json.loads(request.content)
+            replies = []
+            for call in body if isinstance(body, list) else [body]:
+                data = call["params"][0]["data"]
+                assert data[2:10] == AGGREGATE3
+                self.blocks.append(call["params"][1])
+                replies.append({"jsonrpc": "2.0", "id": call["id"], "result": self._aggregate3(data)})
+            return httpx.Response(200, json=replies if isinstance(body, list) else replies[0])
+        return httpx.MockTransport(handle)
+
+def _indexer(node):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=[AaveUserReserve.__table__])
+    session_factory = sessionmaker(bind=engine)
+    db = session_factory()
+    for user, scaled_supply in ((ALICE, 500), (BOB, 2000), (LIQUIDATOR, 100)):
+        db.add(AaveUserReserve(chain_id=CHAIN, user_address=user, reserve=USDC, scaled_supply=scaled_supply,
+                               scaled_variable_debt=0, stable_debt=0, last_block=1))
+    db.commit()
+    db.close()
+    multicall = MulticallClient({CHAIN: "http://stand-in"}, batch_size=2, transport=node.transport())
+    return AaveEventIndexer(None, {CHAIN: POOL}, session_factory=session_factory, multicall_client=multicall)
+
+def test_reconcile_applies_atoken_transfers():
+    # Alice sent Bob 200 scaled aUSDC: a transfer the Pool never saw
+    node = StandInNode({(A_USDC, ALICE): 300, (A_USDC, BOB): 2200, (A_USDC, LIQUIDATOR): 100})
+    indexer = _indexer(node)
+
+    corrections = asyncio.run(indexer.reconcile_supplies(CHAIN, 1000))
+    assert corrections == {(ALICE, USDC): 300, (BOB, USDC): 2200}
+    assert set(node.blocks[1:]) == {hex(1000)}  # Balances read at the applied block
+    supplies = {user: supply for user, _, supply in indexer._supply_rows(CHAIN)}
+    assert supplies == {ALICE: 300, BOB: 2200, LIQUIDATOR: 100}
+
+    # Reconciled state is stable and the aToken address is cached
+    assert asyncio.run(indexer.reconcile_supplies(CHAIN, 1001)) == {}
+    assert node.reserve_reads == 1
+
+class FakeBlockscout:
+    def __init__(self):
+        self.block_requests = []
+
+    async def get_block_info(self, block_number, chain_id):
+        self.block_requests.append(block_number)
+        return {"data": {"height": block_number, "timestamp": "2024-01-01T00:00:00Z"}}
+
+def test_missing_update_times_are_looked_up_not_invented():
+    blockscout = FakeBlockscout()
+    indexer = AaveEventIndexer(blockscout, {CHAIN: POOL})
+    events = [
+        {"event": "ReserveDataUpdated", "block_number": 7, "block_timestamp": None},
+        {"event": "ReserveDataUpdated", "block_number": 7, "block_timestamp": None},
+        {"event": "Supply", "block_number": 7, "block_timestamp": None},
+    ]
+    asyncio.run(indexer._fill_timestamps(CHAIN, events))
+    assert blockscout.block_requests == [7]
+    assert [e["block_timestamp"] is not None for e in events] == [True, True, False]
+
+    # A reserve whose update time is still unknown is left out rather than anchored at load time
+    dated = ReserveState(USDC, RAY, RAY, 0, 0, last_update=events[0]["block_timestamp"].timestamp())
+    undated = ReserveState(A_USDC, RAY, RAY, 0, 0, last_update=None)
+    service = ReserveStateService(reserve_loader=lambda chain_id: [dated, undated])
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert list(asyncio.run(service.get_reserves(CHAIN))) == [USDC]
+
+def main():
+    return run_tests("Aave event tests", [
+        test_replay_reproduces_scaled_balances,
+        test_reconcile_applies_atoken_transfers,
+        test_missing_update_times_are_looked_up_not_invented,
+    ])
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Tests for the alert engine's breach/recovery state machine: hysteresis, dedup and held-back breaches
+"""
+import sys
+from unittest import mock
+
+from runner import run_tests
+
+from app.services.position_analysis.alert_engine import AlertEngine
+
+POSITION = "0x00000000000000000000000000000000000000a1:1"
+WINDOW = 15 * 60
+
+class Clock:
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+def _run(engine, clock, steps):
+    """Evaluate (seconds later, health factor) steps; returns the kind of alert each raised, or None"""
+    kinds = []
+    with mock.patch("app.services.position_analysis.alert_engine.time.time", clock):
+        for elapsed, health_factor in steps:
+            clock.now += elapsed
+            alert = engine.evaluate(POSITION, health_factor)
+            kinds.append(alert.kind if alert else None)
+    return kinds
+
+def test_breach_recovery_and_hysteresis():
+    engine = AlertEngine(default_threshold=1.2, hysteresis=0.05, dedup_window=WINDOW)
+    kinds = _run(engine, Clock(), [
+        (0, 1.5),    # Healthy
+        (10, 1.15),  # Breach
+        (10, 1.1),   # Still breached
+        (10, 1.24),  # Above threshold but inside the hysteresis band
+        (10, 1.27),  # Recovered
+        (10, 1.3),
+    ])
+    assert kinds == [None, "breach", None, None, "recovery", None]
+    assert engine.get_stats()["breached_positions"] == 0
+
+def test_rebreach_after_recovery_is_sent_once_window_passes():
+    engine = AlertEngine(default_threshold=1.2, hysteresis=0.05, dedup_window=WINDOW)
+    kinds = _run(engine, Clock(), [
+        (0, 1.1),           # Breach
+        (60, 1.3),          # Recovery sent
+        (60, 1.1),          # Re-breach within the window: held back
+        (60, 1.05),         # Still held
+        (WINDOW, 1.05),     # Window passed, still breached: sent now
+        (60, 1.0),          # Already sent
+        (60, 1.3),          # And its recovery is sent too
+    ])
+    assert kinds == ["breach", "recovery", None, None, "breach", None, "recovery"]
+    stats = engine.get_stats()
+    assert stats["suppressed"] == 1 and stats["deferred"] == 1 and stats["alerts"] == 4
+
+def test_held_breach_that_recovers_stays_quiet():
+    engine = AlertEngine(default_threshold=1.2, hysteresis=0.05, dedup_window=WINDOW)
+    kinds = _run(engine, Clock(), [
+        (0, 1.1),        # Breach
+        (60, 1.3),       # Recovery sent
+        (60, 1.1),       # Held back
+        (60, 1.3),       # Recovers before the window passes: nothing to retract
+        (WINDOW, 1.3),
+        (60, 1.22),      # Inside the hysteresis band, not a breach
+        (60, 1.1),       # New breach after the window: sent at once
+    ])
+    assert kinds == ["breach", "recovery", None, None, None, None, "breach"]
+    assert engine.get_stats()["deferred"] == 0
+
+def test_held_breach_in_hysteresis_band_waits_for_threshold():
+    engine = AlertEngine(default_threshold=1.2, hysteresis=0.05, dedup_window=WINDOW)
+    kinds = _run(engine, Clock(), [
+        (0, 1.1),
+        (60, 1.3),
+        (60, 1.1),          # Held back
+        (WINDOW, 1.22),     # Window passed but HF is above threshold: no breach to report
+        (60, 1.19),         # Below again: the held breach is sent
+    ])
+    assert kinds == ["breach", "recovery", None, None, "breach"]
+
+def test_thresholds_are_per_user():
+    engine = AlertEngine(default_threshold=1.2, dedup_window=WINDOW)
+    engine.set_threshold(POSITION.split(":")[0], 1.5)
+    assert _run(engine, Clock(), [(0, 1.4)]) == ["breach"]
+    engine.forget_user(POSITION.split(":")[0])
+    assert _run(engine, Clock(), [(0, 1.4), (0, 1.1)]) == [None, "breach"]
+
+def test_onchain_health_factor_overrides_estimates():
+    engine = AlertEngine(default_threshold=1.2, hysteresis=0.05, dedup_window=WINDOW, onchain_ttl=90)
+    clock = Clock()
+    kinds = []
+    with mock.patch("app.services.position_analysis.alert_engine.time.time", clock):
+        for elapsed, health_factor, onchain in [
+            (0, 1.1, True),     # The Pool says breached
+            (5, 1.3, False),    # A price-tick estimate disagrees: ignored
+            (5, 1.1, False),
+            (20, 1.15, True),   # Next sweep, still breached
+            (10, 1.3, False),   # Ignored again, no recovery flap
+            (20, 1.3, True),    # The Pool agrees it recovered
+            (100, 1.1, False),  # Sweeps stopped covering it: estimates count again
+        ]:
+            clock.now += elapsed
+            alert = engine.evaluate(POSITION, health_factor, onchain=onchain)
+            kinds.append(alert.kind if alert else None)
+    assert kinds == ["breach", None, None, None, None, "recovery", None]
+    stats = engine.get_stats()
+    assert stats["estimates_ignored"] == 3 and stats["suppressed"] == 1 and stats["breached_positions"] == 1
+
+def main():
+    return run_tests("Alert engine tests", [
+        test_breach_recovery_and_hysteresis,
+        test_rebreach_after_recovery_is_sent_once_window_passes,
+        test_held_breach_that_recovers_stays_quiet,
+        test_held_breach_in_hysteresis_band_waits_for_threshold,
+        test_thresholds_are_per_user,
+        test_onchain_health_factor_overrides_estimates,
+    ])
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Tests for the vectorized batch health factor engine against the scalar calculator
+"""
+import contextlib
+import io
+import random
+import sys
+
+from runner import run_tests
+
+from app.services.position_analysis.batch_health_factor import PositionBatch, calculate_batch
+from app.services.position_analysis.health_factor_calculator import HealthFactorCalculator
+
+TOKENS = ["WETH", "USDC", "DAI", "WBTC", "LINK", "AAVE"]
+PRICES = {"WETH": 3000.0, "USDC": 1.0, "DAI": 1.0, "WBTC": 45000.0, "LINK": 15.0, "AAVE": 100.0}
+
+def _positions(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    return [
+        {
+            "chain_id": rng.choice(["1", "11155111"]),
+            "supplied_assets": [{"token": t, "amount": rng.uniform(0.1, 50)} for t in rng.sample(TOKENS, rng.randint(1, 3))],
+            "borrowed_assets": [{"token": t, "amount": rng.uniform(1, 3000)} for t in rng.sample(TOKENS, rng.randint(0, 2))],
+        }
+        for _ in range(count)
+    ]
+
+def _scalar(calculator, positions, prices):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return [
+            calculator.calculate_health_factor(p["supplied_assets"], p["borrowed_assets"], prices, p["chain_id"])
+            for p in positions
+        ]
+
+def test_matches_scalar_path():
+    calculator = HealthFactorCalculator()
+    positions = _positions(300)
+    batch = PositionBatch.from_positions(positions, PRICES, calculator.knowledge_graph)
+    result = calculate_batch(batch)
+    assert list(result.health_factors) == _scalar(calculator, positions, PRICES)
+
+def test_reprice_matches_scalar_path():
+    calculator = HealthFactorCalculator()
+    positions = _positions(100, seed=2)
+    batch = PositionBatch.from_positions(positions, PRICES, calculator.knowledge_graph)
+    batch.update_prices({"WETH": 2500.0})
+    result = calculate_batch(batch)
+    assert list(result.health_factors) == _scalar(calculator, positions, {**PRICES, "WETH": 2500.0})
+
+def test_no_debt_is_infinite():
+    calculator = HealthFactorCalculator()
+    positions = [{"chain_id": "1", "supplied_assets": [{"token": "WETH", "amount": 1}], "borrowed_assets": []}]
+    result = calculate_batch(PositionBatch.from_positions(positions, PRICES, calculator.knowledge_graph))
+    assert result.health_factors[0] == float("inf")
+    assert result.debt_usd[0] == 0.0
+
+def main():
+    return run_tests("Batch health factor tests", [
+        test_matches_scalar_path,
+        test_reprice_matches_scalar_path,
+        test_no_debt_is_infinite,
+    ])
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Tests for liquidation price index crossings against brute-force health factor comparisons
+"""
+import contextlib
+import io
+import random
+import sys
+from types import SimpleNamespace
+
+from runner import run_tests
+
+from app.services.position_analysis.alert_engine import AlertEngine, MemorySink
+from app.services.position_analysis.health_factor_calculator import HealthFactorCalculator
+from app.services.position_analysis.incremental_health_factor import IncrementalHealthFactorEngine
+from app.services.position_analysis.liquidation_price_index import LiquidationPriceIndex
+from app.services.position_analysis.position_monitor import PositionMonitorService
+
+TOKENS = ["WETH", "USDC", "WBTC", "LINK"]
+PRICES = {"WETH": 3000.0, "USDC": 1.0, "WBTC": 45000.0, "LINK": 15.0}
+DEFAULT_THRESHOLD = 1.2
+MARGIN = 0.05
+
+def _engine(count: int, seed: int, index=None):
+    rng = random.Random(seed)
+    index = index or LiquidationPriceIndex((1.0,), default_threshold=DEFAULT_THRESHOLD)
+    engine = IncrementalHealthFactorEngine(HealthFactorCalculator().knowledge_graph, liquidation_index=index)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(count):
+            supplied = [{"token": t, "amount": rng.uniform(0.5, 2) * 3000 / PRICES[t]}
+                        for t in rng.sample(TOKENS, rng.randint(1, 2))]
+            collateral = sum(a["amount"] * PRICES[a["token"]] for a in supplied)
+            borrowed = [{"token": t, "amount": collateral * rng.uniform(0.5, 0.75) / PRICES[t]}
+                        for t in rng.sample(TOKENS, 1)]
+            engine.upsert_position(f"0x{i:040x}:1", {
+                "chain_id": "1", "supplied_assets": supplied, "borrowed_assets": borrowed
+            }, PRICES)
+    return engine, index
+
+def _thresholds(index, position_id):
+    alert = index.user_thresholds.get(position_id.split(":")[0], index.default_threshold)
+    return (1.0, alert, alert * (1 + index.recovery_margin))
+
+def _below(engine):
+    index = engine.liquidation_index
+    return {
+        (position_id, threshold)
+        for position_id, tracked in engine.positions.items()
+        for threshold in _thresholds(index, position_id)
+        if tracked.health_factor < threshold
+    }
+
+def test_crossings_match_health_factor_changes():
+    index = LiquidationPriceIndex((1.0,), default_threshold=DEFAULT_THRESHOLD, recovery_margin=MARGIN)
+    engine, index = _engine(500, seed=3, index=index)
+    rng = random.Random(4)
+    # Some owners have their own alert threshold
+    for position_id in list(engine.positions)[::3]:
+        index.set_threshold(position_id.split(":")[0], rng.choice([1.1, 1.5]))
+    crossed = []
+    index.subscribe(crossed.append)
+    for _ in range(200):
+        token = rng.choice(TOKENS)
+        price = engine.prices[token] * (1 + rng.gauss(0, 0.05))
+        before = _below(engine)
+        crossed.clear()
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine.on_price_update(token, price)
+        after = _below(engine)
+
+        breached = {(c.position_id, c.threshold) for c in crossed if c.breached}
+        recovered = {(c.position_id, c.threshold) for c in crossed if not c.breached}
+        assert breached == after - before, (token, breached ^ (after - before))
+        assert recovered == before - after, (token, recovered ^ (before - after))
+        assert all(c.token == token and c.price == price for c in crossed)
+        assert all(abs(c.health_factor - engine.positions[c.position_id].health_factor) < 1e-9 for c in crossed)
+
+def test_unchanged_token_is_not_rebuilt():
+    engine, index = _engine(50, seed=5)
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.on_price_update("WETH", 2900.0)
+        rebuilds = index.rebuilds
+        engine.on_price_update("WETH", 2800.0)
+        assert index.rebuilds == rebuilds
+        engine.on_price_update("USDC", 1.01)
+        engine.on_price_update("WETH", 2700.0)
+    assert index.rebuilds == rebuilds + 2
+
+def test_only_co_held_tokens_go_stale():
+    index = LiquidationPriceIndex((1.0,), default_threshold=DEFAULT_THRESHOLD)
+    engine = IncrementalHealthFactorEngine(HealthFactorCalculator().knowledge_graph, liquidation_index=index)
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.upsert_position(f"0x{1:040x}:1", {
+            "chain_id": "1", "supplied_assets": [{"token": "WETH", "amount": 1.0}],
+            "borrowed_assets": [{"token": "USDC", "amount": 2000.0}]
+        }, PRICES)
+        engine.upsert_position(f"0x{2:040x}:1", {
+            "chain_id": "1", "supplied_assets": [{"token": "WBTC", "amount": 0.1}],
+            "borrowed_assets": [{"token": "LINK", "amount": 200.0}]
+        }, PRICES)
+        for token in TOKENS:
+            engine.on_price_update(token, PRICES[token] * 1.01)
+        # Each tick leaves the other token of its own position stale
+        assert index._stale == {"WETH", "WBTC"}
+        index._stale.clear()
+        engine.on_price_update("WETH", 2900.0)
+    # Only the token held alongside WETH depends on its price
+    assert index._stale == {"USDC"}
+
+    # Once the position holding both is gone, WETH moves leave USDC alone
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.on_price_update("USDC", 1.0)
+        engine.remove_position(f"0x{1:040x}:1")
+        engine.on_price_update("LINK", 14.0)
+        index._stale.clear()
+        engine.on_price_update("WETH", 2800.0)
+    assert index._stale == set()
+
+def test_crossings_raise_alerts_at_each_owners_threshold():
+    engine, index = _engine(200, seed=8)
+    sink = MemorySink()
+    service = PositionMonitorService(None, monitor=SimpleNamespace(hf_engine=engine), knowledge_graph=object(),
+                                     alert_engine=AlertEngine([sink], default_threshold=1.2, hysteresis=MARGIN))
+    strict = sorted({position_id.split(":")[0] for position_id in engine.positions})[::2]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for user in strict:
+            service.add_monitored_address(user, alert_threshold=1.5)
+    assert index.default_threshold == 1.2 and index.recovery_margin == MARGIN
+    for position_id, tracked in engine.positions.items():  # As the wallet refreshes would
+        service.alert_engine.evaluate(position_id, tracked.health_factor)
+
+    rng = random.Random(9)
+    for _ in range(100):
+        token = rng.choice(TOKENS)
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine.on_price_update(token, engine.prices[token] * (1 + rng.gauss(0, 0.05)))
+
+    # The alert engine's state matches the positions' HFs, as if it had seen every update
+    alert_engine = service.alert_engine
+    for position_id, tracked in engine.positions.items():
+        threshold = 1.5 if position_id.split(":")[0] in strict else 1.2
+        state = alert_engine._states.get(position_id)
+        breached = state is not None and state.breached
+        if tracked.health_factor < threshold:
+            assert breached, position_id
+        elif tracked.health_factor >= threshold * (1 + MARGIN):
+            assert not breached, position_id
+    assert alert_engine.alerts > 0
+    assert alert_engine.evaluated < 100 * len(engine.positions) // 4
+
+def test_removed_position_is_not_reported():
+    engine, index = _engine(20, seed=6)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for position_id in list(engine.positions):
+            engine.remove_position(position_id)
+        assert index.find_crossings("WETH", 3000.0, 1.0) == []
+        assert index.find_crossings("USDC", 1.0, 1000.0) == []
+
+def test_trigger_prices_solve_for_threshold():
+    engine, index = _engine(1, seed=7)
+    position_id, tracked = next(iter(engine.positions.items()))
+    for (token, threshold), trigger in index.trigger_prices(position_id, engine.prices).items():
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine.on_price_update(token, trigger)
+        assert abs(tracked.health_factor - threshold) < 1e-9
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine.on_price_update(token, PRICES[token])
+
+def main():
+    return run_tests("Liquidation price index tests", [
+        test_crossings_match_health_factor_changes,
+        test_unchanged_token_is_not_rebuilt,
+        test_only_co_held_tokens_go_stale,
+        test_crossings_raise_alerts_at_each_owners_threshold,
+        test_removed_position_is_not_reported,
+        test_trigger_prices_solve_for_threshold,
+    ])
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Tests for the position monitor's on-chain account sweep and wallet tracking
+"""
+import asyncio
+import contextlib
+import io
+import sys
+
+from runner import run_tests
+
+from app.services.position_analysis.alert_engine import AlertEngine, MemorySink
+from app.services.position_analysis.multi_chain_monitor import MultiChainPositionMonitor
+from app.services.position_analysis.multicall_client import UINT256_MAX, WAD, AccountData
+from app.services.position_analysis.position_monitor import PositionMonitorService
+
+SAFE = "0x00000000000000000000000000000000000000a1"
+RISKY = "0x00000000000000000000000000000000000000b2"
+IDLE = "0x00000000000000000000000000000000000000c3"
+
+class FakeReader:
+    """Stands in for MulticallClient: fixed account data per (chain, user)"""
+
+    def __init__(self, accounts):
+        self.rpc_urls = {"1": "http://stand-in", "137": "http://stand-in"}
+        self.accounts = accounts
+        self.requests = []
+
+    async def get_user_account_data(self, chain_id, pool_address, users):
+        self.requests.append((chain_id, pool_address, list(users)))
+        return {user.lower(): self.accounts.get((chain_id, user.lower())) for user in users}
+
+    async def aclose(self):
+        pass
+
+    def get_stats(self):
+        return {"round_trips": len(self.requests)}
+
+def _account(health_factor: float) -> AccountData:
+    return AccountData(10 ** 11, 5 * 10 ** 10, 0, 8250, 8000, int(health_factor * WAD))
+
+def test_sweep_reads_every_wallet_once_per_chain():
+    reader = FakeReader({
+        ("1", SAFE): _account(2.5),
+        ("1", RISKY): _account(1.4),
+        ("137", RISKY): _account(1.1),
+        ("1", IDLE): AccountData(10 ** 11, 0, 0, 8250, 8000, UINT256_MAX),
+    })
+    sink = MemorySink()
+    service = PositionMonitorService(
+        None, monitor=object(), knowledge_graph=object(), alert_engine=AlertEngine([sink]),
+        account_reader=reader, pool_addresses={"1": "0xpool1", "137": "0xpool137", "10": "0xpool10"}
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        for address in (SAFE, RISKY, IDLE):
+            service.add_monitored_address(address, alert_threshold=1.2)
+
+    sweep = asyncio.run(service.sweep_account_data())
+    # No RPC URL for chain 10; one read per chain covering every wallet; wallets without debt left out
+    assert sorted(chain for chain, _, _ in reader.requests) == ["1", "137"]
+    assert all(sorted(users) == sorted([SAFE, RISKY, IDLE]) for _, _, users in reader.requests)
+    assert sweep == {"1": {SAFE: 2.5, RISKY: 1.4}, "137": {RISKY: 1.1}}
+    assert service.wallets[RISKY].onchain_health_factor == 1.1
+    assert service.wallets[IDLE].onchain_health_factor is None
+
+    # The on-chain breach is alerted and brings the wallet's refresh forward
+    assert service.alert_engine.alerts == 1 and service.sweep_triggers == 1
+    assert service.get_status()["onchain_sweep"]["sweeps"] == 1
+
+    # Once the refresh has seen it, later sweeps leave the schedule alone
+    service.wallets[RISKY].last_health_factor = 1.1
+    asyncio.run(service.sweep_account_data())
+    assert service.sweep_triggers == 1
+
+SEPOLIA, BASE_SEPOLIA = "11155111", "84532"
+
+class FakeBlockscout:
+    """One WETH balance per chain; chains in failing raise"""
+
+    def __init__(self):
+        self.failing = set()
+
+    async def get_tokens_by_address(self, address, chain_id):
+        await asyncio.sleep(0)
+        if chain_id in self.failing:
+            raise RuntimeError("Blockscout unavailable")
+        return {"data": [{"symbol": "aWETH", "balance": "1000000000000000000", "decimals": 18,
+                          "address": f"0x{int(chain_id):040x}"}]}
+
+def _monitor():
+    monitor = MultiChainPositionMonitor(FakeBlockscout())
+
+    async def parse_aave_positions(chain_tokens):
+        return [{"chain_id": chain["chain_id"], "chain_name": chain["chain_name"],
+                 "supplied_assets": [{"token": "WETH", "amount": 1.0}],
+                 "borrowed_assets": [{"token": "USDC", "amount": 1500.0}]} for chain in chain_tokens]
+
+    async def get_prices_for_assets(positions, chain_tokens):
+        return {"WETH": 3000.0, "USDC": 1.0}
+
+    monitor.position_parser.parse_aave_positions = parse_aave_positions
+    monitor.hf_calculator.get_prices_for_assets = get_prices_for_assets
+    return monitor
+
+def test_failed_chain_keeps_its_tracked_position():
+    monitor = _monitor()
+    chains = [SEPOLIA, BASE_SEPOLIA]
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(monitor.analyze_multi_chain_positions_llm(RISKY, chains, incremental=True, track=True))
+        assert set(monitor.hf_engine.positions) == {f"{RISKY}:{SEPOLIA}", f"{RISKY}:{BASE_SEPOLIA}"}
+
+        # Base Sepolia's balances could not be fetched: its position is unknown, not gone
+        monitor.blockscout_client.failing.add(BASE_SEPOLIA)
+        asyncio.run(monitor.analyze_multi_chain_positions_llm(RISKY, chains, incremental=True, track=True))
+    assert set(monitor.hf_engine.positions) == {f"{RISKY}:{SEPOLIA}", f"{RISKY}:{BASE_SEPOLIA}"}
+
+def test_refresh_finishing_after_removal_does_not_track():
+    monitor = _monitor()
+    service = PositionMonitorService(None, monitor=monitor, alert_engine=AlertEngine([MemorySink()]))
+    seen = []
+    service.subscribe(lambda address, analysis: seen.append(address))
+    with contextlib.redirect_stdout(io.StringIO()):
+        wallet = service.add_monitored_address(RISKY, [SEPOLIA], alert_threshold=1.5)
+
+        async def refresh_removed_midway():
+            refresh = asyncio.ensure_future(service._refresh_wallet(wallet, due=0.0))
+            await asyncio.sleep(0)  # The refresh is waiting on Blockscout
+            service.remove_monitored_address(RISKY)
+            await refresh
+
+        asyncio.run(refresh_removed_midway())
+    assert monitor.hf_engine.positions == {} and monitor._tracked_wallets == {}
+    assert monitor._snapshots == {} and seen == []
+    assert service.alert_engine.evaluated == 0
+
+def main():
+    return run_tests("Position monitor tests", [
+        test_sweep_reads_every_wallet_once_per_chain,
+        test_failed_chain_keeps_its_tracked_position,
+        test_refresh_finishing_after_removal_does_not_track,
+    ])
+
+if __name__ == "__main__":
+    sys.exit(main())
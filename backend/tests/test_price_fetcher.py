@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests for pricing tokens by contract address through the persistent CoinGecko id cache
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+from runner import run_tests
+
+import httpx
+
+from app.services.position_analysis.coingecko_id_cache import CoinGeckoIdCache
+from app.services.position_analysis.price_fetcher import PriceFetcher
+
+SEPOLIA = "11155111"
+SEPOLIA_USDC = "0x94a9d9ac8a22534e3faca9f4e7f2e2cf85d5e4c8"
+GADGET = "0x00000000000000000000000000000000000000d4"
+
+class StandInCoinGecko:
+    """Answers /search and /simple/price for one listed coin, recording request paths"""
+
+    def __init__(self):
+        self.paths = []
+
+    def transport(self) -> httpx.MockTransport:
+        def handle(request: httpx.Request) -> httpx.Response:
+            self.paths.append(request.url.path)
+            if request.url.path.endswith("/search"):
+                return httpx.Response(200, json={"coins": [{"id": "gadget-token"}]})
+            if request.url.path.endswith("/simple/price"):
+                ids = request.url.params["ids"].split(",")
+                return httpx.Response(200, json={i: {"usd": 2.5} for i in ids if i == "gadget-token"})
+            return httpx.Response(404)
+        return httpx.MockTransport(handle)
+
+def _fetcher(path: str, api: StandInCoinGecko) -> PriceFetcher:
+    fetcher = PriceFetcher()
+    fetcher.id_cache = CoinGeckoIdCache(path=path, registry_path=None)
+    client = httpx.AsyncClient(transport=api.transport())
+    fetcher._get_client = lambda: client
+    return fetcher
+
+async def _quote(fetcher: PriceFetcher):
+    try:
+        return await fetcher.get_quotes_by_address(SEPOLIA, [("GADGET", GADGET)])
+    finally:
+        await fetcher.aclose()
+
+def test_address_resolution_survives_restart():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "coingecko_ids.json")
+        api = StandInCoinGecko()
+        with contextlib.redirect_stdout(io.StringIO()):
+            quotes = asyncio.run(_quote(_fetcher(path, api)))
+        assert quotes[GADGET].price == 2.5
+        assert any(p.endswith("/search") for p in api.paths)
+
+        # A new process prices the contract by its stored id without searching
+        api = StandInCoinGecko()
+        restarted = _fetcher(path, api)
+        assert restarted.id_cache.lookup(chain_id=SEPOLIA, address=GADGET) == (True, "gadget-token")
+        with contextlib.redirect_stdout(io.StringIO()):
+            quotes = asyncio.run(_quote(restarted))
+        assert quotes[GADGET].price == 2.5 and quotes[GADGET].source == "coingecko"
+        assert not any(p.endswith("/search") for p in api.paths)
+
+def test_bundled_registry_has_addresses():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = CoinGeckoIdCache(path=os.path.join(directory, "coingecko_ids.json"))
+    # Testnet tokens map to their mainnet coin; lookups ignore address case
+    assert cache.lookup(chain_id=SEPOLIA, address=SEPOLIA_USDC) == (True, "usd-coin")
+    assert cache.lookup(chain_id="1", address="0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2") == (True, "ethereum")
+
+def main():
+    return run_tests("Price fetcher tests", [
+        test_address_resolution_survives_restart,
+        test_bundled_registry_has_addresses,
+    ])
+
+if __name__ == "__main__":
+    sys.exit(main())
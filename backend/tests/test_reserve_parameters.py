@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for reserve parameter parsing and per-chain knowledge graph lookups
+"""
+import sys
+
+from runner import run_tests
+
+from app.services.position_analysis.defi_knowledge import DeFiKnowledgeGraph
+from app.services.position_analysis.reserve_parameters import ReserveParameters, parse_reserve_record
+
+def test_ratio_units():
+    record = {"chain_id": "1", "symbol": "weth", "ltv": "0.8", "liquidation_threshold": 8250}
+    reserve = parse_reserve_record(record)
+    assert reserve.ltv == 0.8
+    assert reserve.liquidation_threshold == 0.825
+    assert reserve.symbol == "WETH"
+
+def test_ambiguous_ratio_rejected():
+    for value in ("80", 1.5, 100):
+        try:
+            parse_reserve_record({"chain_id": "1", "symbol": "WETH", "ltv": value, "liquidation_threshold": 0.8})
+        except ValueError:
+            continue
+        raise AssertionError(f"{value!r} was accepted")
+
+def test_bonus_units():
+    record = {"chain_id": "1", "symbol": "WETH", "ltv": 0.8, "liquidation_threshold": 0.825}
+    for value, bonus in ((10500, 1.05), ("1.05", 1.05), (0, 0.0)):
+        assert parse_reserve_record({**record, "liquidation_bonus": value}).liquidation_bonus == bonus
+    assert parse_reserve_record(record).liquidation_bonus == 0.0
+    for value in (5, "105", 0.05, 500):
+        try:
+            parse_reserve_record({**record, "liquidation_bonus": value})
+        except ValueError:
+            continue
+        raise AssertionError(f"{value!r} was accepted")
+
+def _graph(reserves):
+    graph = DeFiKnowledgeGraph(reserve_params_path="")
+    graph.bulk_insert_reserves(reserves)
+    return graph
+
+def test_symbols_starting_with_a():
+    graph = _graph([
+        ReserveParameters("1", "AAVE", 0.66, 0.73),
+        ReserveParameters("42161", "ARB", 0.58, 0.63),
+    ])
+    assert graph.get_liquidation_threshold("AAVE", "1") == 0.73
+    assert graph.get_liquidation_threshold("aEthAAVE", "1") == 0.73
+    assert graph.get_liquidation_threshold("ARB", "42161") == 0.63
+    assert graph.get_liquidation_threshold("variableDebtArbARB", "42161") == 0.63
+
+def test_no_cross_chain_fallback():
+    graph = _graph([
+        ReserveParameters("11155111", "WETH", 0.5, 0.55),
+        ReserveParameters("*", "USDC", 0.77, 0.79),
+    ])
+    assert graph.get_reserve("WETH", "1") is None
+    assert graph.get_reserve("WETH", "11155111").liquidation_threshold == 0.55
+    assert graph.get_reserve("aEthUSDC", "1").liquidation_threshold == 0.79
+
+def main():
+    return run_tests("Reserve parameter tests", [
+        test_ratio_units,
+        test_ambiguous_ratio_rejected,
+        test_bonus_units,
+        test_symbols_starting_with_a,
+        test_no_cross_chain_fallback,
+    ])
+
+if __name__ == "__main__":
+    sys.exit(main())
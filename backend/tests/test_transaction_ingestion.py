@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for transaction-cursor ingestion: cursor advance, truncation at max_pages and resuming the window
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from runner import run_tests
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.models.wallet_transaction import WalletTxCursor, WalletTransaction
+from app.tasks.transaction_ingestion import TransactionIngestor
+
+WALLET = "0x00000000000000000000000000000000000000aa"
+CHAIN = "11155111"
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+
+class FakeBlockscout:
+    """Serves a fixed transaction list newest first, page_size items per page, filtered by age_from"""
+
+    def __init__(self, transactions, page_size: int = 2):
+        self.transactions = transactions
+        self.page_size = page_size
+        self.calls = []
+
+    async def get_transactions_by_address(self, address, chain_id, age_from=None, cursor=None):
+        self.calls.append((age_from, cursor))
+        since = datetime.strptime(age_from, "%Y-%m-%dT%H:%M:%S.00Z").replace(tzinfo=timezone.utc)
+        matching = sorted(
+            (tx for tx in self.transactions if datetime.fromisoformat(tx["timestamp"]) >= since),
+            key=lambda tx: tx["timestamp"], reverse=True
+        )
+        start = int(cursor or 0)
+        response = {"data": matching[start:start + self.page_size]}
+        if start + self.page_size < len(matching):
+            response["pagination"] = {"next_call": {"params": {"cursor": str(start + self.page_size)}}}
+        return response
+
+def _transaction(i: int, minutes_ago: float, method: str = "transfer"):
+    return {"hash": f"0x{i:064x}", "timestamp": (NOW - timedelta(minutes=minutes_ago)).isoformat(), "method": method}
+
+def _ingestor(client, max_pages: int = 10):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=[WalletTxCursor.__table__, WalletTransaction.__table__])
+    return TransactionIngestor(client, sessionmaker(bind=engine), initial_lookback=24 * 3600,
+                               max_pages=max_pages)
+
+def _ingest(ingestor):
+    return asyncio.run(ingestor.ingest(WALLET, CHAIN))
+
+def _stored_hashes(ingestor):
+    db = ingestor.session_factory()
+    try:
+        return {row[0] for row in db.query(WalletTransaction.tx_hash).all()}
+    finally:
+        db.close()
+
+def _cursor(ingestor):
+    db = ingestor.session_factory()
+    try:
+        return db.get(WalletTxCursor, (WALLET, CHAIN))
+    finally:
+        db.close()
+
+def test_cursor_advances_to_newest():
+    client = FakeBlockscout([_transaction(i, 60 - i) for i in range(5)])
+    ingestor = _ingestor(client)
+    result = _ingest(ingestor)
+    assert result.baseline and not result.truncated
+    assert len(result.new_transactions) == 5 and result.pages == 3
+    cursor = _cursor(ingestor)
+    assert cursor.last_tx_hash == _transaction(4, 56)["hash"]
+    assert cursor.page_cursor is None
+
+    # Next pass only asks for the window since the cursor, and stores nothing twice
+    client.transactions.append(_transaction(5, 1, method="borrow"))
+    signals = []
+    ingestor.subscribe(signals.append)
+    result = _ingest(ingestor)
+    assert [tx["hash"] for tx in result.new_transactions] == [_transaction(5, 1)["hash"]]
+    assert len(signals) == 1 and not result.baseline
+
+def test_truncated_window_is_resumed_before_advancing():
+    client = FakeBlockscout([_transaction(i, 60 - i) for i in range(7)])
+    ingestor = _ingestor(client, max_pages=2)
+    with contextlib.redirect_stdout(io.StringIO()):
+        first = _ingest(ingestor)
+    assert first.truncated and len(first.new_transactions) == 4
+    cursor = _cursor(ingestor)
+    assert cursor.last_timestamp is None  # Not advanced past the unfinished window
+    assert cursor.page_cursor == "4"
+    assert cursor.pending_tx_hash == _transaction(6, 54)["hash"]
+
+    second = _ingest(ingestor)
+    assert second.resumed and not second.truncated
+    assert client.calls[2] == (client.calls[0][0], "4")  # Same window, from where the first pass stopped
+    assert _stored_hashes(ingestor) == {_transaction(i, 0)["hash"] for i in range(7)}
+    cursor = _cursor(ingestor)
+    assert cursor.page_cursor is None and cursor.pending_timestamp is None
+    assert cursor.last_tx_hash == _transaction(6, 54)["hash"]
+    assert ingestor.get_stats()["truncated_passes"] == 1
+
+def test_empty_window_starts_cursor_at_pass():
+    ingestor = _ingestor(FakeBlockscout([]))
+    result = _ingest(ingestor)
+    assert result.pages == 1 and not result.new_transactions
+    assert _cursor(ingestor).last_timestamp is not None
+
+def main():
+    return run_tests("Transaction ingestion tests", [
+        test_cursor_advances_to_newest,
+        test_truncated_window_is_resumed_before_advancing,
+        test_empty_window_starts_cursor_at_pass,
+    ])
+
+if __name__ == "__main__":
+    sys.exit(main())